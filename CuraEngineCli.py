@@ -0,0 +1,139 @@
+# ===================================================================
+# Opis: Priprava samostojnega zagona CuraEngine (ukazna vrstica).
+#  - Nastavitve se zapišejo v .def.json (vrednosti kot nizi, enako
+#    kot jih Cura pošlje prek StartSliceJob)
+#  - Modeli kot binarni STL (že transformirani, Z navzgor)
+#  - Glava iz dnevnika CuraEngine nadomesti ;TIME:6666 ipd., ki jih
+#    CLI zapiše na začetek datoteke
+#  - Brez Qt in Cure (numpy samo za STL)
+# ===================================================================
+
+import json
+import re
+
+try:
+    from .GcodeEngine import isHeaderChunk
+except ImportError:  # samostojna uporaba brez paketa
+    from GcodeEngine import isHeaderChunk
+
+
+# -------------------------------------------------------------
+# {key} in {key, extruder_nr} v start/end G-code
+# -------------------------------------------------------------
+_TOKEN = re.compile(r"\{\s*(\w+)\s*(?:,\s*(-?\d+)\s*)?\}")
+
+
+def expandGcodeTokens(gcode, global_settings, extruder_settings, default_extruder=0):
+    def replace(match):
+        key, extruder = match.group(1), match.group(2)
+        if extruder is not None:
+            extruder = int(extruder)
+            if extruder == -1:
+                extruder = default_extruder
+            sources = []
+            if extruder < len(extruder_settings):
+                sources.append(extruder_settings[extruder])
+        else:
+            sources = []
+            if default_extruder < len(extruder_settings):
+                sources.append(extruder_settings[default_extruder])
+            sources.append(global_settings)
+        for settings in sources:
+            if key in settings:
+                return settings[key]
+        return match.group(0)
+
+    return _TOKEN.sub(replace, gcode)
+
+
+# -------------------------------------------------------------
+# Nastavitve kot ploska definicija za -j
+# -------------------------------------------------------------
+def writeSettingsJson(path, settings):
+    definition = {
+        "version": 2,
+        "name": "SliceAndJoinGcode",
+        "metadata": {},
+        "settings": {
+            key: {"label": key, "type": "str", "default_value": str(value)}
+            for key, value in settings.items()
+        },
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(definition, f)
+
+
+# -------------------------------------------------------------
+# Binarni STL iz (n*3, 3) oglišč
+# -------------------------------------------------------------
+def writeBinaryStl(path, vertices):
+    import numpy
+
+    triangles = numpy.asarray(vertices, dtype="<f4").reshape(-1, 3, 3)
+    records = numpy.zeros(
+        len(triangles),
+        dtype=[("normal", "<f4", (3,)), ("vertices", "<f4", (3, 3)), ("attr", "<u2")],
+    )
+    records["vertices"] = triangles
+    with open(path, "wb") as f:
+        f.write(b"SliceAndJoinGcode".ljust(80, b" "))
+        f.write(len(triangles).to_bytes(4, "little"))
+        records.tofile(f)
+
+
+# -------------------------------------------------------------
+# Ukaz: CuraEngine slice -j global -eN -j extruder ... -l model -o out
+# models = [(stl_path, extruder_nr, {nastavitve modela}), ...]
+# -------------------------------------------------------------
+def buildCommand(engine, global_json, extruder_jsons, models, output, threads=0):
+    command = [engine, "slice"]
+    if threads:
+        command.append("-m%d" % threads)
+    command += ["-j", global_json]
+    for extruder_nr, extruder_json in enumerate(extruder_jsons):
+        command += ["-e%d" % extruder_nr, "-j", extruder_json]
+    for stl_path, extruder_nr, mesh_settings in models:
+        command += ["-e%d" % extruder_nr, "-l", stl_path]
+        for key, value in mesh_settings.items():
+            command += ["-s", "%s=%s" % (key, value)]
+    command += ["-o", output]
+    return command
+
+
+# -------------------------------------------------------------
+# Prava glava (;TIME, ;Filament used ...) iz dnevnika CuraEngine
+# -------------------------------------------------------------
+_LOG_LINE = re.compile(r"^\[\d{4}-\d\d-\d\d ")
+
+
+def headerFromEngineLog(log):
+    marker = "Gcode header after slicing:"
+    index = log.rfind(marker)
+    if index == -1:
+        return None
+
+    header = []
+    for line in log[index + len(marker) :].lstrip(" ").splitlines():
+        if _LOG_LINE.match(line):
+            break
+        header.append(line)
+    while header and not header[-1].strip():
+        header.pop()
+    return "\n".join(header) if header else None
+
+
+def replaceHeader(chunks, header):
+    """Zamenjaj glavo z nadomestnimi vrednostmi v chunks[0] (na mestu)."""
+    if not chunks or not header:
+        return False
+    first = chunks[0]
+    if not isHeaderChunk(first):
+        return False
+
+    last_line = header.rsplit("\n", 1)[-1]
+    last_key = last_line.split(":", 1)[0] if ":" in last_line else last_line
+    match = re.search(r"^%s[^\n]*$" % re.escape(last_key), first, re.MULTILINE)
+    if match is None:
+        return False
+    chunks[0] = header + first[match.end() :]
+    return True
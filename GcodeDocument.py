@@ -0,0 +1,398 @@
+# ===================================================================
+# Opis: Združen G-code kot tabela kosov (piece table) z indeksom vrstic.
+#  - Kos = (buffer, začetek, konec); bufferji so nizi iz obeh slicev
+#    in besedila zamenjav, nikoli se ne kopirajo ali spreminjajo
+#  - Replace naredi nov dokument: nespremenjeni kosi se samo
+#    prepišejo, delo je sorazmerno številu zadetkov
+#  - Število vrstic na kos + kumulativni odmiki (array)
+#  - Odmiki vrstic znotraj kosa se izračunajo šele ob dostopu
+#    (LRU nekaj kosov), zato je pomnilnik blizu velikosti G-code
+#  - DocumentHistory: undo/redo = zamenjava trenutne verzije, O(1);
+#    hrani največ HISTORY_LIMIT verzij (najstarejše odpadejo)
+#  - spilled: ASCII kosi iz RAM v začasno datoteko (mmap), v RAM
+#    ostanejo samo odmiki – za G-code nad pomnilniškim proračunom
+#  - fromFile: obstoječa datoteka prek mmap (kosi po FILE_PIECE,
+#    vrstice z ne-ASCII znaki kot nizi), besedilo se ne bere v RAM
+#  - Brez Qt in Cure
+# ===================================================================
+
+import bisect
+import collections
+import itertools
+import mmap
+import operator
+import re
+import tempfile
+from array import array
+
+FILE_PIECE = 1 << 20  # kosi datoteke (tudi enota LRU odmikov vrstic)
+HISTORY_LIMIT = 20  # verzij za Undo / Redo
+
+# ne-ASCII bajti (UTF-8: odmik znaka ≠ odmik bajta)
+_NON_ASCII = re.compile(rb"[\x80-\xff]+")
+
+
+class GcodeDocument:
+
+    LINE_CACHE_PIECES = 64
+
+    def __init__(self, texts=()):
+        spans = [(text, 0, len(text)) for text in texts if text]
+        self._build(spans, [text.count("\n") for text, _, _ in spans])
+
+    def _build(self, spans, newline_counts):
+        self._pieces = spans
+
+        # _offsets[i] = odmik kosa i, _newlines[i] = "\n" pred kosom i
+        lengths = (end - start for _, start, end in spans)
+        self._offsets = array("q", itertools.accumulate(lengths, initial=0))
+        self._newlines = array("q", itertools.accumulate(newline_counts, initial=0))
+
+        self._line_cache = collections.OrderedDict()
+
+    @classmethod
+    def fromText(cls, text):
+        return cls([text])
+
+    @classmethod
+    def fromFile(cls, path, piece_size=FILE_PIECE):
+        """Dokument iz datoteke UTF-8 prek mmap (datoteka ostane odprta)."""
+        f = open(path, "rb")
+        try:
+            file_buffer = FileBuffer(f)
+        except ValueError:  # prazna datoteka se ne da preslikati
+            f.close()
+            return cls()
+
+        # kosi do konca vrstice za piece_size; kos z ne-ASCII znaki se
+        # razdeli, njegove vrstice z ne-ASCII znaki postanejo nizi
+        raw = file_buffer.raw()
+        spans = []
+        counts = []
+        start = 0
+        while start < len(raw):
+            end = raw.find(b"\n", start + piece_size) + 1 or len(raw)
+            data = raw[start:end]
+            if data.isascii():
+                spans.append((file_buffer, start, end))
+                counts.append(data.count(b"\n"))
+            else:
+                cls._splitNonAscii(file_buffer, start, data, spans, counts)
+            start = end
+        return cls._fromSpans(spans, counts)
+
+    @staticmethod
+    def _splitNonAscii(file_buffer, base, data, spans, counts):
+        position = 0
+        for match in _NON_ASCII.finditer(data):
+            if match.start() < position:
+                continue  # ista vrstica kot prejšnji zadetek
+            line_start = data.rfind(b"\n", position, match.start()) + 1 or position
+            if line_start > position:
+                spans.append((file_buffer, base + position, base + line_start))
+                counts.append(data.count(b"\n", position, line_start))
+            position = data.find(b"\n", match.end())
+            position = len(data) if position == -1 else position
+            text = data[line_start:position].decode("utf-8", "replace")
+            spans.append((text, 0, len(text)))
+            counts.append(0)
+        if position < len(data):
+            spans.append((file_buffer, base + position, base + len(data)))
+            counts.append(data.count(b"\n", position))
+
+    # ---------------------------------------------------------
+    # Osnovno
+    # ---------------------------------------------------------
+    def pieceCount(self):
+        return len(self._pieces)
+
+    def iterText(self):
+        """Besedilo po kosih (za zapis brez sestavljanja niza)."""
+        for buffer, start, end in self._pieces:
+            yield buffer[start:end]
+
+    def size(self):
+        return self._offsets[-1]
+
+    def lineCount(self):
+        return self._newlines[-1] + 1
+
+    def text(self):
+        return "".join(self.iterText())
+
+    def fileBuffers(self):
+        """FileBuffer-ji (mmap), iz katerih bere dokument."""
+        return {b for b, _, _ in self._pieces if isinstance(b, FileBuffer)}
+
+    def replaceBuffer(self, old, new):
+        """Kosi iz old odslej berejo iz new z enakim besedilom (kopija
+        datoteke); dokument ostane isti objekt (Undo, indeks layerjev)."""
+        self._pieces = [
+            (new if buffer is old else buffer, start, end)
+            for buffer, start, end in self._pieces
+        ]
+
+    def memorySize(self):
+        """Znakov v kosih iz RAM (kosi iz datoteke se ne štejejo)."""
+        return sum(
+            end - start
+            for buffer, start, end in self._pieces
+            if isinstance(buffer, str)
+        )
+
+    # ---------------------------------------------------------
+    # Vrstice
+    # ---------------------------------------------------------
+    def lineStartOffset(self, line):
+        """Odmik prvega znaka vrstice (0 = prva vrstica)."""
+        if line <= 0:
+            return 0
+        if line >= self.lineCount():
+            return self.size()
+        # kos, ki vsebuje line-ti "\n" (šteto od 1)
+        index = bisect.bisect_left(self._newlines, line) - 1
+        newline_pos = self._pieceNewlines(index)[line - self._newlines[index] - 1]
+        return self._offsets[index] + newline_pos + 1
+
+    def lineAtOffset(self, offset):
+        offset = max(0, min(offset, self.size()))
+        index = bisect.bisect_right(self._offsets, offset) - 1
+        if index >= len(self._pieces):
+            return self.lineCount() - 1
+        buffer, start, _ = self._pieces[index]
+        local = offset - self._offsets[index]
+        return self._newlines[index] + buffer.count("\n", start, start + local)
+
+    def nextLineStart(self, offset):
+        """Začetek prve vrstice za odmikom (brez LRU, varno iz niti)."""
+        if offset >= self.size():
+            return self.size()
+        index = bisect.bisect_right(self._offsets, offset) - 1
+        for index in range(index, len(self._pieces)):
+            buffer, start, end = self._pieces[index]
+            local = start + max(offset - self._offsets[index], 0)
+            position = buffer.find("\n", local, end)
+            if position != -1:
+                return self._offsets[index] + position - start + 1
+        return self.size()
+
+    def getLines(self, start, stop):
+        start = max(0, start)
+        stop = min(stop, self.lineCount())
+        if start >= stop:
+            return []
+        begin = self.lineStartOffset(start)
+        if stop < self.lineCount():
+            end = self.lineStartOffset(stop) - 1
+        else:
+            end = self.size()
+        return self.textRange(begin, end).split("\n")
+
+    def textRange(self, begin, end):
+        if begin >= end:
+            return ""
+        index = bisect.bisect_right(self._offsets, begin) - 1
+        parts = []
+        while index < len(self._pieces) and self._offsets[index] < end:
+            buffer, start, stop = self._pieces[index]
+            piece_start = self._offsets[index]
+            local_begin = start + max(begin - piece_start, 0)
+            parts.append(buffer[local_begin : min(stop, start + end - piece_start)])
+            index += 1
+        return "".join(parts)
+
+    def iterSegments(self, segment_size):
+        """(odmik, besedilo) odsekov ~segment_size, poravnanih na vrstice."""
+        begin = 0
+        while begin < self.size():
+            end = self.nextLineStart(begin + segment_size)
+            yield begin, self.textRange(begin, end)
+            begin = end
+
+    # ---------------------------------------------------------
+    # Zamenjave: edits = urejeni (začetek, konec, besedilo)
+    # ---------------------------------------------------------
+    def replaced(self, edits):
+        """Nov dokument z zamenjavami; ta ostane nespremenjen."""
+        spans = []
+        counts = []
+        position = 0
+        for edit_start, edit_end, text in edits:
+            self._copyRange(position, edit_start, spans, counts)
+            if text:
+                spans.append((text, 0, len(text)))
+                counts.append(text.count("\n"))
+            position = edit_end
+        self._copyRange(position, self.size(), spans, counts)
+        return self._fromSpans(spans, counts)
+
+    def slice(self, begin, end):
+        """Dokument iz besedila [begin, end) brez kopiranja bufferjev."""
+        spans = []
+        counts = []
+        self._copyRange(begin, end, spans, counts)
+        return self._fromSpans(spans, counts)
+
+    def spilled(self, f):
+        """Enak dokument z ASCII kosi iz RAM v datoteki f (w+b) prek mmap."""
+        spans = []
+        position = 0
+        for buffer, start, end in self._pieces:
+            text = buffer[start:end] if isinstance(buffer, str) else ""
+            if text and text.isascii():
+                f.write(text.encode("ascii"))
+                spans.append((None, position, position + len(text)))
+                position += len(text)
+            else:  # že v datoteki; ne-ASCII: odmiki znakov ≠ odmiki bajtov
+                spans.append((buffer, start, end))
+        f.flush()
+        if not position:
+            return self
+
+        file_buffer = FileBuffer(f)
+        spans = [
+            (file_buffer if buffer is None else buffer, start, end)
+            for buffer, start, end in spans
+        ]
+        counts = [b - a for a, b in zip(self._newlines, self._newlines[1:])]
+        return self._fromSpans(spans, counts)
+
+    def spilledOverBudget(self, budget):
+        """spilled v začasno datoteko, če je v RAM več kot budget znakov
+        (0 = brez omejitve); sicer isti dokument."""
+        if not budget or self.memorySize() <= budget:
+            return self
+        return self.spilled(tempfile.TemporaryFile(prefix="slice_and_join_"))
+
+    @classmethod
+    def joined(cls, documents):
+        """Dokumenti zaporedoma kot en dokument (kosi se ne kopirajo)."""
+        spans = []
+        counts = []
+        for document in documents:
+            spans.extend(document._pieces)
+            newlines = document._newlines
+            counts.extend(b - a for a, b in zip(newlines, newlines[1:]))
+        return cls._fromSpans(spans, counts)
+
+    @classmethod
+    def _fromSpans(cls, spans, counts):
+        document = cls.__new__(cls)
+        document._build(spans, counts)
+        return document
+
+    def _copyRange(self, begin, end, spans, counts):
+        if begin >= end:
+            return
+        index = bisect.bisect_right(self._offsets, begin) - 1
+        while index < len(self._pieces) and self._offsets[index] < end:
+            buffer, start, stop = self._pieces[index]
+            piece_start = self._offsets[index]
+            if begin <= piece_start and self._offsets[index + 1] <= end:
+                # cel kos – število vrstic je že znano
+                spans.append(self._pieces[index])
+                counts.append(self._newlines[index + 1] - self._newlines[index])
+            else:
+                local_begin = start + max(begin - piece_start, 0)
+                local_end = min(stop, start + end - piece_start)
+                spans.append((buffer, local_begin, local_end))
+                counts.append(buffer.count("\n", local_begin, local_end))
+            index += 1
+
+    # ---------------------------------------------------------
+    # Odmiki "\n" znotraj kosa (leno, LRU)
+    # ---------------------------------------------------------
+    def _pieceNewlines(self, index):
+        positions = self._line_cache.get(index)
+        if positions is not None:
+            self._line_cache.move_to_end(index)
+            return positions
+
+        # "\n" za vrstico j je na vsoti dolžin vrstic 0..j + j (vse v C)
+        buffer, start, end = self._pieces[index]
+        piece = buffer[start:end]
+        typecode = "I" if len(piece) < (1 << 32) else "q"
+        lengths = itertools.accumulate(map(len, piece.split("\n")))
+        positions = array(typecode, map(operator.add, lengths, itertools.count()))
+        positions.pop()  # zadnja "vrstica" kosa ne konča z "\n"
+
+        self._line_cache[index] = positions
+        if len(self._line_cache) > self.LINE_CACHE_PIECES:
+            self._line_cache.popitem(last=False)
+        return positions
+
+
+# -------------------------------------------------------------
+# ASCII besedilo v datoteki z vmesnikom niza, ki ga uporablja
+# GcodeDocument (rezi, count in find z odmiki)
+# -------------------------------------------------------------
+class FileBuffer:
+    def __init__(self, f):
+        self._file = f  # ostane odprta, dokler obstaja mmap
+        self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self):
+        return len(self._map)
+
+    def name(self):
+        """Pot datoteke (začasna datoteka: lahko deskriptor)."""
+        return self._file.name
+
+    def copied(self, f):
+        """Enak buffer nad kopijo v datoteki f (w+b)."""
+        f.write(self._map)
+        f.flush()
+        return FileBuffer(f)
+
+    def raw(self):
+        return self._map
+
+    def __getitem__(self, key):
+        return self._map[key].decode("ascii")
+
+    def count(self, sub, start, end):
+        return self._map[start:end].count(sub.encode("ascii"))
+
+    def find(self, sub, start, end):
+        return self._map.find(sub.encode("ascii"), start, end)
+
+
+# -------------------------------------------------------------
+# Verzije dokumenta za Undo / Redo
+# -------------------------------------------------------------
+class DocumentHistory:
+    def __init__(self, document, limit=HISTORY_LIMIT):
+        self._versions = [document]
+        self._current = 0
+        self._limit = limit
+
+    def current(self):
+        return self._versions[self._current]
+
+    def push(self, document):
+        # nova sprememba zavrže verzije za Redo
+        del self._versions[self._current + 1 :]
+        self._versions.append(document)
+        # najstarejše verzije odpadejo (njihovi kosi in indeksi layerjev)
+        del self._versions[: -self._limit]
+        self._current = len(self._versions) - 1
+        return document
+
+    def versions(self):
+        return tuple(self._versions)
+
+    def canUndo(self):
+        return self._current > 0
+
+    def canRedo(self):
+        return self._current < len(self._versions) - 1
+
+    def undo(self):
+        if self.canUndo():
+            self._current -= 1
+        return self.current()
+
+    def redo(self):
+        if self.canRedo():
+            self._current += 1
+        return self.current()
@@ -0,0 +1,285 @@
+# ===================================================================
+# Opis: Jedro za razrez in združevanje G-code (brez Qt in Cure).
+#  - Vhod: kosi iz scene.gcode_dict ali vrstice G-code datoteke
+#  - Razrez natančno na vrstici ;LAYER:n (;LAYER:10 ni ;LAYER:1)
+#  - Izhod: generatorji kosov besedila, O(1) dodatnega pomnilnika
+#  - Rezultat je enak "\n".join(prvi_layer + ostali_layerji)
+# ===================================================================
+
+import functools
+import re
+
+try:  # Python 3.11+: sre_parse je zastarel
+    from re import _constants as sre_constants
+    from re import _parser as sre_parse
+except ImportError:
+    import sre_constants
+    import sre_parse
+
+# Python 3.11+: (?>...) in *+
+_ATOMIC_GROUP = getattr(sre_constants, "ATOMIC_GROUP", None)
+_POSSESSIVE_REPEAT = getattr(sre_constants, "POSSESSIVE_REPEAT", None)
+
+# Cura združi kose iz gcode_dict z "\n"
+SEPARATOR = "\n"
+
+
+# -------------------------------------------------------------
+# Regex za vrstico ;LAYER:n
+# -------------------------------------------------------------
+@functools.lru_cache(maxsize=16)
+def layerMarker(layer):
+    """Vrni regex, ki najde točno vrstico ;LAYER:n."""
+    return re.compile(r"^;LAYER:%d\r?$" % layer, re.MULTILINE)
+
+
+def _markerIndex(chunk, marker):
+    match = marker.search(chunk)
+    return -1 if match is None else match.start()
+
+
+# -------------------------------------------------------------
+# Indeks prvega kosa z ;LAYER:n (od start naprej), sicer -1
+# -------------------------------------------------------------
+def findLayer(chunks, layer=1, start=0):
+    marker = layerMarker(layer)
+    for index in range(start, len(chunks)):
+        if marker.search(chunks[index]):
+            return index
+    return -1
+
+
+# -------------------------------------------------------------
+# Glava CuraEngine (;FLAVOR / ;START_OF_HEADER), ki jo Cura
+# vstavi na začetek seznama šele ob koncu slica
+# -------------------------------------------------------------
+def isHeaderChunk(chunk):
+    return chunk.startswith(";FLAVOR:") or chunk.startswith(";START_OF_HEADER")
+
+
+# -------------------------------------------------------------
+# Kosi pred ;LAYER:n (glava, start G-code, layerji < n)
+# -------------------------------------------------------------
+def iterBeforeLayer(chunks, layer=1):
+    marker = layerMarker(layer)
+    for chunk in chunks:
+        index = _markerIndex(chunk, marker)
+        if index == -1:
+            yield chunk
+            continue
+        # marker sredi kosa: del pred njim brez zadnjega "\n"
+        if index > 0:
+            yield chunk[: index - 1]
+        return
+
+
+# -------------------------------------------------------------
+# Kosi od ;LAYER:n dalje
+# -------------------------------------------------------------
+def iterFromLayer(chunks, layer=1):
+    marker = layerMarker(layer)
+    chunks = iter(chunks)
+    for chunk in chunks:
+        index = _markerIndex(chunk, marker)
+        if index != -1:
+            yield chunk[index:]
+            yield from chunks
+            return
+
+
+# -------------------------------------------------------------
+# Združi zaporedja kosov (kot "\n".join, a brez kopije)
+# -------------------------------------------------------------
+def iterJoined(*sequences):
+    need_separator = False
+    for sequence in sequences:
+        for chunk in sequence:
+            if need_separator:
+                yield SEPARATOR
+            yield chunk
+            need_separator = True
+
+
+def iterMerged(first_chunks, rest_chunks, layer=1):
+    """Prvi prehod do ;LAYER:n + drugi prehod od ;LAYER:n dalje."""
+    return iterJoined(
+        iterBeforeLayer(first_chunks, layer), iterFromLayer(rest_chunks, layer)
+    )
+
+
+def mergeToString(first_chunks, rest_chunks, layer=1):
+    return "".join(iterMerged(first_chunks, rest_chunks, layer))
+
+
+# -------------------------------------------------------------
+# Vrstice datoteke kot kosi (brez "\n", da iterJoined ohrani vsebino)
+# -------------------------------------------------------------
+def iterFileLines(path, encoding="utf-8"):
+    ends_with_newline = False
+    with open(path, "r", encoding=encoding, errors="replace", newline="") as f:
+        for line in f:
+            ends_with_newline = line.endswith("\n")
+            yield line[:-1] if ends_with_newline else line
+    if ends_with_newline:
+        yield ""
+
+
+# -------------------------------------------------------------
+# Datoteka kot kosi, razrezani pred vsako vrstico ;LAYER:
+# (kot gcode_dict; "\n".join(kosi) == vsebina datoteke)
+# -------------------------------------------------------------
+def iterFileChunks(path, encoding="utf-8", block_size=1 << 20):
+    boundary = "\n;LAYER:"
+    pending = ""
+    with open(path, "r", encoding=encoding, errors="replace", newline="") as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            search_from = max(len(pending) - len(boundary), 0)
+            pending += block
+            start = 0
+            while True:
+                index = pending.find(boundary, max(search_from, start))
+                if index == -1:
+                    break
+                yield pending[start:index]
+                start = index + 1
+            pending = pending[start:]
+    yield pending
+
+
+# -------------------------------------------------------------
+# Ali regex zagotovo ne preseže vrstice (in ne najde praznega niza)?
+# Samo takšen se lahko uporabi na vsakem kosu posebej (odseki so
+# poravnani na vrstice, zato ^ in $ z MULTILINE veljata tudi v kosu).
+# Odloča razčlenjen vzorec (sre_parse): noben znak ali razred ne sme
+# sprejeti "\n", sidra ne smejo gledati začetka / konca niza.
+# -------------------------------------------------------------
+_NEWLINE = ord("\n")
+# \s, \D, \W sprejmejo "\n"
+_NEWLINE_CATEGORIES = {
+    sre_constants.CATEGORY_SPACE,
+    sre_constants.CATEGORY_NOT_DIGIT,
+    sre_constants.CATEGORY_NOT_WORD,
+    sre_constants.CATEGORY_LINEBREAK,
+}
+# \A, \Z, \B; ^ in $ brez MULTILINE (začetek / konec kosa)
+_STRING_ANCHORS = {
+    sre_constants.AT_BEGINNING_STRING,
+    sre_constants.AT_END_STRING,
+    sre_constants.AT_NON_BOUNDARY,
+}
+_LINE_ANCHORS = {sre_constants.AT_BEGINNING, sre_constants.AT_END}
+
+
+def isLineLocal(pattern):
+    try:
+        parsed = sre_parse.parse(pattern.pattern, pattern.flags)
+    except (re.error, TypeError):  # bytes ali neznana skladnja
+        return False
+    if not _isLocal(parsed, parsed.state.flags):
+        return False
+    return pattern.search("") is None
+
+
+def _isLocal(items, flags):
+    c = sre_constants
+    for op, av in items:
+        if op is c.LITERAL:
+            if av == _NEWLINE:
+                return False
+        elif op is c.NOT_LITERAL:
+            if av != _NEWLINE:  # [^\n] je varen, [^;] ne
+                return False
+        elif op is c.ANY:
+            if flags & re.DOTALL:
+                return False
+        elif op is c.IN:
+            if _setMatchesNewline(av):
+                return False
+        elif op is c.AT:
+            if av in _STRING_ANCHORS:
+                return False
+            if av in _LINE_ANCHORS and not flags & re.MULTILINE:
+                return False
+        elif op is c.SUBPATTERN:
+            _, add_flags, del_flags, body = av
+            if not _isLocal(body, (flags | add_flags) & ~del_flags):
+                return False
+        elif op in (c.MAX_REPEAT, c.MIN_REPEAT, _POSSESSIVE_REPEAT):
+            if not _isLocal(av[2], flags):
+                return False
+        elif op is c.BRANCH:
+            if not all(_isLocal(branch, flags) for branch in av[1]):
+                return False
+        elif op in (c.ASSERT, c.ASSERT_NOT):
+            if not _isLocal(av[1], flags):
+                return False
+        elif op is _ATOMIC_GROUP:
+            if not _isLocal(av, flags):
+                return False
+        elif op is c.GROUPREF_EXISTS:
+            _, yes, no = av
+            if not _isLocal(yes, flags) or (no and not _isLocal(no, flags)):
+                return False
+        elif op is not c.GROUPREF:  # \1 ponovi že preverjeno skupino
+            return False  # neznan ukaz – raje ne
+    return True
+
+
+def _setMatchesNewline(items):
+    c = sre_constants
+    negate = False
+    matches = False
+    for op, av in items:
+        if op is c.NEGATE:
+            negate = True
+        elif op is c.LITERAL:
+            matches |= av == _NEWLINE
+        elif op is c.RANGE:
+            matches |= av[0] <= _NEWLINE <= av[1]
+        elif op is c.CATEGORY:
+            matches |= av in _NEWLINE_CATEGORIES
+        else:
+            return True
+    return matches != negate
+
+
+# -------------------------------------------------------------
+# Uporabi zamenjave (pattern, replacement) na vsakem kosu sproti
+# -------------------------------------------------------------
+def iterEdited(pieces, edits):
+    for piece in pieces:
+        if piece != SEPARATOR:
+            for pattern, replacement in edits:
+                piece = pattern.sub(replacement, piece)
+        yield piece
+
+
+# -------------------------------------------------------------
+# Zapiši kose v datoteko (progress(zapisano, skupaj) vsakih ~4 MB)
+# -------------------------------------------------------------
+def writePieces(f, pieces, progress=None, total=0, step=1 << 22):
+    written = 0
+    next_report = step
+    for piece in pieces:
+        f.write(piece)
+        written += len(piece)
+        if progress is not None and written >= next_report:
+            progress(written, total)
+            next_report = written + step
+    if progress is not None:
+        progress(written, total)
+    return written
+
+
+def joinedSize(*sequences):
+    """Dolžina iterJoined(*sequences) brez gradnje niza."""
+    count = 0
+    size = 0
+    for sequence in sequences:
+        for chunk in sequence:
+            count += 1
+            size += len(chunk)
+    return size + max(count - 1, 0) * len(SEPARATOR)
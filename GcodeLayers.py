@@ -0,0 +1,203 @@
+# ===================================================================
+# Opis: Indeks layerjev GcodeDocument (;LAYER:n).
+#  - En prehod čez besedilo (regex po odsekih, poravnanih na vrstice)
+#  - Za vsak layer: številka, odmik, vrstica, Z (array)
+#  - Layer → odmik / vrstica / obseg layerjev v O(1)
+#  - replaced: indeks za document.replaced(edits) brez novega
+#    prehoda, če zamenjave ne spremenijo vrstic ;LAYER: ali Z (glava,
+#    ;TIME_ELAPSED); sicer None
+#  - mergeAtLayer: drugi prehod se indeksira enkrat; razrez na
+#    ;LAYER:n je vpogled v indeks (layerRange), indeks združenega
+#    G-code se sestavi iz indeksov obeh delov brez novega prehoda
+#  - Brez Qt in Cure
+# ===================================================================
+
+import re
+from array import array
+
+try:
+    from .GcodeDocument import GcodeDocument
+    from .GcodeEngine import SEPARATOR, iterBeforeLayer, iterJoined
+except ImportError:  # samostojna uporaba brez paketa
+    from GcodeDocument import GcodeDocument
+    from GcodeEngine import SEPARATOR, iterBeforeLayer, iterJoined
+
+SEGMENT_SIZE = 1 << 22
+
+# ;LAYER:n ali premik z Z (prvi v layerju je višina layerja);
+# "\n" namesto "^" je za sre kar nekajkrat hitrejši
+_LAYER_OR_Z = re.compile(
+    r"\n(?:;LAYER:(-?\d+)\r?$|G[01][ \t][^;\nZ]*Z([-+]?(?:\d+\.?\d*|\.\d+)))",
+    re.MULTILINE,
+)
+
+
+class LayerIndex:
+    def __init__(self, document, segment_size=SEGMENT_SIZE):
+        self.document = document
+        self.numbers = array("q")
+        self.offsets = array("q")
+        self.lines = array("q")
+        self.heights = array("d")
+        self._build(segment_size)
+        self._findPositions()
+
+    def _findPositions(self):
+        # zaporedne številke (običajno) – indeks = layer - prvi,
+        # sicer slovar številka → indeks
+        numbers = self.numbers
+        self._positions = None
+        if any(numbers[i] != numbers[0] + i for i in range(len(numbers))):
+            self._positions = {number: i for i, number in enumerate(numbers)}
+
+    @classmethod
+    def _fromArrays(cls, document, numbers, offsets, lines, heights):
+        index = cls.__new__(cls)
+        index.document = document
+        index.numbers = numbers
+        index.offsets = offsets
+        index.lines = lines
+        index.heights = heights
+        index._findPositions()
+        return index
+
+    def _build(self, segment_size):
+        line = 0
+        height = 0.0
+        height_set = True  # Z pred prvim layerjem ne šteje
+        for base, text in self.document.iterSegments(segment_size):
+            # odsek se začne z vrstico – "\n" spredaj, odmiki so zato +1
+            text = "\n" + text
+            base -= 1
+            position = 1
+            for match in _LAYER_OR_Z.finditer(text):
+                layer = match.group(1)
+                if layer is None:
+                    if not height_set:
+                        height = float(match.group(2))
+                        self.heights[-1] = height
+                        height_set = True
+                    continue
+                start = match.start() + 1
+                line += text.count("\n", position, start)
+                position = start
+                self.numbers.append(int(layer))
+                self.offsets.append(base + start)
+                self.lines.append(line)
+                # brez Z premika ostane višina prejšnjega layerja
+                self.heights.append(height)
+                height_set = False
+            line += text.count("\n", position)
+
+    # ---------------------------------------------------------
+    # Poizvedbe
+    # ---------------------------------------------------------
+    def count(self):
+        return len(self.numbers)
+
+    def indexOf(self, layer):
+        """Položaj layerja v indeksu ali -1."""
+        if self._positions is not None:
+            return self._positions.get(layer, -1)
+        if not self.numbers:
+            return -1
+        index = layer - self.numbers[0]
+        return index if 0 <= index < len(self.numbers) else -1
+
+    def lineCount(self, index):
+        if index + 1 < len(self.lines):
+            return self.lines[index + 1] - self.lines[index]
+        return self.document.lineCount() - self.lines[index]
+
+    def layerRange(self, first, last=None):
+        """(začetek, konec) besedila layerjev first..last ali None."""
+        first_index = self.indexOf(first)
+        last_index = self.indexOf(first if last is None else last)
+        if first_index == -1 or last_index < first_index:
+            return None
+        begin = self.offsets[first_index]
+        if last_index + 1 < len(self.offsets):
+            end = self.offsets[last_index + 1]
+        else:
+            end = self.document.size()
+        return begin, end
+
+    def lastNumber(self):
+        return self.numbers[-1] if self.numbers else None
+
+    # ---------------------------------------------------------
+    # Indeks za document.replaced(edits) – zamenjave ne smejo
+    # spremeniti vrstic ;LAYER: ali Z (sicer None)
+    # ---------------------------------------------------------
+    def replaced(self, document, edits):
+        if any(self._changesLayerOrZ(*edit) for edit in edits):
+            return None
+        offsets = array("q")
+        lines = array("q")
+        shift = line_shift = 0
+        edit = 0
+        for offset, line in zip(self.offsets, self.lines):
+            while edit < len(edits):
+                start, end, text = edits[edit]
+                if start <= offset < end:
+                    return None  # zamenjava čez začetek ;LAYER:
+                if start > offset:
+                    break
+                shift += len(text) - (end - start)
+                old_text = self.document.textRange(start, end)
+                line_shift += text.count("\n") - old_text.count("\n")
+                edit += 1
+            offsets.append(offset + shift)
+            lines.append(line + line_shift)
+        return LayerIndex._fromArrays(
+            document, array("q", self.numbers), offsets, lines, array("d", self.heights)
+        )
+
+    def _changesLayerOrZ(self, start, end, text):
+        """Cele vrstice zamenjave pred in po njej proti _LAYER_OR_Z."""
+        document = self.document
+        before = document.textRange(max(start - 4096, 0), start)
+        if "\n" in before or start <= 4096:
+            before = before[before.rfind("\n") + 1 :]
+        else:  # zelo dolga vrstica
+            begin = document.lineStartOffset(document.lineAtOffset(start))
+            before = document.textRange(begin, start)
+        after = document.textRange(end, document.nextLineStart(end))
+        old = "\n" + before + document.textRange(start, end) + after
+        new = "\n" + before + text + after
+        return bool(_LAYER_OR_Z.search(old) or _LAYER_OR_Z.search(new))
+
+
+# -------------------------------------------------------------
+# Prvi prehod do ;LAYER:n + drugi od ;LAYER:n, z indeksom layerjev
+# -------------------------------------------------------------
+def mergeAtLayer(first_chunks, rest_chunks, layer=1):
+    """(dokument, LayerIndex); besedilo je enako iterMerged(...)."""
+    head_chunks = list(iterBeforeLayer(first_chunks, layer))
+    head = GcodeDocument(iterJoined(head_chunks))
+    head_index = LayerIndex(head)
+    rest = GcodeDocument(iterJoined(rest_chunks))
+    rest_index = LayerIndex(rest)
+    span = rest_index.layerRange(layer, rest_index.lastNumber())
+    if span is None:  # drugi prehod nima ;LAYER:n
+        return head, head_index
+
+    # iterJoined doda "\n" za prvim zaporedjem, če je kaj vrnilo
+    begin, end = span
+    separator = SEPARATOR if head_chunks else ""
+    document = GcodeDocument.joined(
+        [head, GcodeDocument([separator]), rest.slice(begin, rest.size())]
+    )
+    start = rest_index.indexOf(layer)
+    offset_shift = head.size() + len(separator) - begin
+    line_shift = head.lineCount() - 1 + separator.count("\n") - rest_index.lines[start]
+    index = LayerIndex._fromArrays(
+        document,
+        head_index.numbers + rest_index.numbers[start:],
+        head_index.offsets
+        + array("q", (o + offset_shift for o in rest_index.offsets[start:])),
+        head_index.lines
+        + array("q", (n + line_shift for n in rest_index.lines[start:])),
+        head_index.heights + rest_index.heights[start:],
+    )
+    return document, index
@@ -0,0 +1,90 @@
+# ===================================================================
+# Opis: Združitev obeh prehodov v končni G-code.
+#  - En vrstni red za dialog, postelje (PlateWriter) in CLI:
+#    razrez na ;LAYER:1 → stik → pravila → glava
+#  - Stik pred pravili in glavo: pravila vidijo popravek stika, glava
+#    (čas, filament, obseg) velja za G-code, ki se shrani
+#  - Indeks layerjev iz mergeAtLayer se uporablja naprej; po stiku in
+#    pravilih se zgradi znova, po glavi se samo premakne
+#  - phase(ime) = kontekst, ki vrne slovar za meritve koraka
+#    (PhaseRecorder.phase); brez njega se meritve zavržejo
+#  - Brez Qt in Cure
+# ===================================================================
+
+import contextlib
+
+try:
+    from .GcodeEngine import isHeaderChunk, iterBeforeLayer
+    from .GcodeLayers import LayerIndex, mergeAtLayer
+    from .GcodeSeam import SEAM_LAYER, checkSeam
+    from .GcodeStats import DEFAULT_ACCELERATION, analyzeDocument, headerEdits
+except ImportError:  # samostojna uporaba brez paketa
+    from GcodeEngine import isHeaderChunk, iterBeforeLayer
+    from GcodeLayers import LayerIndex, mergeAtLayer
+    from GcodeSeam import SEAM_LAYER, checkSeam
+    from GcodeStats import DEFAULT_ACCELERATION, analyzeDocument, headerEdits
+
+
+@contextlib.contextmanager
+def _noPhase(name):
+    yield {}
+
+
+def mergePasses(
+    first_chunks,
+    rest_chunks,
+    truncated=False,
+    seam_check="fix",
+    rules=None,
+    recompute_header=True,
+    acceleration=DEFAULT_ACCELERATION,
+    layer=SEAM_LAYER,
+    phase=_noPhase,
+):
+    """(dokument, LayerIndex, rezultat korakov) za slice #1 in #2."""
+    result = dict(seam=[], seam_fixed=False, rewrite=None, header_error=None)
+    rest_chunks = list(rest_chunks)
+    with phase("join"):
+        first = list(iterBeforeLayer(first_chunks, layer))
+        # skrajšan slice #1 nima glave – vzemi glavo iz slica #2
+        if truncated and rest_chunks and isHeaderChunk(rest_chunks[0]):
+            first.insert(0, rest_chunks[0])
+        document, layer_index = mergeAtLayer(first, rest_chunks, layer)
+    first = None
+
+    if seam_check != "off":
+        with phase("seam") as values:
+            # stanje stroja, ki ga slice #2 pričakuje na stiku
+            reference = iterBeforeLayer(rest_chunks, layer)
+            issues, edits = checkSeam(document, reference, layer)
+            if edits and seam_check == "fix":
+                document = document.replaced(edits)
+                layer_index = LayerIndex(document)
+            result.update(seam=issues, seam_fixed=bool(edits) and seam_check == "fix")
+            values.update(issues=len(issues))
+    rest_chunks = None
+
+    if rules is not None:
+        with phase("rewrite") as values:
+            rewritten, hits = rules.apply(document, layer_index)
+            if rewritten is not document:
+                document = rewritten
+                layer_index = LayerIndex(document)
+            result["rewrite"] = list(hits)
+            values.update(rules=len(hits), hits=sum(hits))
+
+    if recompute_header:
+        with phase("header"):
+            try:
+                stats = analyzeDocument(document, layer_index, acceleration)
+            except ImportError as e:  # numpy ni na voljo
+                result["header_error"] = str(e)
+            else:
+                edits = headerEdits(document, layer_index, stats)
+                if edits:
+                    # samo vrednosti v komentarjih – indeks se le premakne
+                    document = document.replaced(edits)
+                    layer_index = layer_index.replaced(
+                        document, edits
+                    ) or LayerIndex(document)
+    return document, layer_index, result
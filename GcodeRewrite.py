@@ -0,0 +1,449 @@
+# ===================================================================
+# Opis: Shranjeni nizi pravil za popravke G-code v enem prehodu.
+#  - Pravila (po vrsti): literal, regex in clamp (meja parametra
+#    ukaza, npr. G0/G1 F največ 6000); vsako neobvezno samo za layerje
+#    [prvi, zadnji]
+#  - Vsako pravilo ima svoj regex (sre tako hitro preskoči do literalne
+#    predpone; en regex z alternativami je bil nekajkrat počasnejši),
+#    spremenjene vrstice vseh pravil pa se zlijejo v en seznam zamenjav
+#    – ena nova verzija dokumenta in en prikaz namesto N
+#  - "^" na začetku regexa se išče kot "\n" (besedilo dobi "\n" spredaj)
+#  - Pravila veljajo po vrsti, vsako vidi rezultat prejšnjih: izvirno
+#    besedilo se preišče enkrat na pravilo, vrstica, ki jo je spremenilo
+#    že prejšnje pravilo, pa se preišče v novi obliki
+#  - Clamp pravila za iste ukaze so en regex (vse meje ene vrstice
+#    naenkrat); nespremenjene vrednosti ostanejo zapisane kot so
+#  - Layerji: dokument se razdeli na območja z enakimi aktivnimi pravili,
+#    vsako območje ima svoje (predpomnjene) regexe
+#  - Rezultat: zamenjave kot v GcodeSearch.replaceAll (nov
+#    GcodeDocument) in število zadetkov za vsako pravilo
+#  - Nizi pravil v JSON (loadRuleSets / saveRuleSets)
+#  - Brez Qt in Cure
+# ===================================================================
+
+import json
+import os
+import re
+
+try:
+    from .GcodeEngine import isLineLocal
+    from .GcodeLayers import LayerIndex
+except ImportError:  # samostojna uporaba brez paketa
+    from GcodeEngine import isLineLocal
+    from GcodeLayers import LayerIndex
+
+SEGMENT_SIZE = 1 << 20
+DENSE_MATCHES = 256  # nad tem se odsek zamenja v celoti
+
+LITERAL = "literal"
+REGEX = "regex"
+CLAMP = "clamp"
+RULE_TYPES = (LITERAL, REGEX, CLAMP)
+
+_NUMBER = r"[-+]?(?:\d+\.?\d*|\.\d+)"
+
+
+class RuleError(ValueError):
+    pass
+
+
+# -------------------------------------------------------------
+# Eno pravilo (slovar v JSON ↔ objekt)
+# -------------------------------------------------------------
+class RewriteRule:
+    def __init__(
+        self,
+        kind,
+        find="",
+        replace="",
+        ignore_case=False,
+        commands=("G0", "G1"),
+        parameter="F",
+        minimum=None,
+        maximum=None,
+        layers=None,
+        name="",
+    ):
+        self.kind = kind
+        self.find = find
+        self.replace = replace
+        self.ignore_case = ignore_case
+        self.commands = tuple(command.upper() for command in commands)
+        self.parameter = parameter.upper()
+        self.minimum = minimum
+        self.maximum = maximum
+        self.layers = layers  # (prvi, zadnji ali None) ali None = vsi
+        self.name = name or find or "%s %s" % ("/".join(self.commands), parameter)
+        self._validate()
+
+    def _validate(self):
+        if self.kind not in RULE_TYPES:
+            raise RuleError("Unknown rule type: %r" % self.kind)
+        if self.kind == CLAMP:
+            if len(self.parameter) != 1 or not self.parameter.isalpha():
+                raise RuleError("%s: parameter must be one letter" % self.name)
+            if not self.commands or not all(
+                re.fullmatch(r"[GMT]\d+", command) for command in self.commands
+            ):
+                raise RuleError("%s: commands must look like G1 or M104" % self.name)
+            if self.minimum is None and self.maximum is None:
+                raise RuleError("%s: clamp needs min or max" % self.name)
+            return
+        if not self.find:
+            raise RuleError("%s: empty find text" % self.name)
+        if self.kind == REGEX:
+            try:
+                pattern = self.compiled()
+            except re.error as e:
+                raise RuleError("%s: %s" % (self.name, e)) from e
+            if pattern.search(""):
+                raise RuleError("%s: pattern matches empty text" % self.name)
+
+    @classmethod
+    def fromDict(cls, values):
+        layers = values.get("layers")
+        if layers is not None:
+            layers = (int(layers[0]), None if layers[1] is None else int(layers[1]))
+        commands = values.get("commands", values.get("command", ("G0", "G1")))
+        if isinstance(commands, str):
+            commands = commands.split()
+        return cls(
+            values.get("type", LITERAL),
+            values.get("find", ""),
+            values.get("replace", ""),
+            bool(values.get("ignore_case", False)),
+            commands,
+            values.get("parameter", "F"),
+            values.get("min"),
+            values.get("max"),
+            layers,
+            values.get("name", ""),
+        )
+
+    def toDict(self):
+        values = dict(type=self.kind, name=self.name)
+        if self.kind == CLAMP:
+            values.update(
+                commands=list(self.commands),
+                parameter=self.parameter,
+                min=self.minimum,
+                max=self.maximum,
+            )
+        else:
+            values.update(find=self.find, replace=self.replace)
+            if self.ignore_case:
+                values["ignore_case"] = True
+        if self.layers is not None:
+            values["layers"] = list(self.layers)
+        return values
+
+    def patternText(self):
+        text = re.escape(self.find) if self.kind == LITERAL else self.find
+        return "(?i:%s)" % text if self.ignore_case else text
+
+    def compiled(self):
+        return re.compile(self.patternText(), re.MULTILINE)
+
+    def clamp(self, value):
+        if self.maximum is not None and value > self.maximum:
+            return self.maximum
+        if self.minimum is not None and value < self.minimum:
+            return self.minimum
+        return None
+
+
+def _formatNumber(value):
+    return ("%.5f" % value).rstrip("0").rstrip(".")
+
+
+# -------------------------------------------------------------
+# Regexi skupine aktivnih pravil → en seznam zamenjav
+# -------------------------------------------------------------
+class _Dispatcher:
+    def __init__(self, rules, active):
+        self._scanners = []  # (regex, obravnava zadetka, preskok "\n")
+        clamp_groups = {}  # ukazi → [številke clamp pravil]
+        for number in active:
+            if rules[number].kind == CLAMP:
+                clamp_groups.setdefault(rules[number].commands, []).append(number)
+        for number in active:
+            rule = rules[number]
+            if rule.kind != CLAMP:
+                self._scanners.append(self._replacer(number, rule))
+            elif clamp_groups[rule.commands][0] == number:
+                group = clamp_groups[rule.commands]
+                self._scanners.append(self._clampScanner(rules, group))
+        # clamp ne prečka vrstic; ostala pravila po svojem izvirnem regexu
+        self.line_local = all(
+            isLineLocal(rules[number].compiled())
+            for number in active
+            if rules[number].kind != CLAMP
+        )
+
+    def _replacer(self, number, rule):
+        text = rule.patternText()
+        skip = 0
+        if rule.kind == REGEX and rule.find.startswith("^") and "|" not in rule.find:
+            # "\n" namesto "^" je za sre kar nekajkrat hitrejši
+            rest = rule.find[1:]
+            text = "\\n" + ("(?i:%s)" % rest if rule.ignore_case else rest)
+            skip = 1
+        pattern = re.compile(text, re.MULTILINE)
+        replacement = rule.replace
+        if rule.kind == LITERAL or "\\" not in replacement:
+
+            def literal(match, text):
+                return replacement, (number,)
+
+            return pattern, literal, skip
+
+        # \g<0> in skupine brez "\n": izvirni regex na istem mestu
+        own = rule.compiled()
+
+        def expand(match, text):
+            own_match = own.match(text, match.start() + skip)
+            return own_match.expand(replacement), (number,)
+
+        return pattern, expand, skip
+
+    def _clampScanner(self, rules, group):
+        clamps = {}  # parameter → pravila v vrstnem redu
+        for number in group:
+            clamps.setdefault(rules[number].parameter, []).append(number)
+        parameters = re.compile(r"(?<![A-Za-z])([A-Z])(%s)" % _NUMBER)
+
+        def clamp(match, text):
+            line = match.group()
+            hit = []
+            pieces = []
+            position = 0
+            for parameter in parameters.finditer(line, match.end(1) - match.start()):
+                numbers = clamps.get(parameter.group(1))
+                if not numbers:
+                    continue
+                value = float(parameter.group(2))
+                limited = value
+                for number in numbers:
+                    clamped = rules[number].clamp(limited)
+                    if clamped is not None:
+                        hit.append(number)
+                        limited = clamped
+                if limited == value:
+                    continue  # nespremenjena vrednost ostane zapisana kot je
+                pieces.append(line[position : parameter.start(2)])
+                pieces.append(_formatNumber(limited))
+                position = parameter.end(2)
+            if not pieces:
+                return None
+            pieces.append(line[position:])
+            return "".join(pieces)[1:], hit
+
+        # samo vrstice ukaza z vsaj enim omejenim parametrom (pred komentarjem)
+        commands = "|".join(rules[group[0]].commands)
+        letters = "".join(sorted(clamps))
+        pattern = re.compile(
+            r"(\n(?:%s)(?![\d.]))[^;\n%s]*[%s][^;\n]*" % (commands, letters, letters)
+        )
+        return pattern, clamp, 1
+
+    def edits(self, base, text, hits):
+        """Zamenjave v odseku text (odmik base) kot (začetek, konec, besedilo)."""
+        if not self.line_local:
+            # regex čez vrstice: pravila po vrsti na celem območju
+            rewritten = text
+            for scanner in self._scanners:
+                rewritten = _rewritten(scanner, rewritten, hits) or rewritten
+            return [] if rewritten is text else [(base, base + len(text), rewritten)]
+
+        scan = "\n" + text  # "\n" pred prvo vrstico namesto "^"
+        changed = {}  # začetek vrstice → (konec vrstice, novo besedilo)
+        for scanner in self._scanners:
+            pattern, handler, skip = scanner
+            earlier = dict(changed)
+            pieces = []
+            line_start = line_end = position = -1
+            for match in pattern.finditer(scan):
+                start = match.start() + skip - 1
+                if start < 0:
+                    continue  # zadetek z dodanim "\n", ki ga v dokumentu ni
+                # regex s "\n" spredaj se vedno začne na začetku vrstice
+                begin = start if skip else text.rfind("\n", 0, start) + 1
+                if begin in earlier:
+                    continue  # spodaj, na besedilu prejšnjih pravil
+                result = handler(match, scan)
+                if result is None:
+                    continue
+                if begin != line_start:  # nova vrstica
+                    if pieces:
+                        pieces.append(text[position:line_end])
+                        changed[line_start] = (line_end, "".join(pieces))
+                        pieces = []
+                    line_start = position = begin
+                    line_end = text.find("\n", start)
+                    line_end = len(text) if line_end == -1 else line_end
+                new_text, numbers = result
+                for number in numbers:
+                    hits[number] += 1
+                pieces.append(text[position:start])
+                pieces.append(new_text)
+                position = match.end() - 1
+            if pieces:
+                pieces.append(text[position:line_end])
+                changed[line_start] = (line_end, "".join(pieces))
+            for line_start, (line_end, line) in earlier.items():
+                rewritten = _rewritten(scanner, line, hits)
+                if rewritten is not None:
+                    changed[line_start] = (line_end, rewritten)
+
+        edits = [(start, end, line) for start, (end, line) in sorted(changed.items())]
+        if len(edits) > DENSE_MATCHES:
+            # veliko zamenjav: cel odsek kot en kos
+            pieces = []
+            position = 0
+            for start, end, new_text in edits:
+                pieces.append(text[position:start])
+                pieces.append(new_text)
+                position = end
+            pieces.append(text[position:])
+            return [(base, base + len(text), "".join(pieces))]
+        return [(base + start, base + end, new_text) for start, end, new_text in edits]
+
+
+def _rewritten(scanner, text, hits):
+    """Besedilo z vsemi zadetki enega pravila ali None."""
+    pattern, handler, skip = scanner
+    scan = "\n" + text
+    pieces = []
+    position = 0
+    for match in pattern.finditer(scan):
+        start = match.start() + skip - 1
+        if start < 0:
+            continue
+        result = handler(match, scan)
+        if result is None:
+            continue
+        new_text, numbers = result
+        for number in numbers:
+            hits[number] += 1
+        pieces.append(text[position:start])
+        pieces.append(new_text)
+        position = match.end() - 1
+    if not pieces:
+        return None
+    pieces.append(text[position:])
+    return "".join(pieces)
+
+
+# -------------------------------------------------------------
+# Niz pravil: en prehod čez dokument
+# -------------------------------------------------------------
+class RewriteRules:
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self.hits = [0] * len(self.rules)
+        self._dispatchers = {}  # aktivna pravila → _Dispatcher
+
+    @classmethod
+    def fromDicts(cls, values):
+        return cls(RewriteRule.fromDict(rule) for rule in values)
+
+    def toDicts(self):
+        return [rule.toDict() for rule in self.rules]
+
+    def apply(self, document, layer_index=None, segment_size=SEGMENT_SIZE):
+        """(nov dokument, zadetki po pravilih); brez zadetkov isti dokument."""
+        hits = [0] * len(self.rules)  # lokalno: več PlateWriter hkrati
+        self.hits = hits
+        if not self.rules:
+            return document, hits
+        edits = []
+        for begin, end, active in self._regions(document, layer_index):
+            dispatcher = self._dispatcher(active)
+            region = document.slice(begin, end)
+            if dispatcher.line_local:
+                segments = region.iterSegments(segment_size)
+            else:
+                segments = [(0, region.text())]
+            for base, text in segments:
+                edits.extend(dispatcher.edits(begin + base, text, hits))
+        if not edits:
+            return document, hits
+        return document.replaced(edits), hits
+
+    def _dispatcher(self, active):
+        dispatcher = self._dispatchers.get(active)
+        if dispatcher is None:
+            dispatcher = _Dispatcher(self.rules, active)
+            self._dispatchers[active] = dispatcher
+        return dispatcher
+
+    def _regions(self, document, layer_index):
+        """[(začetek, konec, aktivna pravila)] z enakimi pravili."""
+        size = document.size()
+        spans = [(0, size)] * len(self.rules)
+        if any(rule.layers is not None for rule in self.rules):
+            if layer_index is None or layer_index.document is not document:
+                layer_index = LayerIndex(document)
+            spans = [
+                (0, size)
+                if rule.layers is None
+                else _layerSpan(layer_index, *rule.layers)
+                for rule in self.rules
+            ]
+        boundaries = sorted({0, size}.union(*(span for span in spans if span)))
+        regions = []
+        for begin, end in zip(boundaries, boundaries[1:]):
+            active = tuple(
+                number
+                for number, span in enumerate(spans)
+                if span and span[0] <= begin < span[1]
+            )
+            if active:
+                regions.append((begin, end, active))
+        return regions
+
+    def summaryLines(self):
+        return [
+            "%8d  %s" % (hits, rule.name) for rule, hits in zip(self.rules, self.hits)
+        ]
+
+
+def _layerSpan(layer_index, first, last):
+    """(začetek, konec) layerjev first..last (last None = do konca) ali None."""
+    positions = [
+        index
+        for index, number in enumerate(layer_index.numbers)
+        if number >= first and (last is None or number <= last)
+    ]
+    if not positions:
+        return None
+    begin = layer_index.offsets[positions[0]]
+    if positions[-1] + 1 < len(layer_index.offsets):
+        end = layer_index.offsets[positions[-1] + 1]
+    else:
+        end = layer_index.document.size()
+    return begin, end
+
+
+# -------------------------------------------------------------
+# Shranjeni nizi pravil: {"ime": [pravila ...]}
+# -------------------------------------------------------------
+def loadRuleSets(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            values = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except ValueError as e:
+        raise RuleError("%s: %s" % (path, e)) from e
+    if not isinstance(values, dict):
+        raise RuleError("%s: expected an object of rule sets" % path)
+    return values
+
+
+def saveRuleSets(path, rule_sets):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = path + ".part"
+    with open(temporary, "w", encoding="utf-8") as f:
+        json.dump(rule_sets, f, indent=2)
+    os.replace(temporary, path)
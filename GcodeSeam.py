@@ -0,0 +1,239 @@
+# ===================================================================
+# Opis: Preverjanje stika slica #1 in #2 na ;LAYER:1.
+#  - Slice #2 od ;LAYER:1 dalje pričakuje stanje stroja, ki ga je imel
+#    ob koncu svojega layerja 0; stroj pa ima stanje slica #1
+#  - MachineState: en prehod čez vrstice (G90/G91, M82/M83, X/Y/Z,
+#    E in umik, F, ventilator, temperature šobe in mize)
+#  - checkSeam: stanje združenega G-code do ;LAYER:1 proti stanju
+#    slica #2 pred ;LAYER:1 → seznam razlik + popravek (G-code, ki
+#    se vstavi pred ;LAYER:1)
+#  - E: G92 na vrednost slica #2, razlika umika se izravna z E premikom
+#  - XY se samo javi (prvi premik layerja 1 je običajno G0)
+#  - Brez Qt in Cure
+# ===================================================================
+
+import re
+
+try:
+    from .GcodeEngine import iterJoined, layerMarker
+except ImportError:  # samostojna uporaba brez paketa
+    from GcodeEngine import iterJoined, layerMarker
+
+SEAM_LAYER = 1
+SEGMENT_SIZE = 1 << 20
+TOLERANCE = 1e-4  # mm, °C, %
+DEFAULT_RETRACT_FEEDRATE = 2700.0
+
+_COMMAND = re.compile(
+    r"^(G[0-3]|G9[0-2]|M8[23]|M10[4679]|M1[49]0)(?![\d.])([^;\n]*)", re.MULTILINE
+)
+_PARAMETER = re.compile(r"([XYZEFS])\s*([-+]?(?:\d+\.?\d*|\.\d+))")
+
+
+# -------------------------------------------------------------
+# Stanje stroja po zaporedju vrstic
+# -------------------------------------------------------------
+class MachineState:
+    def __init__(self):
+        self.absolute = True  # G90 / G91
+        self.absolute_e = True  # M82 / M83
+        self.position = {"X": None, "Y": None, "Z": None}
+        self.e = 0.0  # logična E (po G92)
+        self.filament = 0.0  # dejansko potisnjen filament
+        self.filament_peak = 0.0
+        self.feedrate = None
+        self.retract_feedrate = None  # F zadnjega premika samo z E
+        self.fan = 0.0  # M106 S (0..255)
+        self.hotend = None
+        self.bed = None
+
+    def retracted(self):
+        return self.filament_peak - self.filament
+
+    def feed(self, pieces):
+        """Obdela besedilo po kosih (vrstica lahko prečka mejo kosov)."""
+        carry = ""
+        for piece in pieces:
+            text = carry + piece
+            end = text.rfind("\n") + 1
+            self._feedText(text[:end])
+            carry = text[end:]
+        self._feedText(carry)
+        return self
+
+    def _feedText(self, text):
+        for command, arguments in _COMMAND.findall(text):
+            values = {key: float(v) for key, v in _PARAMETER.findall(arguments)}
+            if command[0] == "G":
+                self._motion(command, values)
+            elif command == "M82":
+                self.absolute_e = True
+            elif command == "M83":
+                self.absolute_e = False
+            elif command in ("M104", "M109"):
+                self.hotend = values.get("S", self.hotend)
+            elif command in ("M140", "M190"):
+                self.bed = values.get("S", self.bed)
+            elif command == "M106":
+                self.fan = values.get("S", 255.0)
+            elif command == "M107":
+                self.fan = 0.0
+
+    def _motion(self, command, values):
+        if command == "G90":
+            self.absolute = self.absolute_e = True
+            return
+        if command == "G91":
+            self.absolute = self.absolute_e = False
+            return
+        if command == "G92":
+            for axis in "XYZ":
+                if axis in values:
+                    self.position[axis] = values[axis]
+            if "E" in values:
+                self.e = values["E"]
+            return
+
+        # G0 / G1 / G2 / G3
+        for axis in "XYZ":
+            if axis in values:
+                base = self.position[axis]
+                if self.absolute or base is None:
+                    self.position[axis] = values[axis]
+                else:
+                    self.position[axis] = base + values[axis]
+        if "F" in values:
+            self.feedrate = values["F"]
+        if "E" in values:
+            delta = values["E"] - self.e if self.absolute_e else values["E"]
+            self.e += delta
+            self.filament += delta
+            self.filament_peak = max(self.filament_peak, self.filament)
+            if not any(axis in values for axis in "XY"):
+                self.retract_feedrate = self.feedrate
+
+
+# -------------------------------------------------------------
+# Primerjava stanj na stiku → (razlike, popravek)
+# -------------------------------------------------------------
+class SeamIssue:
+    def __init__(self, kind, actual, expected, fixed):
+        self.kind = kind
+        self.actual = actual
+        self.expected = expected
+        self.fixed = fixed
+
+    def __str__(self):
+        state = "fixed" if self.fixed else "check"
+        return "%s: %s → %s (%s)" % (self.kind, self.actual, self.expected, state)
+
+
+def _differs(actual, expected):
+    return (
+        actual is not None
+        and expected is not None
+        and abs(actual - expected) > TOLERANCE
+    )
+
+
+def _number(value):
+    return ("%.5f" % value).rstrip("0").rstrip(".")
+
+
+def compareStates(actual, expected):
+    """actual = stroj na stiku, expected = slice #2 pred ;LAYER:1."""
+    issues = []
+    lines = []
+
+    def add(kind, actual_value, expected_value, *commands):
+        issues.append(SeamIssue(kind, actual_value, expected_value, bool(commands)))
+        lines.extend(commands)
+
+    if _differs(actual.hotend, expected.hotend):
+        command = "M104 S" + _number(expected.hotend)
+        add("hotend", actual.hotend, expected.hotend, command)
+    if _differs(actual.bed, expected.bed):
+        add("bed", actual.bed, expected.bed, "M140 S" + _number(expected.bed))
+    if _differs(actual.fan, expected.fan):
+        command = "M106 S" + _number(expected.fan) if expected.fan else "M107"
+        add("fan", actual.fan, expected.fan, command)
+
+    z, expected_z = actual.position["Z"], expected.position["Z"]
+    if _differs(z, expected_z):
+        target = expected_z if actual.absolute else expected_z - z
+        add("Z", z, expected_z, "G0 Z" + _number(target))
+    for axis in "XY":
+        if _differs(actual.position[axis], expected.position[axis]):
+            add(axis, actual.position[axis], expected.position[axis])
+
+    if actual.absolute != expected.absolute:
+        add("positioning", _mode(actual.absolute), _mode(expected.absolute))
+        lines.append("G90" if expected.absolute else "G91")
+    # G90 / G91 nastavita tudi E – M82 / M83 šele za njima
+    absolute_e = actual.absolute_e
+    if actual.absolute != expected.absolute:
+        absolute_e = expected.absolute
+    if absolute_e != expected.absolute_e:
+        add("extrusion", _mode(actual.absolute_e), _mode(expected.absolute_e))
+        lines.append("M82" if expected.absolute_e else "M83")
+
+    # umik: stroj ima actual.retracted(), slice #2 pričakuje svojega
+    correction = actual.retracted() - expected.retracted()
+    feedrate = expected.retract_feedrate or DEFAULT_RETRACT_FEEDRATE
+    if expected.absolute_e:
+        start_e = expected.e - correction
+        if _differs(actual.e, start_e) or abs(correction) > TOLERANCE:
+            command = "G92 E" + _number(start_e)
+            add("E", round(actual.e, 5), round(expected.e, 5), command)
+    current_feedrate = actual.feedrate
+    if abs(correction) > TOLERANCE:
+        move = expected.e if expected.absolute_e else correction
+        command = "G1 F%s E%s" % (_number(feedrate), _number(move))
+        retracted = round(actual.retracted(), 5), round(expected.retracted(), 5)
+        add("retraction", *retracted, command)
+        current_feedrate = feedrate
+
+    if _differs(current_feedrate, expected.feedrate):
+        command = "G1 F" + _number(expected.feedrate)
+        add("F", current_feedrate, expected.feedrate, command)
+    return issues, lines
+
+
+def _mode(absolute):
+    return "absolute" if absolute else "relative"
+
+
+# -------------------------------------------------------------
+# Združen dokument + kosi slica #2 pred ;LAYER:1
+# -------------------------------------------------------------
+def seamOffset(document, layer=SEAM_LAYER):
+    """Odmik vrstice ;LAYER:n v dokumentu (ali -1)."""
+    marker = layerMarker(layer)
+    for base, text in document.iterSegments(SEGMENT_SIZE):
+        match = marker.search(text)
+        if match:
+            return base + match.start()
+    return -1
+
+
+def checkSeam(document, expected_chunks, layer=SEAM_LAYER):
+    """(razlike, edits za replaced); expected_chunks = iterBeforeLayer slica #2."""
+    offset = seamOffset(document, layer)
+    if offset == -1:
+        return [], []
+    actual = MachineState().feed(
+        text for base, text in _segmentsBefore(document, offset)
+    )
+    expected = MachineState().feed(iterJoined(expected_chunks))
+    issues, lines = compareStates(actual, expected)
+    if not lines:
+        return issues, []
+    patch = ";SEAM_FIX: slice #1 -> slice #2\n" + "\n".join(lines) + "\n"
+    return issues, [(offset, offset, patch)]
+
+
+def _segmentsBefore(document, offset):
+    for base, text in document.iterSegments(SEGMENT_SIZE):
+        if base >= offset:
+            return
+        yield base, text[: offset - base]
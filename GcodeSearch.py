@@ -0,0 +1,193 @@
+# ===================================================================
+# Opis: Iskanje po GcodeDocument z indeksom vseh zadetkov.
+#  - Zadetki so urejeni odmiki (array), skok na n-ti ali najbližji
+#    zadetek je O(log N) z bisect
+#  - Iskanje teče po odsekih (~1 MB, poravnanih na vrstice), zato ga
+#    lahko nit sproti javlja in prekine
+#  - Vzorec čez več vrstic (ali s praznim zadetkom) se išče v oknu
+#    zaporednih odsekov, ki drsi po dokumentu – tudi razlit dokument
+#    ostane na disku; paket ima največ BATCH_MATCHES zadetkov
+#  - replaceAll: zadetki postanejo zamenjave v novem GcodeDocument;
+#    enako kot re.sub tudi prazni zadetki
+#  - Brez Qt in Cure
+# ===================================================================
+
+import bisect
+import itertools
+import re
+from array import array
+
+try:
+    from .GcodeEngine import isLineLocal
+except ImportError:  # samostojna uporaba brez paketa
+    from GcodeEngine import isLineLocal
+
+SEGMENT_SIZE = 1 << 20
+BATCH_MATCHES = 4096  # zadetkov v paketu (preklic, sprotno javljanje)
+WINDOW_LIMIT = 1 << 22  # okno vzorca čez vrstice ne raste čez to
+DENSE_MATCHES = 256  # nad tem se odsek zamenja v celoti
+
+
+def compilePattern(text, regex=False, allow_empty=False):
+    """Case-insensitive vzorec; brez regex se išče dobesedno."""
+    pattern = re.compile(text if regex else re.escape(text), re.IGNORECASE)
+    # prazen zadetek (^, x*) ima smisel samo v Replace (kot re.sub)
+    if not allow_empty and pattern.search(""):
+        raise re.error("pattern matches empty text (allowed only in Replace)")
+    return pattern
+
+
+# -------------------------------------------------------------
+# Paketi (odmik, zadetki, preiskano do odmika); zadetek je re.Match
+# v besedilu, ki se začne pri odmiku
+# -------------------------------------------------------------
+def _iterMatchBatches(document, pattern, segment_size):
+    if not isLineLocal(pattern):
+        yield from _iterWindowBatches(document, pattern, segment_size)
+        return
+    for base, text in document.iterSegments(segment_size):
+        matches = pattern.finditer(text)
+        while True:
+            batch = list(itertools.islice(matches, BATCH_MATCHES))
+            if len(batch) < BATCH_MATCHES:
+                yield base, batch, base + len(text)
+                break
+            yield base, batch, base + batch[-1].end()
+
+
+def _iterWindowBatches(document, pattern, segment_size):
+    """Vzorec čez vrstice: okno iz zaporednih odsekov.
+
+    Zadetek velja, ko se konča pred zadnjim odsekom okna – regex
+    (požrešno ponavljanje, $, (?=...)) vidi še vsaj odsek naprej;
+    sicer okno zraste za odsek. Okno obdrži vrstico pred mestom
+    nadaljevanja (^ in (?<=...)), starejše besedilo zavrže. Zadetek,
+    daljši od WINDOW_LIMIT, se odreže ali izpusti.
+    """
+    segments = document.iterSegments(segment_size)
+    base, text = 0, ""
+    limit = 0  # začetek zadnjega odseka v oknu
+    position = 0  # iskanje se nadaljuje tu
+    last_empty = -1  # prazen zadetek na tem odmiku je že sprejet
+    grow = True
+    while True:
+        if grow:
+            limit = base + len(text)
+            segment = next(segments, None)
+            if segment is not None:
+                text += segment[1]
+        end = base + len(text)
+        complete = end >= document.size()
+        bound = limit
+        if complete or len(text) - (position - base) >= WINDOW_LIMIT:
+            bound = None  # veljajo vsi zadetki
+        grow = False
+        batch = []
+        scanned = position
+        for match in pattern.finditer(text, position - base):
+            match_start, match_end = match.span()
+            if bound is not None and base + match_end > bound:
+                grow = True
+                scanned = base + match_start
+                break
+            if match_start == match_end:
+                if base + match_start == last_empty:
+                    continue
+                last_empty = base + match_start
+            batch.append(match)
+            position = scanned = base + match_end
+            if len(batch) == BATCH_MATCHES:
+                break
+        else:
+            if complete:
+                yield base, batch, end
+                return
+            grow = True
+            if bound is None:
+                position = scanned = end  # zadetek bi bil daljši od okna
+        yield base, batch, scanned
+        keep = text.rfind("\n", 0, max(position - base - 1, 0)) + 1
+        base += keep
+        text = text[keep:]
+
+
+# -------------------------------------------------------------
+# Zaporedje (začetki, konci, preiskano do odmika)
+# -------------------------------------------------------------
+def iterSearchBatches(document, pattern, cancelled=None, segment_size=SEGMENT_SIZE):
+    for base, matches, scanned in _iterMatchBatches(document, pattern, segment_size):
+        if cancelled is not None and cancelled():
+            return
+        starts = array("q", [base + match.start() for match in matches])
+        ends = array("q", [base + match.end() for match in matches])
+        yield starts, ends, scanned
+
+
+# -------------------------------------------------------------
+# Zamenjaj vse zadetke – vrne (nov dokument, število zamenjav) ali
+# None ob preklicu
+# -------------------------------------------------------------
+def _matchEdits(base, matches, replacement, literal):
+    edits = []
+    for match in matches:
+        match_start, match_end = match.span()
+        new_text = replacement if literal else match.expand(replacement)
+        edits.append((base + match_start, base + match_end, new_text))
+    return edits
+
+
+def replaceAll(
+    document, pattern, replacement, cancelled=None, segment_size=SEGMENT_SIZE
+):
+    # enako kot re.sub: brez "\\" je zamenjava dobesedna
+    literal = "\\" not in replacement
+    edits = []
+    count = 0
+    if not isLineLocal(pattern):
+        for base, matches, _ in _iterWindowBatches(document, pattern, segment_size):
+            if cancelled is not None and cancelled():
+                return None
+            edits += _matchEdits(base, matches, replacement, literal)
+            count += len(matches)
+    else:
+        for base, text in document.iterSegments(segment_size):
+            if cancelled is not None and cancelled():
+                return None
+            matches = list(itertools.islice(pattern.finditer(text), DENSE_MATCHES + 1))
+            if len(matches) > DENSE_MATCHES:
+                # veliko zadetkov: cel odsek kot en kos (re.sub v C)
+                new_text, segment_count = pattern.subn(replacement, text)
+                edits.append((base, base + len(text), new_text))
+                count += segment_count
+                continue
+            edits += _matchEdits(base, matches, replacement, literal)
+            count += len(matches)
+    if not edits:
+        return document, 0
+    return document.replaced(edits), count
+
+
+# -------------------------------------------------------------
+# Urejen indeks zadetkov
+# -------------------------------------------------------------
+class SearchIndex:
+    def __init__(self):
+        self.starts = array("q")
+        self.ends = array("q")
+        self.scanned = 0  # preiskano do odmika
+        self.complete = False
+
+    def count(self):
+        return len(self.starts)
+
+    def extend(self, starts, ends, scanned):
+        self.starts.extend(starts)
+        self.ends.extend(ends)
+        self.scanned = scanned
+
+    def match(self, number):
+        return self.starts[number], self.ends[number]
+
+    def firstAtOrAfter(self, offset):
+        """Številka prvega zadetka z začetkom >= offset (lahko == count)."""
+        return bisect.bisect_left(self.starts, offset)
@@ -0,0 +1,427 @@
+# ===================================================================
+# Opis: Statistika združenega G-code (NumPy) in nova glava.
+#  - Premiki G0/G1/G92 in vrednosti X/Y/Z/E/F se preberejo vektorsko
+#    nad bajti odsekov (numpy, brez zanke po vrsticah ali številih);
+#    en prehod na odsek, števila brez pretvorbe v nize (števke po 8
+#    v uint64), vrstice ;TIME_ELAPSED se zapomnijo za headerEdits
+#  - Na layer: ekstrudirano, dolžina tiska / premikov, čas
+#  - Čas: trapez (pospešek a) s hitrostjo na stiku premikov glede na
+#    kot med njimi – ocena, ne simulacija firmware
+#  - headerEdits: zamenjave za ;TIME, ;Filament used, ;MINX..;MAXZ
+#    in ;TIME_ELAPSED (urejene, za GcodeDocument.replaced)
+#  - Brez Qt in Cure (numpy se uvozi šele ob uporabi)
+# ===================================================================
+
+import re
+
+SEGMENT_SIZE = 1 << 20
+DEFAULT_ACCELERATION = 1000.0  # mm/s²
+DEFAULT_FEEDRATE = 3000.0  # mm/min, dokler G-code ne nastavi F
+
+_AXES = "XYZEF"
+NUMBER_WIDTH = 16  # najdaljše število (znaki) za X/Y/Z/E/F
+NUMBER_BLOCK = 1 << 14  # števil naenkrat (vmesni arrayi ostanejo v predpomnilniku)
+_PADDING = NUMBER_WIDTH + 16  # ničle za okna števk za piko
+_TIME_ELAPSED = b";TIME_ELAPSED:"
+_ELAPSED_VALUE = re.compile(r"[-+.\deE]+")
+
+
+# -------------------------------------------------------------
+# Rezultat: skupne vrednosti in numpy arrayi po layerjih
+# (prefix = start G-code pred prvim layerjem)
+# -------------------------------------------------------------
+class GcodeStats:
+    def __init__(self):
+        self.moves = 0
+        self.filament_mm = 0.0
+        self.print_mm = 0.0
+        self.travel_mm = 0.0
+        self.time_s = 0.0
+        self.prefix_time_s = 0.0
+        self.bounds = None  # (min_x, min_y, min_z, max_x, max_y, max_z)
+        self.time_elapsed = None  # odmiki vrstic ;TIME_ELAPSED (numpy)
+
+        self.layer_time_s = None
+        self.layer_filament_mm = None
+        self.layer_print_mm = None
+        self.layer_travel_mm = None
+
+
+# -------------------------------------------------------------
+# Premiki po regijah (prefix + layerji) → vektorska analiza
+# -------------------------------------------------------------
+def analyzeDocument(document, layer_index, acceleration=DEFAULT_ACCELERATION):
+    import numpy
+
+    layer_offsets = numpy.frombuffer(layer_index.offsets, dtype=numpy.int64)
+    parts = [
+        _parseSegment(base, text, layer_offsets)
+        for base, text in document.iterSegments(SEGMENT_SIZE)
+    ]
+    stats = GcodeStats()
+    stats.time_elapsed = numpy.concatenate(
+        [numpy.zeros(0, dtype=numpy.int64)] + [part[3] for part in parts]
+    )
+    parts = [part for part in parts if len(part[0])]
+    regions = layer_index.count() + 1
+    if not parts:
+        stats.layer_time_s = numpy.zeros(regions - 1)
+        stats.layer_filament_mm = numpy.zeros(regions - 1)
+        stats.layer_print_mm = numpy.zeros(regions - 1)
+        stats.layer_travel_mm = numpy.zeros(regions - 1)
+        return stats
+
+    kind = numpy.concatenate([part[0] for part in parts])
+    region = numpy.concatenate([part[1] for part in parts])
+    columns = {
+        axis: numpy.concatenate([part[2][axis] for part in parts]) for axis in _AXES
+    }
+    stats.moves = len(kind)
+    relative_e = _isRelativeExtrusion(document, layer_index)
+
+    x, y, z = (_fill(columns[axis], 0.0) for axis in "XYZ")
+    feedrate = _fill(columns["F"], DEFAULT_FEEDRATE)
+    moving = kind != 92  # G92 samo nastavi položaj
+
+    # ---- razdalje ----
+    dx = numpy.diff(x, prepend=x[0])
+    dy = numpy.diff(y, prepend=y[0])
+    dz = numpy.diff(z, prepend=z[0])
+    length = numpy.sqrt(dx * dx + dy * dy + dz * dz) * moving
+    planar = numpy.hypot(dx, dy) * moving
+
+    # ---- ekstruzija ----
+    e = columns["E"]
+    if relative_e:
+        de = numpy.nan_to_num(e) * moving
+    else:
+        e_abs = _fill(e, 0.0)
+        de = numpy.diff(e_abs, prepend=0.0) * moving
+
+    printing = (de > 0) & (planar > 0)
+    travel = ~printing & (length > 0)
+
+    # ---- čas ----
+    distance = numpy.where(length > 0, length, numpy.abs(de))
+    time = _moveTimes(dx, dy, dz, distance, feedrate / 60.0, acceleration)
+
+    # ---- po regijah ----
+    def perRegion(values):
+        return numpy.bincount(region, weights=values, minlength=regions)
+
+    region_time = perRegion(time)
+    region_filament = perRegion(de)
+    region_print = perRegion(length * printing)
+    region_travel = perRegion(length * travel)
+
+    stats.prefix_time_s = float(region_time[0])
+    stats.layer_time_s = region_time[1:]
+    stats.layer_filament_mm = region_filament[1:]
+    stats.layer_print_mm = region_print[1:]
+    stats.layer_travel_mm = region_travel[1:]
+
+    stats.time_s = float(region_time.sum())
+    stats.filament_mm = float(de.sum())
+    stats.print_mm = float(region_print.sum())
+    stats.travel_mm = float(region_travel.sum())
+
+    # ---- obseg tiska (obe krajišči ekstruzijskih premikov) ----
+    if printing.any():
+        ends = numpy.flatnonzero(printing)
+        points = numpy.concatenate([ends, ends - 1])
+        points = points[points >= 0]
+        stats.bounds = tuple(
+            float(function(axis[points]))
+            for function in (numpy.min, numpy.max)
+            for axis in (x, y, z)
+        )
+    return stats
+
+
+def _isRelativeExtrusion(document, layer_index):
+    """M83 v start G-code (pred prvim layerjem)."""
+    end = layer_index.offsets[0] if layer_index.count() else document.size()
+    header = document.textRange(0, end)
+    relative = header.rfind("\nM83")
+    absolute = header.rfind("\nM82")
+    return relative > absolute
+
+
+# -------------------------------------------------------------
+# Premiki enega odseka: ukaz (0/1/92), regija in vrednosti osi
+# (numpy nad bajti, ena vrstica = en premik; isti prehod najde še
+# vrstice ;TIME_ELAPSED za headerEdits)
+# -------------------------------------------------------------
+def _parseSegment(base, text, layer_offsets):
+    import numpy
+
+    blank = _byteTable(numpy, b" \t")
+    number_start = _byteTable(numpy, b"0123456789+-.")
+
+    # "\n" spredaj: vsaka vrstica se začne za "\n", odmiki so zato -1;
+    # "replace" ohrani en bajt na znak, ničle na koncu so za okna števil
+    raw = ("\n" + text).encode("ascii", "replace") + bytes(_PADDING)
+    data = numpy.frombuffer(raw, dtype=numpy.uint8)
+    size = len(text) + 1
+    body = data[:size]
+
+    newlines = numpy.flatnonzero(body == ord("\n"))
+    starts = newlines + 1
+    ends = numpy.append(newlines[1:], size)
+
+    # ;TIME_ELAPSED: na začetku vrstice (odmik vrstice v dokumentu)
+    comments = starts[data[starts] == ord(";")]
+    prefix = numpy.frombuffer(_TIME_ELAPSED, dtype=numpy.uint8)
+    found = (_windows(numpy, data, len(prefix))[comments] == prefix).all(axis=1)
+    elapsed = base - 1 + comments[found]
+
+    # "G0 ", "G1 " ali "G92 " (tudi tabulator)
+    second = data[starts + 1]
+    third = data[starts + 2]
+    g01 = ((second == ord("0")) | (second == ord("1"))) & blank[third]
+    g92 = (second == ord("9")) & (third == ord("2")) & blank[data[starts + 3]]
+    move = (data[starts] == ord("G")) & (g01 | g92)
+    starts = starts[move]
+    ends = ends[move]
+
+    # parametri le do komentarja
+    semicolons = numpy.flatnonzero(body == ord(";"))
+    if len(semicolons):
+        first = numpy.searchsorted(semicolons, starts)
+        comment = numpy.append(semicolons, size)[first]
+        ends = numpy.minimum(ends, comment)
+
+    kind = data[starts + 1].astype(numpy.int16) - ord("0")
+    kind[kind == 9] = 92
+    region = numpy.searchsorted(layer_offsets, base - 1 + starts, side="right")
+
+    # črke osi, ki jim sledi število, v parametrih premika; E F (69, 70)
+    # in X Y Z (88..90) s primerjavo bajtov – tabela nad celim odsekom
+    # je nekajkrat počasnejša
+    letters = numpy.flatnonzero(
+        ((body - numpy.uint8(ord("E"))) < 2) | ((body - numpy.uint8(ord("X"))) < 3)
+    )
+    rows = numpy.searchsorted(starts, letters, side="right") - 1
+    valid = (rows >= 0) & number_start[data[letters + 1]]
+    valid[valid] &= letters[valid] < ends[rows[valid]]
+    letters = letters[valid]
+    rows = rows[valid]
+
+    axis_of = numpy.full(256, -1, dtype=numpy.int8)
+    axis_of[list(_AXES.encode())] = numpy.arange(len(_AXES))
+    values = _parseNumbers(data, letters + 1)
+    axes = axis_of[data[letters]]
+    columns = {}
+    for number, axis in enumerate(_AXES):
+        column = numpy.full(len(starts), numpy.nan)
+        selected = axes == number
+        column[rows[selected]] = values[selected]
+        columns[axis] = column
+    return kind, region, columns, elapsed
+
+
+def _parseNumbers(data, positions):
+    """Števila na položajih: okno bajtov → števke v uint64 (SWAR) → float."""
+    import numpy
+
+    # k števk (k <= 8) poravnanih desno v uint64, spredaj "0"
+    shift = numpy.array([1 << 8 * (8 - k) if k else 0 for k in range(9)], numpy.uint64)
+    fill = numpy.array(
+        [int.from_bytes(b"0" * (8 - k) + bytes(k), "little") for k in range(9)],
+        numpy.uint64,
+    )
+    values = numpy.empty(len(positions))
+    for begin in range(0, len(positions), NUMBER_BLOCK):
+        block = slice(begin, begin + NUMBER_BLOCK)
+        values[block] = _parseBlock(numpy, data, positions[block], shift, fill)
+    return values
+
+
+def _parseBlock(numpy, data, positions, shift, fill):
+    window = _windows(numpy, data, NUMBER_WIDTH)[positions]
+    sign = window[:, 0]
+    signed = (sign == ord("-")) | (sign == ord("+"))
+    digit = (window - numpy.uint8(ord("0"))) < 10
+    dot = window == ord(".")
+
+    # število se konča pri prvem znaku, ki ni števka ali pika
+    # (predznak velja le na prvem mestu)
+    stop = ~(digit | dot)
+    stop[:, 0] &= ~signed
+    rows = numpy.arange(len(positions))
+    length = stop.argmax(axis=1)
+    length[~stop[rows, length]] = NUMBER_WIDTH
+    point = dot.argmax(axis=1)
+    fraction = dot[rows, point] & (point < length)
+    point = numpy.where(fraction, point, length)
+    int_digits = point - signed
+    frac_digits = numpy.where(fraction, length - point - 1, 0)
+
+    # počasnejša pot (redko): več kot 8 števk pred ali za piko ali
+    # več kot 15 števk skupaj (float64 ni več točen)
+    slow = (int_digits > 8) | (frac_digits > 8) | (int_digits + frac_digits > 15)
+
+    # do 8 števk celega dela in 8 decimalk; druga pika → nan
+    whole, _ = _digits(numpy, data, positions + signed, int_digits, shift, fill)
+    part, dots = _digits(numpy, data, positions + point + 1, frac_digits, shift, fill)
+    frac_digits = numpy.minimum(frac_digits, 8)
+    scale = 10 ** numpy.arange(9, dtype=numpy.uint64)
+    # točna mantisa in 10^n, eno deljenje zaokroži enako kot float()
+    values = (whole * scale[frac_digits] + part) / scale[frac_digits]
+    numpy.negative(values, out=values, where=sign == ord("-"))
+    values[(int_digits + frac_digits == 0) | dots] = numpy.nan
+    for row in numpy.flatnonzero(slow):
+        values[row] = _toFloat(bytes(window[row, : length[row]]))
+    return values
+
+
+def _digits(numpy, data, starts, counts, shift, fill):
+    """(vrednost, pika vmes) za do 8 števk od starts – 8 bajtov kot uint64."""
+    counts = numpy.minimum(counts, 8)
+    chunk = _windows(numpy, data, 8)[starts].view("<u8").ravel()
+    chunk = chunk * shift[counts] + fill[counts]
+    dots = _hasZeroByte(numpy, chunk ^ numpy.uint64(0x2E2E2E2E2E2E2E2E))
+
+    # prva števka je v spodnjem bajtu: pari → četverke → osmerke
+    u = numpy.uint64
+    chunk = chunk - u(0x3030303030303030)
+    chunk = (chunk * u(10) + (chunk >> u(8))) & u(0x00FF00FF00FF00FF)
+    chunk = (chunk * u(100) + (chunk >> u(16))) & u(0x0000FFFF0000FFFF)
+    chunk = (chunk * u(10000) + (chunk >> u(32))) & u(0xFFFFFFFF)
+    return chunk, dots
+
+
+def _hasZeroByte(numpy, words):
+    ones = numpy.uint64(0x0101010101010101)
+    return ((words - ones) & ~words & (ones << numpy.uint64(7))) != 0
+
+
+def _windows(numpy, data, width):
+    """Vrstica = width bajtov od odmika (pogled, brez kopije)."""
+    return numpy.lib.stride_tricks.sliding_window_view(data, width)
+
+
+def _toFloat(string):
+    try:
+        return float(string)
+    except ValueError:
+        return float("nan")
+
+
+def _byteTable(numpy, characters):
+    table = numpy.zeros(256, dtype=bool)
+    table[list(characters)] = True
+    return table
+
+
+def _fill(column, initial):
+    """Modalne vrednosti: manjkajoča = zadnja znana (na začetku initial)."""
+    import numpy
+
+    known = ~numpy.isnan(column)
+    index = numpy.where(known, numpy.arange(len(column)), 0)
+    numpy.maximum.accumulate(index, out=index)
+    filled = column[index]
+    filled[numpy.isnan(filled)] = initial
+    return filled
+
+
+# -------------------------------------------------------------
+# Čas premikov: pospešek / potovalna hitrost / pojemek
+# -------------------------------------------------------------
+def _moveTimes(dx, dy, dz, distance, speed, acceleration):
+    import numpy
+
+    speed = numpy.maximum(speed, 1e-3)
+    acceleration = max(float(acceleration), 1e-3)
+
+    # hitrost na stiku: polna pri ravni črti, 0 pri obratu (cos kota)
+    with numpy.errstate(invalid="ignore", divide="ignore"):
+        norm = numpy.sqrt(dx * dx + dy * dy + dz * dz)
+        ux, uy, uz = (numpy.nan_to_num(d / norm) for d in (dx, dy, dz))
+    cosine = ux[:-1] * ux[1:] + uy[:-1] * uy[1:] + uz[:-1] * uz[1:]
+    junction = numpy.minimum(speed[:-1], speed[1:]) * numpy.clip(cosine, 0.0, 1.0)
+    entry = numpy.concatenate([[0.0], junction])
+    exit = numpy.concatenate([junction, [0.0]])
+
+    accelerate = (speed * speed - entry * entry) / (2 * acceleration)
+    decelerate = (speed * speed - exit * exit) / (2 * acceleration)
+    cruise = distance - accelerate - decelerate
+
+    trapezoid = (
+        (speed - entry) / acceleration
+        + (speed - exit) / acceleration
+        + numpy.maximum(cruise, 0.0) / speed
+    )
+    # prekratek premik: vrh hitrosti ne doseže potovalne hitrosti
+    peak = numpy.sqrt(
+        numpy.maximum((2 * acceleration * distance + entry**2 + exit**2) / 2, 0.0)
+    )
+    peak = numpy.maximum(peak, numpy.maximum(entry, exit))
+    triangle = (2 * peak - entry - exit) / acceleration
+    time = numpy.where(cruise >= 0, trapezoid, triangle)
+    return numpy.where(distance > 0, time, 0.0)
+
+
+# -------------------------------------------------------------
+# Zamenjave glave in ;TIME_ELAPSED (za GcodeDocument.replaced)
+# -------------------------------------------------------------
+_HEADER_VALUES = {
+    ";TIME:": lambda stats: "%d" % round(stats.time_s),
+    ";PRINT.TIME:": lambda stats: "%d" % round(stats.time_s),
+    ";Filament used: ": lambda stats: "%gm" % (stats.filament_mm / 1000.0),
+}
+_BOUNDS_KEYS = (
+    (";MINX:", ";MINY:", ";MINZ:", ";MAXX:", ";MAXY:", ";MAXZ:"),
+    (
+        ";PRINT.SIZE.MIN.X:",
+        ";PRINT.SIZE.MIN.Y:",
+        ";PRINT.SIZE.MIN.Z:",
+        ";PRINT.SIZE.MAX.X:",
+        ";PRINT.SIZE.MAX.Y:",
+        ";PRINT.SIZE.MAX.Z:",
+    ),
+)
+
+
+def headerEdits(document, layer_index, stats):
+    values = dict((key, function(stats)) for key, function in _HEADER_VALUES.items())
+    if stats.bounds is not None:
+        for keys in _BOUNDS_KEYS:
+            for key, value in zip(keys, stats.bounds):
+                values[key] = "%g" % round(value, 3)
+
+    end = layer_index.offsets[0] if layer_index.count() else document.size()
+    header = document.textRange(0, end)
+    edits = []
+    position = 0
+    for line in header.split("\n"):
+        for key, value in values.items():
+            # več ekstruderjev (vejica) – vrednost ostane Curina
+            if line.startswith(key) and "," not in line:
+                start = position + len(key)
+                edits.append((start, position + len(line.rstrip("\r")), value))
+                break
+        position += len(line) + 1
+
+    edits += _timeElapsedEdits(document, layer_index, stats)
+    return edits
+
+
+def _timeElapsedEdits(document, layer_index, stats):
+    import numpy
+
+    if not layer_index.count():
+        return []
+    elapsed = stats.prefix_time_s + numpy.cumsum(stats.layer_time_s)
+    offsets = numpy.frombuffer(layer_index.offsets, dtype=numpy.int64)
+    # komentar je na koncu layerja, v katerem stoji ("\n" pred vrstico)
+    layers = numpy.searchsorted(offsets, stats.time_elapsed - 1, side="right") - 1
+
+    edits = []
+    for line, layer in zip(stats.time_elapsed.tolist(), layers.tolist()):
+        start = line + len(_TIME_ELAPSED)
+        match = _ELAPSED_VALUE.match(document.textRange(start, start + 64))
+        if layer >= 0 and match:
+            edits.append((start, start + match.end(), "%g" % float(elapsed[layer])))
+    return edits
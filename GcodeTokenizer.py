@@ -0,0 +1,51 @@
+# ===================================================================
+# Opis: Razčlenitev vrstice G-code na obarvane dele za highlighter.
+#  - Vsi regexi so prevedeni enkrat
+#  - Rezultat (start, dolžina, vrsta) se hrani po vsebini vrstice
+#    (LRU), ker se vrstice v G-code močno ponavljajo
+#  - Brez Qt in Cure
+# ===================================================================
+
+import functools
+import re
+
+COMMENT = "comment"
+LAYER = "layer"
+
+_TOKEN = re.compile(r"[GMXYZESF][-+]?(?:\d+\.?\d*|\.\d+)")
+_LAYER = re.compile(r";LAYER:\d+")
+
+
+class GcodeTokenizer:
+
+    CACHE_LINES = 1 << 16
+
+    def __init__(self, cache_lines=CACHE_LINES):
+        self.spans = functools.lru_cache(maxsize=cache_lines)(self._tokenize)
+
+    def cacheInfo(self):
+        return self.spans.cache_info()
+
+    def clear(self):
+        self.spans.cache_clear()
+
+    def _tokenize(self, text):
+        """Tuple (start, dolžina, vrsta); vrsta = črka, COMMENT ali LAYER."""
+        comment_start = text.find(";")
+        if comment_start == 0:
+            # cela vrstica je komentar (pogosto ;TYPE:, ;MESH: ...)
+            spans = [(0, len(text), COMMENT)]
+        else:
+            code_part = text if comment_start == -1 else text[:comment_start]
+            spans = []
+            for match in _TOKEN.finditer(code_part):
+                start, end = match.span()
+                spans.append((start, end - start, text[start]))
+            if comment_start == -1:
+                return tuple(spans)
+            spans.append((comment_start, len(text) - comment_start, COMMENT))
+
+        layer_match = _LAYER.search(text, comment_start)
+        if layer_match:
+            spans.append((layer_match.start(), len(layer_match.group()), LAYER))
+        return tuple(spans)
@@ -0,0 +1,478 @@
+# ===================================================================
+# Opis: Okenski prikazovalnik G-code za zelo velike datoteke.
+#  - QPlainTextEdit vsebuje samo vidne vrstice (okno), zato se
+#    dialog odpre takoj in barvanje teče samo za te vrstice
+#  - Lasten drsnik čez vse vrstice GcodeDocument
+#  - GcodeHighlighter: barvanje vidnih vrstic (GcodeTokenizer)
+#  - Kolesce, PageUp/PageDown, puščice in Ctrl+Home/End premikajo okno
+#  - LayerNavigator: seznam layerjev (LayerIndex) za skok na layer;
+#    LayerIndexThread gradi indeks v ozadju (odprte datoteke)
+#  - SearchThread: iskanje po dokumentu v ločeni niti
+#  - ReplaceThread: Replace v ločeni niti, nova verzija nad
+#    proračunom gre na disk (spilledOverBudget)
+#  - SaveThread: atomarni zapis dokumenta v ločeni niti (napredek,
+#    preklic)
+#  - UploadThread: pošiljanje na OctoPrint / Moonraker (PrintServerUpload)
+# ===================================================================
+
+import re
+import threading
+
+from PyQt6.QtCore import QEvent, QThread, Qt, pyqtSignal
+from PyQt6.QtGui import QColor, QSyntaxHighlighter, QTextCharFormat, QTextCursor
+from PyQt6.QtWidgets import (
+    QHBoxLayout,
+    QLineEdit,
+    QListWidget,
+    QPlainTextEdit,
+    QScrollBar,
+    QVBoxLayout,
+    QWidget,
+)
+
+from .GcodeLayers import LayerIndex
+from .GcodeSearch import iterSearchBatches, replaceAll
+from .GcodeTokenizer import COMMENT, LAYER, GcodeTokenizer
+from .GcodeWriters import SaveCancelled, saveAtomically
+from .PrintServerUpload import UploadCancelled
+
+
+# -------------------------------------------------------------
+# Napredni syntax highlighter za G-code (barve po vrstah)
+# -------------------------------------------------------------
+class GcodeHighlighter(QSyntaxHighlighter):
+    def __init__(self, parent):
+        super().__init__(parent)
+
+        # ====== BARVE PO TOKENIH ======
+        self.token_formats = {
+            "G": self._fmt("#F42828"),  # G ukazi
+            "M": self._fmt("#A62CF7"),  # M ukazi
+            "X": self._fmt("#00AB72"),  # koordinate
+            "Y": self._fmt("#E2D700"),
+            "Z": self._fmt("#08EFFF"),
+            "E": self._fmt("#FF00F2"),  # ekstruder
+            "F": self._fmt("#FFA303"),  # feedrate
+            "S": self._fmt("#FF830F"),  # temperature
+        }
+
+        self.token_formats[COMMENT] = self._fmt("#3F9CFF")
+        self.token_formats[LAYER] = self._fmt("#929292")
+
+        # ====== TOKENI PO VSEBINI VRSTICE (LRU) ======
+        # obdrži se med osvežitvami okna in po Replace
+        self.tokenizer = GcodeTokenizer()
+
+    def _fmt(self, color):
+        fmt = QTextCharFormat()
+        fmt.setForeground(QColor(color))
+        return fmt
+
+    def highlightBlock(self, text):
+        # tokeni, komentar in ;LAYER:x (v tem vrstnem redu)
+        formats = self.token_formats
+        for start, length, kind in self.tokenizer.spans(text):
+            self.setFormat(start, length, formats[kind])
+
+
+class GcodeView(QWidget):
+
+    WHEEL_LINES = 3
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        self._document = None
+        self._top = 0
+        self._rendered = None  # besedilo okna (za preskok enakega)
+
+        self.editor = QPlainTextEdit()
+        self.editor.setReadOnly(True)
+        self.editor.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
+        self.editor.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.editor.installEventFilter(self)
+        self.editor.viewport().installEventFilter(self)
+
+        self.scrollbar = QScrollBar(Qt.Orientation.Vertical)
+        self.scrollbar.setMinimum(0)
+        self.scrollbar.valueChanged.connect(self._render)
+
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(0)
+        layout.addWidget(self.editor)
+        layout.addWidget(self.scrollbar)
+
+    # ---------------------------------------------------------
+    # Javni vmesnik
+    # ---------------------------------------------------------
+    def setDocument(self, document):
+        self._document = document
+        self._updateRange()
+        self._render(self.scrollbar.value())
+
+    def document(self):
+        return self._document
+
+    def topLine(self):
+        return self._top
+
+    def visibleLineCount(self):
+        spacing = max(self.editor.fontMetrics().lineSpacing(), 1)
+        return max(self.editor.viewport().height() // spacing, 1)
+
+    def showRange(self, line, column, length):
+        """Pomakni okno do vrstice in označi [column, column + length)."""
+        if self._document is None:
+            return
+        visible = self.visibleLineCount()
+        if not self._top <= line < self._top + visible:
+            self.scrollbar.setValue(max(line - visible // 3, 0))
+
+        block = self.editor.document().findBlockByNumber(line - self._top)
+        if not block.isValid():
+            return
+        cursor = QTextCursor(block)
+        cursor.setPosition(block.position() + column)
+        cursor.setPosition(
+            block.position() + column + length, QTextCursor.MoveMode.KeepAnchor
+        )
+        self.editor.setTextCursor(cursor)
+        self.editor.setFocus()
+
+    def scrollToLine(self, line):
+        """Vrstica na vrh okna, kurzor na njen začetek."""
+        if self._document is None:
+            return
+        self.scrollbar.setValue(line)
+        block = self.editor.document().findBlockByNumber(line - self._top)
+        if block.isValid():
+            self.editor.setTextCursor(QTextCursor(block))
+        self.editor.setFocus()
+
+    def refresh(self):
+        self._updateRange()
+        self._render(self.scrollbar.value())
+
+    # ---------------------------------------------------------
+    # Okno vrstic
+    # ---------------------------------------------------------
+    def _updateRange(self):
+        if self._document is None:
+            return
+        visible = self.visibleLineCount()
+        self.scrollbar.setPageStep(visible)
+        self.scrollbar.setSingleStep(1)
+        self.scrollbar.setMaximum(max(self._document.lineCount() - visible, 0))
+
+    def _render(self, top):
+        if self._document is None:
+            return
+        previous_top, self._top = self._top, top
+        # ena vrstica več za delno vidno zadnjo vrstico
+        lines = self._document.getLines(top, top + self.visibleLineCount() + 1)
+        text = "\n".join(lines)
+        if top == previous_top and text == self._rendered:
+            return  # npr. Replace izven okna – brez ponovnega barvanja
+        self._rendered = text
+
+        # kurzor ostane na isti vrstici dokumenta, dokler je v oknu
+        cursor = self.editor.textCursor()
+        cursor_line = previous_top + cursor.blockNumber()
+        cursor_column = cursor.positionInBlock()
+        scroll_x = self.editor.horizontalScrollBar().value()
+
+        self.editor.setPlainText(text)
+
+        block_number = min(max(cursor_line - top, 0), len(lines) - 1)
+        block = self.editor.document().findBlockByNumber(block_number)
+        cursor = QTextCursor(block)
+        cursor.setPosition(block.position() + min(cursor_column, block.length() - 1))
+        self.editor.setTextCursor(cursor)
+        self.editor.horizontalScrollBar().setValue(scroll_x)
+
+    def _scrollBy(self, lines):
+        self.scrollbar.setValue(self.scrollbar.value() + lines)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.refresh()
+
+    # ---------------------------------------------------------
+    # Kolesce in tipke na urejevalniku
+    # ---------------------------------------------------------
+    def eventFilter(self, obj, event):
+        if self._document is None:
+            return False
+
+        if event.type() == QEvent.Type.Wheel and obj is self.editor.viewport():
+            if event.modifiers() & Qt.KeyboardModifier.ShiftModifier:
+                return False  # vodoravno drsenje
+            steps = event.angleDelta().y() / 120
+            lines = int(round(-steps * self.WHEEL_LINES))
+            if lines == 0 and steps:
+                lines = -1 if steps > 0 else 1
+            self._scrollBy(lines)
+            return True
+
+        if event.type() == QEvent.Type.KeyPress and obj is self.editor:
+            return self._handleKey(event)
+
+        return False
+
+    def _handleKey(self, event):
+        key = event.key()
+        ctrl = event.modifiers() & Qt.KeyboardModifier.ControlModifier
+        visible = self.visibleLineCount()
+        block = self.editor.textCursor().blockNumber()
+
+        if key == Qt.Key.Key_PageDown:
+            self._scrollBy(visible)
+        elif key == Qt.Key.Key_PageUp:
+            self._scrollBy(-visible)
+        elif key == Qt.Key.Key_Home and ctrl:
+            self.scrollbar.setValue(0)
+        elif key == Qt.Key.Key_End and ctrl:
+            self.scrollbar.setValue(self.scrollbar.maximum())
+        elif key == Qt.Key.Key_Down and block >= visible - 1:
+            self._scrollBy(1)
+            return False  # premik kurzorja naredi urejevalnik
+        elif key == Qt.Key.Key_Up and block == 0:
+            self._scrollBy(-1)
+            return False
+        else:
+            return False
+        return True
+
+
+# -------------------------------------------------------------
+# Seznam layerjev: "številka   Z   vrstice", skok ob izbiri
+# -------------------------------------------------------------
+class LayerNavigator(QWidget):
+
+    lineSelected = pyqtSignal(int)
+
+    ITEM_FORMAT = "%5d   Z %7.2f   %d"
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._index = None
+
+        self.layer_input = QLineEdit()
+        self.layer_input.setPlaceholderText("Go to layer")
+        self.layer_input.returnPressed.connect(self._goToLayer)
+
+        self.list = QListWidget()
+        self.list.setUniformItemSizes(True)
+        self.list.currentRowChanged.connect(self._onRowChanged)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.layer_input)
+        layout.addWidget(self.list)
+
+    def setLayerIndex(self, index):
+        """index = None: indeks se še gradi."""
+        self._index = index
+        self.list.blockSignals(True)
+        self.list.clear()
+        if index is None:
+            self.list.addItem("Indexing layers...")
+            self.list.blockSignals(False)
+            return
+        self.list.addItems(
+            self.ITEM_FORMAT % (number, height, index.lineCount(i))
+            for i, (number, height) in enumerate(zip(index.numbers, index.heights))
+        )
+        self.list.blockSignals(False)
+
+    def _goToLayer(self):
+        try:
+            layer = int(self.layer_input.text())
+        except ValueError:
+            return
+        row = self._index.indexOf(layer) if self._index is not None else -1
+        if row != -1:
+            self.list.setCurrentRow(row)
+            self._onRowChanged(row)  # tudi če je vrstica že izbrana
+
+    def _onRowChanged(self, row):
+        if self._index is not None and 0 <= row < self._index.count():
+            self.lineSelected.emit(self._index.lines[row])
+
+
+# -------------------------------------------------------------
+# Iskanje v ozadju – zadetki po odsekih prek signala batch
+# (dokument se med iskanjem ne spreminja, Replace naredi novega)
+# -------------------------------------------------------------
+class SearchThread(QThread):
+
+    batch = pyqtSignal(object, object, object)  # začetki, konci, preiskano
+    done = pyqtSignal()
+
+    def __init__(self, document, pattern, parent=None):
+        super().__init__(parent)
+        self._document = document
+        self._pattern = pattern
+        self._cancelled = threading.Event()
+
+    def run(self):
+        batches = iterSearchBatches(
+            self._document, self._pattern, self._cancelled.is_set
+        )
+        for starts, ends, scanned in batches:
+            self.batch.emit(starts, ends, scanned)
+        if not self._cancelled.is_set():
+            self.done.emit()
+
+    def cancel(self):
+        """Ne čaka na nit (GUI ostane odziven); zamujene pakete zavrže
+        prejemnik, nit se konča po trenutnem paketu."""
+        self._cancelled.set()
+
+
+# -------------------------------------------------------------
+# Replace v ozadju – nova verzija dokumenta (stara ostane za Undo)
+# -------------------------------------------------------------
+class ReplaceThread(QThread):
+
+    done = pyqtSignal(object, object)  # nov dokument, število zamenjav
+    failed = pyqtSignal(str)  # besedilo napake ("" = preklicano)
+
+    def __init__(self, document, pattern, replacement, budget, parent=None):
+        super().__init__(parent)
+        self._document = document
+        self._pattern = pattern
+        self._replacement = replacement
+        self._budget = budget  # znakov v RAM (0 = brez omejitve)
+        self._cancelled = threading.Event()
+
+    def run(self):
+        try:
+            result = replaceAll(
+                self._document, self._pattern, self._replacement, self._cancelled.is_set
+            )
+        except re.error as e:  # npr. neveljavna skupina v zamenjavi
+            self.failed.emit(str(e))
+            return
+        if result is None:
+            self.failed.emit("")
+            return
+        document, count = result
+        if count:
+            try:
+                document = document.spilledOverBudget(self._budget)
+            except (OSError, ValueError) as e:
+                print("G-code kept in memory:", e)
+        self.done.emit(document, count)
+
+    def cancel(self):
+        self._cancelled.set()
+
+
+# -------------------------------------------------------------
+# Indeks layerjev v ozadju (dokument je nespremenljiv)
+# -------------------------------------------------------------
+class LayerIndexThread(QThread):
+
+    done = pyqtSignal(object, object)  # dokument, LayerIndex
+
+    def __init__(self, document, parent=None):
+        super().__init__(parent)
+        self._document = document
+
+    def run(self):
+        self.done.emit(self._document, LayerIndex(self._document))
+
+
+# -------------------------------------------------------------
+# Shranjevanje v ozadju – odseki po SAVE_SEGMENT, zato je v
+# pomnilniku največ en odsek tudi za dokument v datoteki (mmap)
+# -------------------------------------------------------------
+class SaveThread(QThread):
+
+    SAVE_SEGMENT = 1 << 22
+
+    progress = pyqtSignal(object, object)  # zapisano, skupaj
+    saved = pyqtSignal(object)  # velikost datoteke
+    failed = pyqtSignal(str)  # besedilo napake ("" = preklicano)
+
+    def __init__(self, document, path, kind, metadata, checksum=False, parent=None):
+        super().__init__(parent)
+        self._document = document
+        self._path = path
+        self._kind = kind
+        self._metadata = metadata
+        self._checksum = checksum
+        self._cancelled = threading.Event()
+
+    def run(self):
+        document = self._document
+        segments = document.iterSegments(self.SAVE_SEGMENT)
+        try:
+            size = saveAtomically(
+                self._path,
+                (text for _, text in segments),
+                self._kind,
+                self._metadata,
+                self.progress.emit,
+                document.size(),
+                self._cancelled.is_set,
+                self._checksum,
+            )
+        except SaveCancelled:
+            self.failed.emit("")
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.saved.emit(size)
+
+    def cancel(self):
+        self._cancelled.set()
+
+
+# -------------------------------------------------------------
+# Pošiljanje na tiskalniški strežnik – odseki gredo naravnost v
+# telo HTTP (brez začasne datoteke)
+# -------------------------------------------------------------
+class UploadThread(QThread):
+
+    UPLOAD_SEGMENT = 1 << 22
+
+    progress = pyqtSignal(object, object)  # poslano, skupaj
+    uploaded = pyqtSignal(object)  # slovar PrintServer.upload
+    failed = pyqtSignal(str)  # besedilo napake ("" = preklicano)
+
+    def __init__(self, document, server, filename, kind, metadata, start, parent=None):
+        super().__init__(parent)
+        self._document = document
+        self._server = server  # PrintServer
+        self._filename = filename
+        self._kind = kind
+        self._metadata = metadata
+        self._start = start
+        self._cancelled = threading.Event()
+
+    def run(self):
+        document = self._document
+        segments = document.iterSegments(self.UPLOAD_SEGMENT)
+        try:
+            result = self._server.upload(
+                self._filename,
+                (text for _, text in segments),
+                self._kind,
+                self._metadata,
+                self._start,
+                self.progress.emit,
+                document.size(),
+                self._cancelled.is_set,
+            )
+        except UploadCancelled:
+            self.failed.emit("")
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.uploaded.emit(result)
+
+    def cancel(self):
+        self._cancelled.set()
@@ -0,0 +1,508 @@
+# ===================================================================
+# Opis: Zapis G-code kot besedilo, .gcode.gz ali binarni .bgcode.
+#  - Vsak pisalnik ima write(besedilo) / close() (kot datoteka), zato
+#    ga writePieces polni po kosih – pomnilnik je omejen na en blok
+#  - Cilj je pot ali binarni tok (PrintServerUpload: telo HTTP)
+#  - gzip: zlib tok (gzip.open)
+#  - bgcode (format Prusa, verzija 1): metapodatki (INI) + G-code bloki
+#    (~32 KB besedila, razrez na vrstici), MeatPack s komentarji,
+#    Deflate, CRC32 za vsak blok
+#  - MeatPack po vrsticah, ohrani besedilo natančno (brez načina
+#    "no spaces")
+#  - Dekoder (iterDecoded) za preverjanje: besedilo iz katerega koli
+#    formata, CRC se preveri
+#  - Heatshrink ni podprt (ni ga v standardni knjižnici)
+#  - saveAtomically: zapis v začasno datoteko v ciljni mapi, fsync in
+#    os.replace – obstoječa datoteka ostane cela, če zapis ne uspe ali
+#    se prekine; neobvezno SHA-256 v datoteko .sha256 (sha256sum)
+#  - Brez Qt in Cure (numpy za MeatPack se uvozi šele ob uporabi)
+#
+#  python GcodeWriters.py izvoz.bgcode [original.gcode]
+# ===================================================================
+
+import gzip
+import hashlib
+import io
+import os
+import re
+import struct
+import sys
+import zlib
+
+try:
+    from .GcodeEngine import writePieces
+except ImportError:  # samostojna uporaba brez paketa
+    from GcodeEngine import writePieces
+
+PLAIN = "gcode"
+GZIP = "gzip"
+BGCODE = "bgcode"
+
+# (format, filter za QFileDialog, končnica)
+FORMATS = (
+    (PLAIN, "G-code (*.gcode)", ".gcode"),
+    (GZIP, "Compressed G-code (*.gcode.gz)", ".gcode.gz"),
+    (BGCODE, "Binary G-code (*.bgcode)", ".bgcode"),
+)
+
+GZIP_LEVEL = 6
+BLOCK_TEXT_SIZE = 1 << 15  # MeatPack + Deflate bloka ostaneta < 64 KB
+
+
+def formatForPath(path):
+    """Format po končnici (privzeto navaden G-code)."""
+    lower = path.lower()
+    for kind, _, extension in reversed(FORMATS):
+        if lower.endswith(extension):
+            return kind
+    return PLAIN
+
+
+def openWriter(path, kind=None, metadata=None):
+    """path je pot ali odprt binarni tok (npr. telo prenosa HTTP)."""
+    stream = not isinstance(path, str)
+    kind = kind or (PLAIN if stream else formatForPath(path))
+    if kind == GZIP:
+        return gzip.open(path, "wt", encoding="utf-8", compresslevel=GZIP_LEVEL)
+    if kind == BGCODE:
+        return BgcodeWriter(path, metadata)
+    if stream:
+        return io.TextIOWrapper(path, encoding="utf-8")
+    return open(path, "w", encoding="utf-8", buffering=1 << 20)
+
+
+# -------------------------------------------------------------
+# Atomarni zapis: začasna datoteka → fsync → os.replace
+# -------------------------------------------------------------
+class SaveCancelled(Exception):
+    pass
+
+
+def saveAtomically(
+    path,
+    pieces,
+    kind=None,
+    metadata=None,
+    progress=None,
+    total=0,
+    cancelled=None,
+    checksum=False,
+):
+    """Zapiše kose v path; vrne velikost datoteke (SaveCancelled ob preklicu)."""
+    directory, name = os.path.split(os.path.abspath(path))
+
+    def report(written, total):
+        if cancelled is not None and cancelled():
+            raise SaveCancelled(path)
+        if progress is not None:
+            progress(written, total)
+
+    temporary = _createTemporary(directory, name)
+    try:
+        with openWriter(temporary, kind or formatForPath(path), metadata) as f:
+            writePieces(f, pieces, report, total)
+        digest = _syncFile(temporary, checksum)
+        if cancelled is not None and cancelled():
+            raise SaveCancelled(path)
+        os.replace(temporary, path)
+    except BaseException:
+        _removeQuietly(temporary)
+        raise
+    sidecar = path + ".sha256"
+    if digest is None:
+        # stara kontrolna vsota ne velja več za novo vsebino
+        _removeQuietly(sidecar)
+    else:
+        temporary = _createTemporary(directory, name + ".sha256")
+        try:
+            with open(temporary, "w", encoding="ascii", newline="\n") as f:
+                f.write("%s  %s\n" % (digest, name))
+            _syncFile(temporary, False)
+            os.replace(temporary, sidecar)
+        except BaseException:
+            _removeQuietly(temporary)
+            raise
+    _syncDirectory(directory)
+    return os.path.getsize(path)
+
+
+def _createTemporary(directory, name):
+    """Prazna skrita datoteka ob cilju (pravice po umask, kot open)."""
+    for number in range(100):
+        part = ".%s.%d.%d.part" % (name, os.getpid(), number)
+        temporary = os.path.join(directory, part)
+        try:
+            os.close(os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666))
+            return temporary
+        except FileExistsError:
+            continue
+    raise FileExistsError(temporary)
+
+
+def _syncFile(path, checksum):
+    """fsync datoteke; s checksum še SHA-256 zapisanih bajtov."""
+    with open(path, "rb+") as f:
+        os.fsync(f.fileno())
+        if not checksum:
+            return None
+        digest = hashlib.sha256()
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _syncDirectory(directory):
+    # preimenovanje je trajno šele po fsync mape (ne gre na Windows)
+    try:
+        descriptor = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(descriptor)
+    except OSError:
+        pass
+    finally:
+        os.close(descriptor)
+
+
+def _removeQuietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+# -------------------------------------------------------------
+# Binarni G-code: glava datoteke, bloki, parametri
+# -------------------------------------------------------------
+MAGIC = b"GCDE"
+VERSION = 1
+CHECKSUM_CRC32 = 1
+
+FILE_METADATA = 0
+GCODE = 1
+SLICER_METADATA = 2
+PRINTER_METADATA = 3
+PRINT_METADATA = 4
+THUMBNAIL = 5
+
+COMPRESSION_NONE = 0
+COMPRESSION_DEFLATE = 1
+
+ENCODING_INI = 0
+ENCODING_NONE = 0
+ENCODING_MEATPACK = 1
+ENCODING_MEATPACK_COMMENTS = 2
+
+_FILE_HEADER = struct.Struct("<4sIH")
+_BLOCK_HEADER = struct.Struct("<HHI")
+_SIZE = struct.Struct("<I")
+_PARAMETER = struct.Struct("<H")
+
+# ;KEY:vrednost v glavi Cure → metapodatki bgcode (blok, ključ)
+_CURA_METADATA = {
+    ";TARGET_MACHINE.NAME": (PRINTER_METADATA, "printer_model"),
+    ";EXTRUDER_TRAIN.0.NOZZLE.DIAMETER": (PRINTER_METADATA, "nozzle_diameter"),
+    ";EXTRUDER_TRAIN.0.MATERIAL.NAME": (PRINTER_METADATA, "filament_type"),
+    ";Layer height": (PRINTER_METADATA, "layer_height"),
+    ";MAXZ": (PRINTER_METADATA, "max_layer_z"),
+    ";GENERATOR.NAME": (SLICER_METADATA, "Producer"),
+    ";GENERATOR.VERSION": (SLICER_METADATA, "Producer version"),
+}
+
+
+def curaMetadata(header):
+    """Metapodatki bgcode {blok: {ključ: vrednost}} iz glave Cure."""
+    metadata = {PRINTER_METADATA: {}, PRINT_METADATA: {}, SLICER_METADATA: {}}
+    for line in header.splitlines():
+        key, _, value = line.partition(":")
+        value = value.strip()
+        if key in _CURA_METADATA:
+            block, name = _CURA_METADATA[key]
+            metadata[block][name] = value
+        elif key == ";TIME" and value.isdigit():
+            seconds = int(value)
+            text = "%dh %dm %ds" % (seconds // 3600, seconds // 60 % 60, seconds % 60)
+            for block in (PRINTER_METADATA, PRINT_METADATA):
+                metadata[block]["estimated printing time (normal mode)"] = text
+        elif key == ";Filament used" and re.fullmatch(r"[\d.]+m", value):
+            millimetres = "%.2f" % (float(value[:-1]) * 1000)
+            for block in (PRINTER_METADATA, PRINT_METADATA):
+                metadata[block]["filament used [mm]"] = millimetres
+    metadata[SLICER_METADATA].setdefault("Producer", "Cura")
+    metadata[SLICER_METADATA]["Post-processed by"] = "SliceAndJoinGcode"
+    return metadata
+
+
+class BgcodeWriter:
+    def __init__(self, path, metadata=None, compression=COMPRESSION_DEFLATE):
+        self._file = open(path, "wb") if isinstance(path, str) else path
+        self._compression = compression
+        self._pending = []
+        self._pending_size = 0
+        self.blocks = 0
+
+        self._file.write(_FILE_HEADER.pack(MAGIC, VERSION, CHECKSUM_CRC32))
+        # vrstni red blokov je predpisan
+        metadata = metadata or {}
+        for block_type in (PRINTER_METADATA, PRINT_METADATA, SLICER_METADATA):
+            values = metadata.get(block_type, {})
+            ini = "".join("%s=%s\n" % item for item in values.items())
+            self._writeBlock(block_type, ENCODING_INI, ini.encode("utf-8"))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, text):
+        self._pending.append(text)
+        self._pending_size += len(text)
+        if self._pending_size >= BLOCK_TEXT_SIZE:
+            self._flushBlocks(final=False)
+
+    def close(self):
+        if self._file is None:
+            return
+        try:
+            self._flushBlocks(final=True)
+        finally:
+            self._file.close()
+            self._file = None
+
+    def _flushBlocks(self, final):
+        text = "".join(self._pending)
+        start = 0
+        while len(text) - start >= BLOCK_TEXT_SIZE:
+            # blok konča z vrstico (zadnja "\n" pred mejo)
+            end = text.rfind("\n", start, start + BLOCK_TEXT_SIZE) + 1
+            if end <= start:
+                end = start + BLOCK_TEXT_SIZE
+            self._writeGcode(text[start:end])
+            start = end
+        if final and start < len(text):
+            self._writeGcode(text[start:])
+            start = len(text)
+        self._pending = [text[start:]] if start < len(text) else []
+        self._pending_size = len(text) - start
+
+    def _writeGcode(self, text):
+        data = meatpack(text.encode("utf-8"))
+        self._writeBlock(GCODE, ENCODING_MEATPACK_COMMENTS, data)
+
+    def _writeBlock(self, block_type, encoding, data):
+        if self._compression == COMPRESSION_DEFLATE:
+            stored = zlib.compress(data)
+            header = _BLOCK_HEADER.pack(block_type, self._compression, len(data))
+            header += _SIZE.pack(len(stored))
+        else:
+            stored = data
+            header = _BLOCK_HEADER.pack(block_type, COMPRESSION_NONE, len(data))
+        parameters = _PARAMETER.pack(encoding)
+        checksum = zlib.crc32(stored, zlib.crc32(parameters, zlib.crc32(header)))
+        self._file.write(header + parameters)
+        self._file.write(stored)
+        self._file.write(_SIZE.pack(checksum))
+        self.blocks += 1
+
+
+# -------------------------------------------------------------
+# MeatPack: dva znaka iz tabele v enem bajtu (spodnji 4 biti =
+# prvi znak), ostali znaki cel bajt za pakiranim (koda 0b1111).
+# Vsaka vrstica se pakira zase: firmware (Marlin meatpack.cpp) in
+# libbgcode za "\n" v spodnjih 4 bitih ne bereta zgornjih, zato
+# vrstica lihe dolžine dobi na koncu še en "\n" (kot referenčni
+# kodirnik), ki se pri dekodiranju izpusti
+# -------------------------------------------------------------
+_MEATPACK_CHARS = b"0123456789. \nGX"
+_NO_SPACES_CHARS = b"0123456789.E\nGX"
+_FULL = 0b1111
+_SIGNAL = b"\xff\xff"
+_ENABLE_PACKING = 251
+_DISABLE_PACKING = 250
+_RESET_ALL = 249
+_ENABLE_NO_SPACES = 247
+_DISABLE_NO_SPACES = 246
+
+
+def meatpack(data):
+    """Bajti → MeatPack (samostojen tok: vklop pakiranja na začetku)."""
+    import numpy
+
+    table = numpy.full(256, _FULL, dtype=numpy.uint8)
+    table[list(_MEATPACK_CHARS[:_FULL])] = numpy.arange(_FULL, dtype=numpy.uint8)
+
+    source = numpy.frombuffer(data, dtype=numpy.uint8)
+    newlines = numpy.flatnonzero(source == 0x0A)
+    if len(newlines):
+        # "\n" na sodem mestu v vrstici (liha dolžina) → dodaten "\n"
+        line_starts = numpy.concatenate(([0], newlines[:-1] + 1))
+        odd_lines = newlines[(newlines - line_starts) % 2 == 0]
+        source = numpy.insert(source, odd_lines + 1, 0x0A)
+    even = len(source) & ~1
+    first = source[0:even:2]
+    second = source[1:even:2]
+    low = table[first]
+    high = table[second]
+    low_full = low == _FULL
+    high_full = high == _FULL
+
+    # skupina = pakiran bajt + 0, 1 ali 2 cela znaka
+    sizes = 1 + low_full.astype(numpy.int64) + high_full
+    starts = numpy.cumsum(sizes) - sizes
+    packed = numpy.empty(int(sizes.sum()), dtype=numpy.uint8)
+    packed[starts] = low | (high << 4)
+    packed[(starts + 1)[low_full]] = first[low_full]
+    packed[(starts + 1 + low_full)[high_full]] = second[high_full]
+
+    parts = [_SIGNAL, bytes([_ENABLE_PACKING]), packed.tobytes()]
+    if even < len(source):
+        # lih znak nedokončane zadnje vrstice – brez pakiranja
+        parts += [_SIGNAL, bytes([_DISABLE_PACKING]), source[even:].tobytes()]
+    return b"".join(parts)
+
+
+def unmeatpack(data):
+    """MeatPack → bajti po pravilih firmware (za "\n" se drugi znak izpusti)."""
+    out = bytearray()
+    chars = _MEATPACK_CHARS
+    packing = False
+    position = 0
+    size = len(data)
+    while position < size:
+        byte = data[position]
+        if byte == 0xFF and data[position + 1 : position + 2] == b"\xff":
+            command = data[position + 2]
+            position += 3
+            if command == _ENABLE_PACKING:
+                packing = True
+            elif command in (_DISABLE_PACKING, _RESET_ALL):
+                packing = False
+                chars = _MEATPACK_CHARS
+            elif command == _ENABLE_NO_SPACES:
+                chars = _NO_SPACES_CHARS
+            elif command == _DISABLE_NO_SPACES:
+                chars = _MEATPACK_CHARS
+            continue
+        position += 1
+        if not packing:
+            out.append(byte)
+            continue
+        low, high = byte & _FULL, byte >> 4
+        if low == _FULL:
+            out.append(data[position])
+            position += 1
+        else:
+            out.append(chars[low])
+            if chars[low] == 0x0A:
+                continue  # zgornji 4 biti za "\n" ne veljajo
+        if high == _FULL:
+            out.append(data[position])
+            position += 1
+        else:
+            out.append(chars[high])
+    return bytes(out)
+
+
+# -------------------------------------------------------------
+# Branje (preverjanje): bloki bgcode in besedilo iz vseh formatov
+# -------------------------------------------------------------
+def iterBgcodeBlocks(f):
+    """(tip, kodiranje, podatki) za vsak blok; preveri CRC32."""
+    magic, version, checksum_type = _FILE_HEADER.unpack(f.read(_FILE_HEADER.size))
+    if magic != MAGIC:
+        raise ValueError("not a binary G-code file")
+    if version != VERSION:
+        raise ValueError("unsupported bgcode version %d" % version)
+
+    while True:
+        header = f.read(_BLOCK_HEADER.size)
+        if not header:
+            return
+        block_type, compression, size = _BLOCK_HEADER.unpack(header)
+        stored_size = size
+        if compression != COMPRESSION_NONE:
+            size_bytes = f.read(_SIZE.size)
+            header += size_bytes
+            (stored_size,) = _SIZE.unpack(size_bytes)
+        parameters = f.read(6 if block_type == THUMBNAIL else _PARAMETER.size)
+        stored = f.read(stored_size)
+        if checksum_type == CHECKSUM_CRC32:
+            (checksum,) = _SIZE.unpack(f.read(_SIZE.size))
+            expected = zlib.crc32(stored, zlib.crc32(parameters, zlib.crc32(header)))
+            if checksum != expected:
+                raise ValueError("CRC mismatch in block %d" % block_type)
+
+        if compression == COMPRESSION_DEFLATE:
+            data = zlib.decompress(stored)
+        elif compression == COMPRESSION_NONE:
+            data = stored
+        else:
+            raise ValueError("unsupported compression %d" % compression)
+        if len(data) != size:
+            raise ValueError("wrong block size")
+        (encoding,) = _PARAMETER.unpack(parameters[: _PARAMETER.size])
+        yield block_type, encoding, data
+
+
+def iterDecoded(path, kind=None):
+    """Besedilo G-code iz .gcode / .gcode.gz / .bgcode po kosih."""
+    kind = kind or formatForPath(path)
+    if kind == BGCODE:
+        with open(path, "rb") as f:
+            for block_type, encoding, data in iterBgcodeBlocks(f):
+                if block_type != GCODE:
+                    continue
+                if encoding != ENCODING_NONE:
+                    data = unmeatpack(data)
+                yield data.decode("utf-8")
+        return
+    opener = gzip.open if kind == GZIP else open
+    with opener(path, "rt", encoding="utf-8", newline="") as f:
+        while True:
+            text = f.read(1 << 20)
+            if not text:
+                return
+            yield text
+
+
+def firstDifference(pieces_a, pieces_b):
+    """Odmik prve razlike dveh zaporedij besedila ali -1."""
+    offset = 0
+    a = b = ""
+    pieces_a = iter(pieces_a)
+    pieces_b = iter(pieces_b)
+    while True:
+        if not a:
+            a = next(pieces_a, "")
+        if not b:
+            b = next(pieces_b, "")
+        if not a or not b:
+            return -1 if not a and not b else offset
+        length = min(len(a), len(b))
+        if a[:length] != b[:length]:
+            return offset + next(i for i in range(length) if a[i] != b[i])
+        offset += length
+        a = a[length:]
+        b = b[length:]
+
+
+def main(argv):
+    if len(argv) == 2:
+        for text in iterDecoded(argv[1]):
+            sys.stdout.write(text)
+        return 0
+    if len(argv) == 3:
+        difference = firstDifference(iterDecoded(argv[1]), iterDecoded(argv[2]))
+        if difference == -1:
+            print("OK: same G-code")
+            return 0
+        print("Different at offset %d" % difference)
+        return 1
+    print("usage: GcodeWriters.py export.bgcode [original.gcode]")
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
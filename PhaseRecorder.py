@@ -0,0 +1,262 @@
+# ===================================================================
+# Opis: Meritve faz enega zagona (slice, združitev, prikaz, shranjevanje).
+#  - Faza = begin(ime) ... end(ime); faze se lahko prekrivajo, ker
+#    slicanje teče prek signalov Qt (ni enega klica)
+#  - Čas (wall) in CPU čas procesa (vse niti), velikosti kot vrednosti
+#    faze (bytes, lines ...)
+#  - Neobvezno cProfile za sinhrone faze (phase(..., profile=True)),
+#    rezultat kot .prof in povzetek najdražjih funkcij
+#  - writeJsonLines: ena vrstica JSON na zagon (za primerjavo verzij)
+#  - RSS na začetku in koncu faze ter vrh med fazo: nit vzorči RSS
+#    vsakih SAMPLE_INTERVAL sekund, dokler je odprta vsaj ena faza
+#    (potem se konča, naslednji begin jo zažene znova)
+#  - RSS: psutil, sicer /proc (Linux) ali GetProcessMemoryInfo
+#    (Windows); drugje None
+#  - Brez Qt in Cure
+# ===================================================================
+
+import contextlib
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+
+MB = 1 << 20
+
+
+# -------------------------------------------------------------
+# Trenutni RSS procesa v bajtih (ali None)
+# -------------------------------------------------------------
+def _rssReader():
+    try:
+        import psutil
+
+        process = psutil.Process()
+        return lambda: process.memory_info().rss
+    except Exception:
+        pass
+
+    if sys.platform.startswith("linux"):
+        page_size = os.sysconf("SC_PAGE_SIZE")
+
+        def readStatm():
+            with open("/proc/self/statm", "rb") as f:
+                return int(f.read().split()[1]) * page_size
+
+        return readStatm
+
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        # PROCESS_MEMORY_COUNTERS
+        sizes = (
+            "PeakWorkingSetSize",
+            "WorkingSetSize",
+            "QuotaPeakPagedPoolUsage",
+            "QuotaPagedPoolUsage",
+            "QuotaPeakNonPagedPoolUsage",
+            "QuotaNonPagedPoolUsage",
+            "PagefileUsage",
+            "PeakPagefileUsage",
+        )
+
+        class Counters(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)]
+            _fields_ += [(name, ctypes.c_size_t) for name in sizes]
+
+        psapi = ctypes.WinDLL("psapi")
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+
+        def readCounters():
+            counters = Counters()
+            counters.cb = ctypes.sizeof(counters)
+            psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb)
+            return counters.WorkingSetSize
+
+        return readCounters
+
+    return lambda: None
+
+
+_read_rss = None
+
+
+def currentRss():
+    global _read_rss
+    if _read_rss is None:
+        _read_rss = _rssReader()
+    try:
+        return _read_rss()
+    except Exception:
+        return None
+
+
+# -------------------------------------------------------------
+# Faze zagona
+# -------------------------------------------------------------
+class PhaseRecorder:
+
+    SAMPLE_INTERVAL = 0.01  # s
+    PROFILE_LINES = 15
+
+    def __init__(self, profile=False, profile_dir=None):
+        self.profile = profile
+        self.profile_dir = profile_dir  # .prof datoteke (None = brez)
+        self.started = time.time()
+        self.phases = []  # slovarji v vrstnem redu začetka
+        self._open = {}  # ime → slovar faze
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def begin(self, name, **values):
+        self.end(name)  # ponovni begin zapre prejšnjo
+        rss = currentRss()
+        phase = dict(name=name, rss_start=rss, rss_end=None, rss_peak=rss, **values)
+        phase["_wall"] = time.perf_counter()
+        phase["_cpu"] = time.process_time()
+        with self._lock:
+            self.phases.append(phase)
+            self._open[name] = phase
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="PhaseRecorder", daemon=True
+                )
+                self._thread.start()
+        return phase
+
+    def end(self, name, **values):
+        with self._lock:
+            phase = self._open.pop(name, None)
+        if phase is None:
+            return None
+        phase["wall_s"] = round(time.perf_counter() - phase.pop("_wall"), 4)
+        phase["cpu_s"] = round(time.process_time() - phase.pop("_cpu"), 4)
+        self._sample([phase])
+        phase["rss_end"] = currentRss()
+        phase.update(values)
+        return phase
+
+    def endAll(self):
+        for name in list(self._open):
+            self.end(name)
+
+    @contextlib.contextmanager
+    def phase(self, name, profile=False, **values):
+        phase = self.begin(name, **values)
+        profiler = cProfile.Profile() if profile and self.profile else None
+        try:
+            if profiler is not None:
+                profiler.enable()
+            yield phase
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                self._storeProfile(phase, profiler)
+            self.end(name)
+
+    def _storeProfile(self, phase, profiler):
+        text = io.StringIO()
+        stats = pstats.Stats(profiler, stream=text)
+        stats.sort_stats("cumulative").print_stats(self.PROFILE_LINES)
+        phase["profile_text"] = text.getvalue()
+        if self.profile_dir:
+            name = "%s_%d.prof" % (phase["name"].replace(" ", "_"), self.started)
+            path = os.path.join(self.profile_dir, name)
+            try:
+                os.makedirs(self.profile_dir, exist_ok=True)
+                stats.dump_stats(path)
+                phase["profile"] = path
+            except OSError as e:
+                print("Profile not saved:", e)
+
+    def isOpen(self, name):
+        return name in self._open
+
+    # ---------------------------------------------------------
+    # Vzorčenje vrha RSS (ena nit, teče samo med fazami)
+    # ---------------------------------------------------------
+    def _run(self):
+        while True:
+            with self._lock:
+                phases = list(self._open.values())
+                if not phases:
+                    self._thread = None
+                    return
+            self._sample(phases)
+            time.sleep(self.SAMPLE_INTERVAL)
+
+    def _sample(self, phases):
+        rss = currentRss()
+        if rss is None:
+            return
+        for phase in phases:
+            if phase["rss_peak"] is None or rss > phase["rss_peak"]:
+                phase["rss_peak"] = rss
+
+    # ---------------------------------------------------------
+    # Poročilo
+    # ---------------------------------------------------------
+    def summaryLines(self):
+        lines = []
+        for phase in self.phases:
+            if "wall_s" in phase:
+                timing = "%8.2f s  cpu %7.2f s" % (phase["wall_s"], phase["cpu_s"])
+            else:
+                timing = "%8s    cpu %9s" % ("(open)", "")
+            memory = "peak RSS n/a"
+            if phase["rss_peak"] is not None:
+                memory = "peak %5.0f MB (start %5.0f)" % (
+                    phase["rss_peak"] / MB,
+                    phase["rss_start"] / MB,
+                )
+            sizes = "  ".join(
+                "%s=%s" % (key, _formatValue(value))
+                for key, value in phase.items()
+                if key not in _REPORTED and not key.startswith("_")
+            )
+            lines.append("%-10s %s  %s  %s" % (phase["name"], timing, memory, sizes))
+        return lines
+
+    def record(self, **values):
+        """Zagon kot en slovar (brez besedila profilov)."""
+        phases = [
+            {
+                key: value
+                for key, value in phase.items()
+                if key != "profile_text" and not key.startswith("_")
+            }
+            for phase in self.phases
+        ]
+        return dict(time=round(self.started, 3), phases=phases, **values)
+
+    def writeJsonLines(self, path, **values):
+        """Doda vrstico JSON za ta zagon na konec datoteke path."""
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(self.record(**values)) + "\n")
+        except OSError as e:
+            print("Metrics not written:", e)
+
+
+_REPORTED = {
+    "name",
+    "rss_start",
+    "rss_end",
+    "rss_peak",
+    "wall_s",
+    "cpu_s",
+    "profile",
+    "profile_text",
+}
+
+
+def _formatValue(value):
+    if isinstance(value, int) and value >= 10 * MB:
+        return "%.0f MB" % (value / MB)
+    return str(value)
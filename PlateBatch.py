@@ -0,0 +1,283 @@
+# ===================================================================
+# Opis: Vse postelje (build plates) v enem zagonu, s prekrivanjem.
+#  - Postelja = slice #1 + #2 (dva procesa CuraEngine), združitev,
+#    nova glava in zapis v svojo datoteko
+#  - Ko je slice postelje k gotov, se takoj začne slice postelje k+1;
+#    združitev in zapis postelje k tečeta v PlateWriter (QThread)
+#    hkrati s CuraEngine
+#  - Naprej se slica največ ena postelja, zato sta v pomnilniku
+#    največ rezultata dveh postelj
+#  - Napaka ene postelje ne ustavi ostalih, Cancel ustavi vse
+#  - Združitev kot v dialogu (GcodeMerge.mergePasses): stik ;LAYER:1
+#    → aktivni niz pravil → nova glava
+#  - Rezultat na posteljo: časi slice / merge / write, velikost,
+#    layerji, pot ali napaka; summaryLines = tabela za prikaz
+# ===================================================================
+
+import functools
+import threading
+import time
+
+from PyQt6.QtCore import QThread, Qt, pyqtSignal
+
+from .GcodeMerge import mergePasses
+from .GcodeWriters import SaveCancelled, curaMetadata, saveAtomically
+
+MB = 1 << 20
+SAVE_SEGMENT = 1 << 22
+
+
+# -------------------------------------------------------------
+# Zaporedje postelj: slice k+1 med zapisom k
+# -------------------------------------------------------------
+class PlateBatch:
+    def __init__(self, plates, start_slice, make_writer, on_done, on_progress=None):
+        self.plates = list(plates)
+        self.results = [dict(plate=plate, ok=False) for plate in self.plates]
+        self.started = time.perf_counter()
+        self.wall_s = None
+
+        # fn(plate, on_sliced(passes), on_failed(message)) → pipeline
+        # ali None (napaka se javi prek on_failed)
+        self._start_slice = start_slice
+        self._make_writer = make_writer  # fn(plate, passes) → PlateWriter
+        self._on_done = on_done  # fn(results)
+        self._on_progress = on_progress  # fn(besedilo, končanih postelj)
+
+        self._next = 0  # naslednja postelja za slice
+        self._slicing = None  # (številka v plates, pipeline)
+        self._sliced = []  # [(številka, passes)] čakajo na zapis
+        self._writing = None  # (številka, PlateWriter)
+        self._cancelled = False
+        self._done = False
+
+    def start(self):
+        self._schedule()
+
+    def cancel(self):
+        self._cancelled = True
+        for number, _ in self._sliced:
+            self.results[number]["error"] = "cancelled"
+        self._sliced = []
+        if self._slicing is not None and self._slicing[1] is not None:
+            self._slicing[1].cancel()
+        if self._writing is not None:
+            self._writing[1].cancel()
+        self._schedule()
+
+    def finishedCount(self):
+        return sum(1 for result in self.results if "error" in result or result["ok"])
+
+    # ---------------------------------------------------------
+    # Razpored: en slice naprej, en zapis naenkrat
+    # ---------------------------------------------------------
+    def _schedule(self):
+        waiting = len(self._sliced) + (self._writing is not None)
+        if (
+            not self._cancelled
+            and self._slicing is None
+            and self._next < len(self.plates)
+            and waiting <= 1
+        ):
+            self._startSlice(self._next)
+            self._next += 1
+
+        if self._writing is None and self._sliced:
+            number, passes = self._sliced.pop(0)
+            self._startWriter(number, passes)
+
+        idle = self._slicing is None and self._writing is None and not self._sliced
+        if idle and (self._cancelled or self._next >= len(self.plates)):
+            if not self._done:
+                self._done = True
+                for result in self.results[self._next :]:
+                    result["error"] = "cancelled"
+                self.wall_s = round(time.perf_counter() - self.started, 3)
+                self._on_done(self.results)
+            return
+        self._report()
+
+    def _startSlice(self, number):
+        result = self.results[number]
+        result["_slice_started"] = time.perf_counter()
+        # povratna klica prideta vedno asinhrono (QTimer / QProcess)
+        pipeline = self._start_slice(
+            self.plates[number],
+            functools.partial(self._onSliced, number),
+            functools.partial(self._onSliceFailed, number),
+        )
+        self._slicing = (number, pipeline)
+
+    def _onSliced(self, number, passes):
+        result = self.results[number]
+        result["slice_s"] = round(time.perf_counter() - result.pop("_slice_started"), 3)
+        result["cached"] = all(slice_pass.cached for slice_pass in passes)
+        self._slicing = None
+        if self._cancelled:
+            result["error"] = "cancelled"
+        else:
+            self._sliced.append((number, passes))
+        self._schedule()
+
+    def _onSliceFailed(self, number, message):
+        self.results[number].pop("_slice_started", None)
+        self.results[number]["error"] = message
+        self._slicing = None
+        self._schedule()
+
+    def _startWriter(self, number, passes):
+        writer = self._make_writer(self.plates[number], passes)
+        queued = Qt.ConnectionType.QueuedConnection
+        writer.written.connect(functools.partial(self._onWritten, number), queued)
+        writer.failed.connect(functools.partial(self._onWriteFailed, number), queued)
+        self._writing = (number, writer)
+        writer.start()
+
+    def _onWritten(self, number, values):
+        self._finishWriter()
+        self.results[number].update(values, ok=True)
+        self._schedule()
+
+    def _onWriteFailed(self, number, message):
+        self._finishWriter()
+        self.results[number]["error"] = message or "cancelled"
+        self._schedule()
+
+    def _finishWriter(self):
+        _, writer = self._writing
+        writer.wait()
+        self._writing = None
+
+    def _report(self):
+        if self._on_progress is None:
+            return
+        parts = []
+        if self._slicing is not None:
+            parts.append("slicing plate %d" % self.plates[self._slicing[0]])
+        if self._writing is not None:
+            parts.append("writing plate %d" % self.plates[self._writing[0]])
+        self._on_progress(", ".join(parts), self.finishedCount())
+
+    # ---------------------------------------------------------
+    # Povzetek
+    # ---------------------------------------------------------
+    def summaryLines(self):
+        lines = [
+            "%5s %8s %8s %8s %9s %7s  %s"
+            % ("plate", "slice s", "merge s", "write s", "size MB", "layers", "file")
+        ]
+        busy = 0.0
+        for result in self.results:
+            times = [result.get(key) for key in ("slice_s", "merge_s", "write_s")]
+            busy += sum(value for value in times if value)
+            columns = [
+                "%8.2f" % value if value is not None else "%8s" % "-" for value in times
+            ]
+            if result["ok"]:
+                size = "%9.1f" % (result["bytes"] / MB)
+                tail = "%7d  %s" % (result["layers"], result["path"])
+            else:
+                size = "%9s" % "-"
+                tail = "%7s  %s" % ("-", result.get("error", ""))
+            columns = " ".join(columns)
+            lines.append("%5d %s %s %s" % (result["plate"], columns, size, tail))
+        if self.wall_s is not None:
+            lines.append("")
+            lines.append(
+                "total %.2f s (sum of phases %.2f s, overlap saved %.2f s)"
+                % (self.wall_s, busy, max(busy - self.wall_s, 0.0))
+            )
+        return lines
+
+    def record(self):
+        """Rezultati brez notranjih ključev (za summary.json)."""
+        results = [
+            {key: value for key, value in result.items() if not key.startswith("_")}
+            for result in self.results
+        ]
+        return dict(wall_s=self.wall_s, plates=results)
+
+
+# -------------------------------------------------------------
+# Združitev + glava + atomarni zapis ene postelje v ozadju
+# -------------------------------------------------------------
+class PlateWriter(QThread):
+
+    written = pyqtSignal(object)  # slovar: bytes, layers, path, merge_s ...
+    failed = pyqtSignal(str)  # besedilo napake ("" = preklicano)
+
+    def __init__(
+        self,
+        passes,
+        path,
+        kind,
+        acceleration,
+        recompute_header=True,
+        checksum=False,
+        seam_check="fix",
+        rules=None,
+        parent=None,
+    ):
+        super().__init__(parent)
+        self._passes = passes
+        self._path = path
+        self._kind = kind
+        self._acceleration = acceleration
+        self._recompute_header = recompute_header
+        self._checksum = checksum
+        self._seam_check = seam_check
+        self._rules = rules  # RewriteRules ali None
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def run(self):
+        try:
+            values = self._write()
+        except SaveCancelled:
+            self.failed.emit("")
+        except Exception as e:
+            self.failed.emit("%s: %s" % (type(e).__name__, e))
+        else:
+            self.written.emit(values)
+
+    def _write(self):
+        merging = time.perf_counter()
+        first_pass, rest_pass = self._passes
+        self._passes = None  # rezultati slicev samo do združitve
+        document, layer_index, merged = mergePasses(
+            first_pass.lines,
+            rest_pass.lines,
+            first_pass.truncated,
+            self._seam_check,
+            self._rules,
+            self._recompute_header,
+            self._acceleration,
+        )
+        first_pass = rest_pass = None
+        if merged["header_error"]:
+            print("Header not recomputed:", merged["header_error"])
+        merge_s = round(time.perf_counter() - merging, 3)
+
+        writing = time.perf_counter()
+        segments = document.iterSegments(SAVE_SEGMENT)
+        size = saveAtomically(
+            self._path,
+            (text for _, text in segments),
+            self._kind,
+            curaMetadata(document.textRange(0, 1 << 16)),
+            total=document.size(),
+            cancelled=self._cancelled.is_set,
+            checksum=self._checksum,
+        )
+        return dict(
+            path=self._path,
+            bytes=size,
+            lines=document.lineCount(),
+            layers=layer_index.count(),
+            seam=[str(issue) for issue in merged["seam"]],
+            rewrite=merged["rewrite"] or [],
+            merge_s=merge_s,
+            write_s=round(time.perf_counter() - writing, 3),
+        )
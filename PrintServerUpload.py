@@ -0,0 +1,326 @@
+# ===================================================================
+# Opis: Pošiljanje G-code na tiskalniški strežnik (OctoPrint, Moonraker).
+#  - Kosi dokumenta gredo naravnost v telo HTTP (multipart/form-data,
+#    Transfer-Encoding: chunked) – brez vmesne datoteke in brez
+#    sestavljanja celotnega besedila v pomnilniku
+#  - Format: navaden G-code, .gcode.gz ali .bgcode (pisalniki iz
+#    GcodeWriters pišejo v tok namesto v datoteko)
+#  - ConnectionPool: povezave (keep-alive) se ponovno uporabijo za
+#    naslednji prenos; zaprta povezava se zazna pred uporabo
+#  - Strežnik: "auto" (GET /server/info = Moonraker, sicer
+#    /api/version = OctoPrint), ključ API v X-Api-Key, uporabnik in
+#    geslo v URL = Basic auth
+#  - Napredek in preklic kot pri saveAtomically (UploadCancelled)
+#  - Brez Qt in Cure
+#
+#  python PrintServerUpload.py http://octopi.local datoteka.gcode [ključ]
+# ===================================================================
+
+import base64
+import http.client
+import io
+import json
+import os
+import select
+import ssl
+import sys
+import threading
+import urllib.parse
+import uuid
+
+try:
+    from .GcodeEngine import writePieces
+    from .GcodeWriters import FORMATS, PLAIN, openWriter
+except ImportError:  # samostojna uporaba brez paketa
+    from GcodeEngine import writePieces
+    from GcodeWriters import FORMATS, PLAIN, openWriter
+
+AUTO = "auto"
+OCTOPRINT = "octoprint"
+MOONRAKER = "moonraker"
+
+CHUNK_SIZE = 1 << 16  # en HTTP chunk
+TIMEOUT = 30  # s brez odziva strežnika
+
+# (pot za prenos, polja obrazca; print = začni tisk)
+_UPLOAD = {
+    OCTOPRINT: ("/api/files/local", lambda start: {"print": _flag(start)}),
+    MOONRAKER: (
+        "/server/files/upload",
+        lambda start: {"root": "gcodes", "print": _flag(start)},
+    ),
+}
+
+
+class UploadCancelled(Exception):
+    pass
+
+
+class UploadError(Exception):
+    pass
+
+
+def _flag(value):
+    return "true" if value else "false"
+
+
+# -------------------------------------------------------------
+# Povezave keep-alive po (shema, strežnik, vrata)
+# -------------------------------------------------------------
+class ConnectionPool:
+    def __init__(self, timeout=TIMEOUT, per_host=2):
+        self.timeout = timeout
+        self.per_host = per_host
+        self.created = 0  # novih povezav (za meritve)
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, parts):
+        key = (parts.scheme, parts.hostname, parts.port)
+        with self._lock:
+            idle = self._idle.get(key, [])
+            while idle:
+                connection = idle.pop()
+                if not _isDropped(connection):
+                    return connection
+                connection.close()
+        self.created += 1
+        if parts.scheme == "https":
+            context = ssl.create_default_context()
+            return http.client.HTTPSConnection(
+                parts.hostname, parts.port, timeout=self.timeout, context=context
+            )
+        return http.client.HTTPConnection(
+            parts.hostname, parts.port, timeout=self.timeout
+        )
+
+    def release(self, parts, connection, reusable=True):
+        key = (parts.scheme, parts.hostname, parts.port)
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if reusable and len(idle) < self.per_host:
+                idle.append(connection)
+                return
+        connection.close()
+
+    def close(self):
+        with self._lock:
+            connections = [c for idle in self._idle.values() for c in idle]
+            self._idle = {}
+        for connection in connections:
+            connection.close()
+
+
+def _isDropped(connection):
+    # strežnik je zaprl povezavo: vtičnica je berljiva (EOF)
+    sock = connection.sock
+    if sock is None:
+        return False
+    try:
+        return bool(select.select([sock], [], [], 0)[0])
+    except (OSError, ValueError):
+        return True
+
+
+_default_pool = None
+
+
+def defaultPool():
+    global _default_pool
+    if _default_pool is None:
+        _default_pool = ConnectionPool()
+    return _default_pool
+
+
+# -------------------------------------------------------------
+# Telo zahteve: HTTP chunki neposredno v vtičnico
+# -------------------------------------------------------------
+class _ChunkedBody(io.RawIOBase):
+    def __init__(self, connection):
+        self._connection = connection
+        self.sent = 0  # bajtov vsebine (brez okvirjev chunkov)
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        size = len(data)
+        if size:
+            self._connection.send(b"%x\r\n" % size + bytes(data) + b"\r\n")
+            self.sent += size
+        return size
+
+    def finish(self):
+        self._connection.send(b"0\r\n\r\n")
+
+
+# -------------------------------------------------------------
+# Strežnik
+# -------------------------------------------------------------
+class PrintServer:
+    def __init__(self, url, api_key="", kind=AUTO, pool=None):
+        if "://" not in url:
+            url = "http://" + url
+        self.parts = urllib.parse.urlsplit(url)
+        if self.parts.scheme not in ("http", "https") or not self.parts.hostname:
+            raise UploadError("Invalid print server URL: %s" % url)
+        self.base_path = self.parts.path.rstrip("/")
+        self.api_key = api_key
+        self.kind = kind
+        self.pool = pool or defaultPool()
+
+    def _headers(self):
+        headers = {"User-Agent": "SliceAndJoinGcode"}
+        if self.api_key:
+            headers["X-Api-Key"] = self.api_key
+        if self.parts.username:
+            login = "%s:%s" % (
+                urllib.parse.unquote(self.parts.username),
+                urllib.parse.unquote(self.parts.password or ""),
+            )
+            token = base64.b64encode(login.encode("utf-8")).decode("ascii")
+            headers["Authorization"] = "Basic " + token
+        return headers
+
+    def request(self, method, path):
+        """Kratka zahteva brez telesa → (status, besedilo odgovora)."""
+        connection = self.pool.acquire(self.parts)
+        try:
+            connection.request(method, self.base_path + path, headers=self._headers())
+            response = connection.getresponse()
+            text = response.read().decode("utf-8", "replace")
+        except BaseException:
+            connection.close()
+            raise
+        self.pool.release(self.parts, connection, not response.will_close)
+        return response.status, text
+
+    def detect(self):
+        """OCTOPRINT ali MOONRAKER (poizvedba samo, ko kind = AUTO)."""
+        if self.kind != AUTO:
+            return self.kind
+        try:
+            if self.request("GET", "/server/info")[0] == 200:
+                self.kind = MOONRAKER
+                return self.kind
+            status, _ = self.request("GET", "/api/version")
+        except (OSError, http.client.HTTPException) as e:
+            raise UploadError("Print server not reachable: %s" % e) from e
+        if status == 200:
+            self.kind = OCTOPRINT
+            return self.kind
+        if status in (401, 403):
+            raise UploadError("Print server refused the API key (HTTP %d)" % status)
+        raise UploadError("Not an OctoPrint or Moonraker server (HTTP %d)" % status)
+
+    def upload(
+        self,
+        filename,
+        pieces,
+        kind=PLAIN,
+        metadata=None,
+        start=False,
+        progress=None,
+        total=0,
+        cancelled=None,
+    ):
+        """Pošlje kose kot datoteko filename; vrne slovar (bytes, status ...)."""
+        server = self.detect()
+        path, fields = _UPLOAD[server]
+        boundary = "SliceAndJoin" + uuid.uuid4().hex
+        headers = self._headers()
+        headers["Content-Type"] = "multipart/form-data; boundary=" + boundary
+        headers["Transfer-Encoding"] = "chunked"
+
+        def report(written, total):
+            if cancelled is not None and cancelled():
+                raise UploadCancelled(filename)
+            if progress is not None:
+                progress(written, total)
+
+        connection = self.pool.acquire(self.parts)
+        try:
+            connection.putrequest("POST", self.base_path + path)
+            for name, value in headers.items():
+                connection.putheader(name, value)
+            connection.endheaders()
+
+            body = _ChunkedBody(connection)
+            body.write(_filePart(boundary, filename))
+            stream = io.BufferedWriter(body, CHUNK_SIZE)
+            with openWriter(stream, kind, metadata) as f:
+                writePieces(f, pieces, report, total)
+            if not stream.closed:
+                stream.flush()  # gzip ne zapre toka, ki ga ni odprl
+            body.write(_fieldParts(boundary, fields(start)))
+            body.finish()
+
+            response = connection.getresponse()
+            text = response.read().decode("utf-8", "replace")
+        except BaseException:
+            # nedokončana zahteva: povezava ni več uporabna
+            connection.close()
+            raise
+        self.pool.release(self.parts, connection, not response.will_close)
+
+        if response.status not in (200, 201):
+            raise UploadError(
+                "Upload failed (HTTP %d): %s" % (response.status, text.strip()[:200])
+            )
+        try:
+            reply = json.loads(text)
+        except ValueError:
+            reply = text
+        return dict(
+            server=server,
+            filename=filename,
+            bytes=body.sent,
+            status=response.status,
+            reply=reply,
+        )
+
+
+def _filePart(boundary, filename):
+    name = filename.replace('"', "_").replace("\r", "").replace("\n", "")
+    return (
+        "--%s\r\n"
+        'Content-Disposition: form-data; name="file"; filename="%s"\r\n'
+        "Content-Type: application/octet-stream\r\n\r\n" % (boundary, name)
+    ).encode("utf-8")
+
+
+def _fieldParts(boundary, fields):
+    parts = [
+        '\r\n--%s\r\nContent-Disposition: form-data; name="%s"\r\n\r\n%s'
+        % (boundary, name, value)
+        for name, value in fields.items()
+    ]
+    return ("".join(parts) + "\r\n--%s--\r\n" % boundary).encode("utf-8")
+
+
+def uploadName(name, kind):
+    """Ime datoteke na strežniku s končnico formata."""
+    extension = next(ext for entry_kind, _, ext in FORMATS if entry_kind == kind)
+    name = os.path.basename(name)
+    return name if name.lower().endswith(extension) else name + extension
+
+
+def main(argv):
+    if len(argv) < 3:
+        print("usage: PrintServerUpload.py URL file.gcode [api_key]")
+        return 2
+    server = PrintServer(argv[1], argv[3] if len(argv) > 3 else "")
+    path = argv[2]
+
+    def chunks():
+        with open(path, encoding="utf-8") as f:
+            for block in iter(lambda: f.read(1 << 20), ""):
+                yield block
+
+    result = server.upload(uploadName(path, PLAIN), chunks())
+    print("%s: %d bytes → %s" % (result["server"], result["bytes"], result["reply"]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
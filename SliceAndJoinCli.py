@@ -0,0 +1,370 @@
+# ===================================================================
+# Opis: Paketna obdelava brez Cure (ukazna vrstica).
+#  - Opravilo = par G-code (slice #1 Outside → Inside + slice #2
+#    Inside → Outside) ali STL + CuraEngine + nastavitve
+#  - Vir: mapa (ime.first.gcode + ime.rest.gcode ali ime.stl)
+#    ali manifest .json
+#  - Opravila tečejo v ProcessPoolExecutor (--jobs), vsak CuraEngine
+#    z omejitvijo niti (--engine-threads)
+#  - Združitev = GcodeMerge.mergePasses kot v pluginu: razrez na
+#    ;LAYER:n → stik (--seam-check) → niz pravil (--rules) → glava
+#    (GcodeStats, če je na voljo numpy)
+#  - Izhod: ime.gcode (ali .gcode.gz / .bgcode, --format) v --output,
+#    zapisan atomarno (saveAtomically) + summary.json (časi, napake)
+#  - Brez Qt in Cure
+#
+#  python SliceAndJoinCli.py mapa_ali_manifest.json -o izhod [-j 4]
+#  python SliceAndJoinCli.py modeli/ -o izhod --engine CuraEngine
+#      --settings nastavitve.json
+# ===================================================================
+
+import argparse
+import concurrent.futures
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    from .CuraEngineCli import (
+        buildCommand,
+        expandGcodeTokens,
+        headerFromEngineLog,
+        replaceHeader,
+        writeSettingsJson,
+    )
+    from .GcodeEngine import iterFileChunks
+    from .GcodeMerge import mergePasses
+    from .GcodeRewrite import RewriteRules, RuleError, loadRuleSets
+    from .GcodeStats import DEFAULT_ACCELERATION
+    from .GcodeWriters import FORMATS, curaMetadata, saveAtomically
+except ImportError:  # samostojna uporaba brez paketa
+    from CuraEngineCli import (
+        buildCommand,
+        expandGcodeTokens,
+        headerFromEngineLog,
+        replaceHeader,
+        writeSettingsJson,
+    )
+    from GcodeEngine import iterFileChunks
+    from GcodeMerge import mergePasses
+    from GcodeRewrite import RewriteRules, RuleError, loadRuleSets
+    from GcodeStats import DEFAULT_ACCELERATION
+    from GcodeWriters import FORMATS, curaMetadata, saveAtomically
+
+FIRST_SUFFIX = ".first.gcode"
+REST_SUFFIX = ".rest.gcode"
+PASSES = ("outside_in", "inside_out")
+SUMMARY_NAME = "summary.json"
+SAVE_SEGMENT = 1 << 22
+
+
+# -------------------------------------------------------------
+# Opravila: {"name", "first", "rest"} ali {"name", "models",
+# "settings"}; poti so absolutne
+# -------------------------------------------------------------
+def findJobs(source, settings=None):
+    if os.path.isdir(source):
+        return _directoryJobs(source, settings)
+    return _manifestJobs(source, settings)
+
+
+def _directoryJobs(directory, settings):
+    jobs = []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if name.endswith(FIRST_SUFFIX):
+            base = name[: -len(FIRST_SUFFIX)]
+            rest = os.path.join(directory, base + REST_SUFFIX)
+            if os.path.exists(rest):
+                jobs.append({"name": base, "first": path, "rest": rest})
+            else:
+                print("Skipped %s: %s is missing" % (name, base + REST_SUFFIX))
+        elif name.lower().endswith(".stl"):
+            jobs.append({"name": name[:-4], "models": [path], "settings": settings})
+    return jobs
+
+
+def _manifestJobs(path, settings):
+    """{"settings": "...", "jobs": [{"name": ..., "first"/"rest" ali "models"}]}"""
+    with open(path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    directory = os.path.dirname(os.path.abspath(path))
+
+    def resolve(value):
+        return value if value is None else os.path.join(directory, value)
+
+    default_settings = resolve(manifest.get("settings")) or settings
+    jobs = []
+    for number, entry in enumerate(manifest.get("jobs", [])):
+        job = {"name": entry.get("name", "job%d" % number)}
+        if "models" in entry:
+            job["models"] = [resolve(model) for model in entry["models"]]
+            job["settings"] = resolve(entry.get("settings")) or default_settings
+        else:
+            job["first"] = resolve(entry["first"])
+            job["rest"] = resolve(entry["rest"])
+        jobs.append(job)
+    return jobs
+
+
+# -------------------------------------------------------------
+# Eno opravilo (v procesu iz poola) – vrne vnos za summary.json
+# -------------------------------------------------------------
+def runJob(job, options):
+    started = time.perf_counter()
+    result = {"name": job["name"], "ok": False, "seconds": {}}
+    seconds = result["seconds"]
+    work_dir = None
+    try:
+        acceleration = options["acceleration"]
+        if "models" in job:
+            work_dir = tempfile.mkdtemp(prefix="slice_and_join_")
+            chunk_lists, acceleration = _sliceModels(job, options, work_dir)
+            seconds["slice"] = round(time.perf_counter() - started, 3)
+            first, rest = chunk_lists
+        else:
+            first = iterFileChunks(job["first"])
+            rest = iterFileChunks(job["rest"])
+
+        merging = time.perf_counter()
+        rules = options["rules"]
+        document, _, merged = mergePasses(
+            first,
+            rest,
+            seam_check=options["seam_check"],
+            rules=None if rules is None else RewriteRules.fromDicts(rules),
+            recompute_header=options["recompute_header"],
+            acceleration=acceleration,
+            layer=options["layer"],
+        )
+        first = rest = None
+        seconds["merge"] = round(time.perf_counter() - merging, 3)
+        result["seam"] = [str(issue) for issue in merged["seam"]]
+        if merged["rewrite"] is not None:
+            result["rewrite"] = merged["rewrite"]
+        if merged["header_error"]:
+            result["header_error"] = merged["header_error"]
+
+        writing = time.perf_counter()
+        kind = options["format"]
+        extension = next(ext for name, _, ext in FORMATS if name == kind)
+        output = os.path.join(options["output"], job["name"] + extension)
+        size = saveAtomically(
+            output,
+            (text for _, text in document.iterSegments(SAVE_SEGMENT)),
+            kind,
+            curaMetadata(document.textRange(0, 1 << 16)),
+            total=document.size(),
+        )
+        seconds["write"] = round(time.perf_counter() - writing, 3)
+
+        result.update(ok=True, output=output, bytes=size)
+    except Exception as e:
+        result["error"] = "%s: %s" % (type(e).__name__, e)
+    finally:
+        if work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    seconds["total"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+# -------------------------------------------------------------
+# STL + nastavitve → oba prehoda hkrati v dveh procesih CuraEngine
+# nastavitve.json: {"global": {...}, "extruders": [{...}, ...]}
+# -------------------------------------------------------------
+def _sliceModels(job, options, work_dir):
+    if not job.get("settings"):
+        raise RuntimeError("STL job without --settings")
+    with open(job["settings"], encoding="utf-8") as f:
+        settings = json.load(f)
+    global_settings = {k: str(v) for k, v in settings["global"].items()}
+    extruder_settings = [
+        {k: str(v) for k, v in extruder.items()}
+        for extruder in settings.get("extruders") or [{}]
+    ]
+    for extruder_nr, extruder in enumerate(extruder_settings):
+        extruder.setdefault("extruder_nr", str(extruder_nr))
+
+    initial_extruder = int(global_settings.get("initial_extruder_nr", 0))
+    for settings_dict in [global_settings] + extruder_settings:
+        for key in (
+            "machine_start_gcode",
+            "machine_end_gcode",
+            "machine_extruder_start_code",
+            "machine_extruder_end_code",
+        ):
+            if key in settings_dict:
+                settings_dict[key] = expandGcodeTokens(
+                    settings_dict[key],
+                    global_settings,
+                    extruder_settings,
+                    initial_extruder,
+                )
+
+    models = [(path, 0, {}) for path in job["models"]]
+    processes = []
+    for index, inset_direction in enumerate(PASSES):
+        override = {"inset_direction": inset_direction}
+        global_json = os.path.join(work_dir, "pass%d_global.def.json" % index)
+        writeSettingsJson(global_json, dict(global_settings, **override))
+        extruder_jsons = []
+        for extruder_nr, extruder in enumerate(extruder_settings):
+            path = os.path.join(work_dir, "pass%d_e%d.def.json" % (index, extruder_nr))
+            writeSettingsJson(path, dict(extruder, **override))
+            extruder_jsons.append(path)
+
+        output = os.path.join(work_dir, "pass%d.gcode" % index)
+        command = buildCommand(
+            options["engine"],
+            global_json,
+            extruder_jsons,
+            models,
+            output,
+            options["engine_threads"],
+        )
+        log = open(os.path.join(work_dir, "pass%d.log" % index), "w+b")
+        process = subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT)
+        processes.append((process, log, output))
+
+    chunk_lists = []
+    try:
+        for process, log, output in processes:
+            exit_code = process.wait(timeout=options["timeout"])
+            log.seek(0)
+            text = log.read().decode("utf-8", "replace")
+            if exit_code != 0:
+                tail = "\n".join(text.strip().splitlines()[-5:])
+                raise RuntimeError(
+                    "CuraEngine failed (exit code %d): %s" % (exit_code, tail)
+                )
+            chunks = list(iterFileChunks(output))
+            replaceHeader(chunks, headerFromEngineLog(text))
+            chunk_lists.append(chunks)
+    finally:
+        for process, log, _ in processes:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            log.close()
+
+    acceleration = float(global_settings.get("machine_acceleration", 0)) or (
+        options["acceleration"]
+    )
+    return chunk_lists, acceleration
+
+
+# -------------------------------------------------------------
+# Vsa opravila v poolu procesov + summary.json
+# -------------------------------------------------------------
+def runJobs(jobs, options, workers):
+    started = time.perf_counter()
+    results = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(runJob, job, options): job for job in jobs}
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:  # npr. proces poola se je sesul
+                job = futures[future]
+                result = {"name": job["name"], "ok": False, "error": str(e)}
+            results.append(result)
+            status = "ok" if result["ok"] else "FAILED " + result["error"]
+            print("[%d/%d] %s: %s" % (len(results), len(jobs), result["name"], status))
+
+    order = {job["name"]: number for number, job in enumerate(jobs)}
+    results.sort(key=lambda result: order.get(result["name"], 0))
+    return {
+        "jobs": results,
+        "succeeded": sum(1 for result in results if result["ok"]),
+        "failed": sum(1 for result in results if not result["ok"]),
+        "workers": workers,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+# -------------------------------------------------------------
+# Niz pravil iz datoteke (seznam slovarjev – gre v procese poola)
+# -------------------------------------------------------------
+def _ruleSet(path, name):
+    if not path:
+        return None
+    rule_sets = loadRuleSets(path)
+    if not rule_sets:
+        raise RuleError("no rule sets in %s" % path)
+    if name is None and len(rule_sets) == 1:
+        name = next(iter(rule_sets))
+    if name not in rule_sets:
+        raise RuleError("choose --rule-set from: %s" % ", ".join(sorted(rule_sets)))
+    RewriteRules.fromDicts(rule_sets[name])  # napaka pravila pred zagonom
+    return rule_sets[name]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Merge first layer Outside-In with the rest Inside-Out."
+    )
+    parser.add_argument("sources", nargs="+", help="directory or manifest .json")
+    parser.add_argument("-o", "--output", required=True, help="output directory")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--engine", help="CuraEngine executable (for STL jobs)")
+    parser.add_argument("--settings", help="settings .json (for STL jobs)")
+    parser.add_argument("--engine-threads", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=900.0)
+    parser.add_argument("--layer", type=int, default=1)
+    parser.add_argument("--acceleration", type=float, default=DEFAULT_ACCELERATION)
+    parser.add_argument("--keep-header", action="store_true")
+    parser.add_argument("--seam-check", choices=("fix", "check", "off"), default="fix")
+    parser.add_argument("--rules", help="rule sets .json (rewrite_rules.json)")
+    parser.add_argument("--rule-set", help="rule set name (default: the only one)")
+    parser.add_argument(
+        "--format", choices=[name for name, _, _ in FORMATS], default=FORMATS[0][0]
+    )
+    args = parser.parse_args(argv)
+
+    jobs = []
+    for source in args.sources:
+        jobs += findJobs(source, args.settings and os.path.abspath(args.settings))
+    if not jobs:
+        print("No jobs found.")
+        return 1
+    if any("models" in job for job in jobs) and not args.engine:
+        print("STL jobs need --engine.")
+        return 1
+
+    try:
+        rules = _ruleSet(args.rules, args.rule_set)
+    except RuleError as e:
+        print("Rules not loaded:", e)
+        return 1
+
+    os.makedirs(args.output, exist_ok=True)
+    options = {
+        "output": os.path.abspath(args.output),
+        "engine": args.engine,
+        "engine_threads": args.engine_threads,
+        "timeout": args.timeout,
+        "layer": args.layer,
+        "acceleration": args.acceleration,
+        "recompute_header": not args.keep_header,
+        "seam_check": args.seam_check,
+        "rules": rules,
+        "format": args.format,
+    }
+    summary = runJobs(jobs, options, max(1, min(args.jobs, len(jobs))))
+
+    summary_path = os.path.join(args.output, SUMMARY_NAME)
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    print(
+        "%d ok, %d failed in %.1f s – %s"
+        % (summary["succeeded"], summary["failed"], summary["seconds"], summary_path)
+    )
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,606 +1,1686 @@
-# ===================================================================
-# Verzija: 51
-# Datum: 12.01.2026
-# Opis: Plugin SliceAndJoinGcode pripravo G-code tako, da se
-# prvi layser tiska na način Outside → Inside, ostali pa layerji
-# pa na način Inside → Outside. Postopek izdelave take G-code:
-#  - Če model na postelji ne obstaja, ne naredi nič
-#  - Nastavi Wall Orderning na Outside → Inside
-#  - Slice #1: Outside → Inside (shrani prvi layer)
-#  - Nastavi Wall Orderning na Inside → Outside
-#  - Slice #2: Inside → Outside (shrani drugi in ostale layerje)
-#  - Združi G-code #1 + #2
-#  - Prikaže zdrženo G-code v oknu.
-#  - V oknu mogoči: Search, Replace ter Save G-code.
-#  - Search & Replace = case-insensitive
-#  - Temna tema, barvanje G-code
-#  - Cura 5.11.x kompatibilno
-#  - Ime datoteke z G-code = 6 črk imena tikalnika in ime modela
-# ===================================================================
-
-from PyQt6.QtWidgets import (
-    QMessageBox,
-    QApplication,
-    QDialog,
-    QVBoxLayout,
-    QPlainTextEdit,
-    QPushButton,
-    QFileDialog,
-    QHBoxLayout,
-    QLabel,
-    QLineEdit,
-)
-from PyQt6.QtCore import QTimer, Qt
-from PyQt6.QtGui import QSyntaxHighlighter, QTextCharFormat, QColor, QTextCursor
-from UM.Extension import Extension
-from cura.CuraApplication import CuraApplication
-import re
-
-
-def getMetaData():
-    return {}
-
-
-def register(app):
-    return {"extension": SliceAndJoinGcode()}
-
-
-# -------------------------------------------------------------
-# Napredni syntax highlighter za G-code (barve po vrstah)
-# -------------------------------------------------------------
-class GcodeHighlighter(QSyntaxHighlighter):
-    def __init__(self, parent):
-        super().__init__(parent)
-
-        # ====== BARVE PO TOKENIH ======
-        self.token_formats = {
-            "G": self._fmt("#F42828"),  # G ukazi
-            "M": self._fmt("#A62CF7"),  # M ukazi
-            "X": self._fmt("#00AB72"),  # koordinate
-            "Y": self._fmt("#E2D700"),
-            "Z": self._fmt("#08EFFF"),
-            "E": self._fmt("#FF00F2"),  # ekstruder
-            "F": self._fmt("#FFA303"),  # feedrate
-            "S": self._fmt("#FF830F"),  # temperature
-        }
-
-        self.comment_format = self._fmt("#3F9CFF")
-        self.layer_format = self._fmt("#929292")
-
-        # ====== ROBUSTEN TOKEN REGEX ======
-        self.token_regex = re.compile(r"([GMXYZESF])([-+]?(?:\d+\.?\d*|\.\d+))")
-
-    def _fmt(self, color):
-        fmt = QTextCharFormat()
-        fmt.setForeground(QColor(color))
-        return fmt
-
-    def highlightBlock(self, text):
-        # --------------------------------------------------
-        # KOMENTAR
-        # --------------------------------------------------
-        comment_start = text.find(";")
-        if comment_start != -1:
-            self.setFormat(
-                comment_start, len(text) - comment_start, self.comment_format
-            )
-
-            # ;LAYER:x
-            layer_match = re.search(r";LAYER:\d+", text)
-            if layer_match:
-                self.setFormat(
-                    layer_match.start(), len(layer_match.group()), self.layer_format
-                )
-
-            code_part = text[:comment_start]
-        else:
-            code_part = text
-
-        # --------------------------------------------------
-        # TOKENI (EN FORMAT NA CELOTEN SKLOP)
-        # --------------------------------------------------
-        for match in self.token_regex.finditer(code_part):
-            letter = match.group(1)
-            fmt = self.token_formats.get(letter)
-            if fmt:
-                self.setFormat(match.start(), len(match.group()), fmt)
-
-
-# -------------------------------------------------------------
-# Glavna razširitev
-# -------------------------------------------------------------
-class SliceAndJoinGcode(Extension):
-
-    VERSION = "51"
-    DATE = "13.01.2026"
-
-    def __init__(self):
-        super().__init__()
-        self.setMenuName("Slice First Layer Outside-In")
-        self.addMenuItem("Run", self.startProcess)
-
-        self._original_inset_direction = "inside_out"
-        self._original_auto_slice = None
-        self._phase = 0
-
-        self._gcode_first_layer = []
-        self._gcode_rest = []
-        self._final_gcode = ""
-        self._last_search_pos = 0  # za funkcijo search
-
-    # ---------------------------------------------------------
-    # Glavni vstop
-    # ---------------------------------------------------------
-    def startProcess(self):
-        self._disableAutoSlice()
-
-        if not self._hasModelsOnBed():
-            self._restoreAutoSlice()
-            return
-
-        self._saveOriginalInsetDirection()
-        self._phase = 1
-        QTimer.singleShot(0, self._sliceOutsideIn)
-
-    # ---------------------------------------------------------
-    # Auto Slice OFF
-    # ---------------------------------------------------------
-    def _disableAutoSlice(self):
-        prefs = CuraApplication.getInstance().getPreferences()
-        try:
-            self._original_auto_slice = prefs.getValue("general/auto_slice")
-            if self._original_auto_slice:
-                prefs.setValue("general/auto_slice", False)
-        except Exception as e:
-            print("AutoSlice error:", e)
-
-    # ---------------------------------------------------------
-    # Auto Slice RESTORE
-    # ---------------------------------------------------------
-    def _restoreAutoSlice(self):
-        if self._original_auto_slice:
-            CuraApplication.getInstance().getPreferences().setValue(
-                "general/auto_slice", True
-            )
-
-    # ---------------------------------------------------------
-    # Shrani originalno nastavitev
-    # ---------------------------------------------------------
-    def _saveOriginalInsetDirection(self):
-        app = CuraApplication.getInstance()
-        try:
-            stack = app.getGlobalContainerStack()
-            if stack and stack.userChanges:
-                val = stack.userChanges.getProperty("inset_direction", "value")
-                if val:
-                    self._original_inset_direction = val
-        except:
-            self._original_inset_direction = "inside_out"
-
-    # ---------------------------------------------------------
-    # Slice 1 – Outside → Inside
-    # ---------------------------------------------------------
-    def _sliceOutsideIn(self):
-        self._setInsetDirection("outside_in")
-        QTimer.singleShot(100, self._executeSlice)
-
-    # ---------------------------------------------------------
-    # Slice 2 – Inside → Outside
-    # ---------------------------------------------------------
-    def _sliceInsideOut(self):
-        self._setInsetDirection("inside_out")
-        QTimer.singleShot(100, self._executeSlice)
-
-    # ---------------------------------------------------------
-    # Nastavitev wall ordering
-    # ---------------------------------------------------------
-    def _setInsetDirection(self, value):
-        app = CuraApplication.getInstance()
-        try:
-            stack = app.getGlobalContainerStack()
-            if stack and stack.userChanges:
-                stack.userChanges.setProperty("inset_direction", "value", value)
-                app.globalContainerStackChanged.emit()
-                QApplication.processEvents()
-        except Exception as e:
-            print(e)
-
-    # ---------------------------------------------------------
-    # Slice
-    # ---------------------------------------------------------
-    def _executeSlice(self):
-        app = CuraApplication.getInstance()
-        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
-        app.getBackend().slice()
-        QTimer.singleShot(300, self._waitForSlice)
-
-    # ---------------------------------------------------------
-    # Čakanje na CuraEngine
-    # ---------------------------------------------------------
-    def _waitForSlice(self):
-        backend = CuraApplication.getInstance().getBackend()
-        try:
-            if backend._process and backend._process.poll() is None:
-                QTimer.singleShot(500, self._waitForSlice)
-                return
-        except:
-            pass
-
-        QApplication.restoreOverrideCursor()
-        self._processSliceResult()
-
-    # ---------------------------------------------------------
-    # Obdelava rezultata slica
-    # ---------------------------------------------------------
-    def _processSliceResult(self):
-        app = CuraApplication.getInstance()
-        scene = app.getController().getScene()
-        plate = app.getMultiBuildPlateModel().activeBuildPlate
-
-        if not hasattr(scene, "gcode_dict") or plate not in scene.gcode_dict:
-            QMessageBox.critical(None, "Error", "G-code not exists")
-            self._restoreOriginalInsetDirection()
-            self._restoreAutoSlice()
-            return
-
-        lines = scene.gcode_dict[plate]
-
-        if self._phase == 1:
-            self._extractFirstLayer(lines)
-            self._phase = 2
-            QTimer.singleShot(0, self._sliceInsideOut)
-
-        elif self._phase == 2:
-            self._extractRestLayers(lines)
-            self._mergeGcode()
-            self._restoreOriginalInsetDirection()
-            self._showFinalDialog()
-
-    # ---------------------------------------------------------
-    # Izlušči prvi layer (do ;LAYER:1)
-    # ---------------------------------------------------------
-    def _extractFirstLayer(self, lines):
-        result = []
-        for line in lines:
-            if line.startswith(";LAYER:1"):
-                break
-            result.append(line)
-        self._gcode_first_layer = result
-
-    # ---------------------------------------------------------
-    # Izlušči layerje od ;LAYER:1 dalje
-    # ---------------------------------------------------------
-    def _extractRestLayers(self, lines):
-        start = False
-        result = []
-        for line in lines:
-            if line.startswith(";LAYER:1"):
-                start = True
-            if start:
-                result.append(line)
-        self._gcode_rest = result
-
-    # ---------------------------------------------------------
-    # Združi G-code
-    # ---------------------------------------------------------
-    def _mergeGcode(self):
-        merged = []
-        merged.extend(self._gcode_first_layer)
-        merged.extend(self._gcode_rest)
-        self._final_gcode = "\n".join(merged)
-
-    # ---------------------------------------------------------
-    # Dialog + Save g-code + Search & Replace + temna tema
-    # ---------------------------------------------------------
-    def _showFinalDialog(self):
-        dialog = QDialog()
-        dialog.setWindowTitle(
-            f" G-CODE – First layer Outside-In    (v. {self.VERSION} – {self.DATE})  -  (c) Julijan Zavernik"
-        )
-        dialog.setWindowFlag(Qt.WindowType.WindowContextHelpButtonHint, False)
-        dialog.setModal(True)
-        dialog.setWindowModality(Qt.WindowModality.ApplicationModal)
-
-        # prepreč ESC
-        def ignoreEsc(event):
-            if event.key() != Qt.Key.Key_Escape:
-                QDialog.keyPressEvent(dialog, event)
-
-        dialog.keyPressEvent = ignoreEsc
-
-        # temna tema za celoten dialog
-        dialog.setStyleSheet(
-            """
-            QDialog { background-color: #1e1e1e; }
-            QLabel { color: #FFFFFF; font-size: 10pt; }
-            QPushButton { background-color: #0078d7; color: #FFFFFF; font-size: 10pt; min-height: 21px; }
-            QLineEdit { background-color: #333333; color: #FFFFFF; border: 1px solid #555555; font-size: 10pt}
-        """
-        )
-
-        layout = QVBoxLayout(dialog)
-
-        # G-code editor - začni s "loading" sporočilom
-        edit = QPlainTextEdit()
-        edit.setPlainText(
-            "⏳ PLEASE WAIT...\n\nLoading G-code...\n\nThis may take a moment for large models."
-        )
-        edit.setReadOnly(True)
-        edit.setStyleSheet(
-            """
-            QPlainTextEdit {
-                background-color: #1e1e1e;
-                color: #d4d4d4;
-                font-family: Consolas, monospace;
-                font-size: 11pt;
-            }
-        """
-        )
-        layout.addWidget(edit)
-
-        # Syntax highlighter
-        self.highlighter = GcodeHighlighter(edit.document())
-
-        # Search panel (onemogoči na začetku)
-        search_layout = QHBoxLayout()
-        search_layout.setContentsMargins(10, 0, 10, 0)
-        search_label = QLabel("Search:")
-        search_label.setFixedWidth(60)
-        self.search_input = QLineEdit()
-        self.search_input.setDisabled(True)  # Onemogoči na začetku
-        search_btn = QPushButton("Search")
-        search_btn.setDisabled(True)  # Onemogoči na začetku
-        search_btn.setFixedWidth(100)
-        search_btn.clicked.connect(lambda: self._searchGcode(edit))
-        search_layout.addWidget(search_label)
-        search_layout.addWidget(self.search_input)
-        search_layout.addWidget(search_btn)
-        layout.addLayout(search_layout)
-
-        # Replace panel (onemogoči na začetku)
-        replace_layout = QHBoxLayout()
-        replace_layout.setContentsMargins(10, 0, 10, 0)
-        replace_label = QLabel("Replace:")
-        replace_label.setFixedWidth(60)
-        self.replace_input = QLineEdit()
-        self.replace_input.setDisabled(True)  # Onemogoči na začetku
-        replace_btn = QPushButton("Replace")
-        replace_btn.setDisabled(True)  # Onemogoči na začetku
-        replace_btn.setFixedWidth(100)
-        replace_btn.clicked.connect(lambda: self._searchAndReplaceGcode(edit))
-        replace_layout.addWidget(replace_label)
-        replace_layout.addWidget(self.replace_input)
-        replace_layout.addWidget(replace_btn)
-        layout.addLayout(replace_layout)
-
-        # Gumbi Information | Save | Close desno (onemogoči na začetku)
-        info_btn = QPushButton(" Information ")
-        info_btn.setDisabled(True)  # Onemogoči na začetku
-
-        save_btn = QPushButton(" Save G-code ")
-        save_btn.setDisabled(True)  # Onemogoči na začetku
-
-        close_btn = QPushButton("Close")
-        close_btn.setDisabled(True)  # Onemogoči na začetku
-
-        info_btn.clicked.connect(self._showInfo)
-        save_btn.clicked.connect(self._saveGcodeToFile)
-        close_btn.clicked.connect(dialog.accept)
-
-        button_layout = QHBoxLayout()
-        button_layout.setContentsMargins(10, 0, 10, 0)
-        button_layout.addStretch()
-        button_layout.addWidget(info_btn)
-        button_layout.addWidget(save_btn)
-        button_layout.addWidget(close_btn)
-        layout.addLayout(button_layout)
-
-        dialog.resize(900, 600)
-
-        # Ko se dialog zapre – obnovi Auto Slice
-        dialog.finished.connect(self._restoreAutoSlice)
-
-        # Prikaži dialog
-        dialog.show()
-
-        # Prisilno osveži UI
-        QApplication.processEvents()
-
-        # Funkcija, ki se pokliče ko je G-code pripravljen
-        def load_and_enable_gcode():
-            # 1. Naloži G-code (to lahko traja)
-            edit.setPlainText(self._final_gcode)
-
-            # 2. Spremeni cursor nazaj na normalen
-            QApplication.restoreOverrideCursor()
-
-            # 3. Omogoči vse widgete
-            self.search_input.setDisabled(False)
-            search_btn.setDisabled(False)
-            self.replace_input.setDisabled(False)
-            replace_btn.setDisabled(False)
-            info_btn.setDisabled(False)
-            save_btn.setDisabled(False)
-            close_btn.setDisabled(False)
-
-            # 4. Osveži UI
-            QApplication.processEvents()
-
-        # Po 100ms začni z nalaganjem
-        QTimer.singleShot(100, load_and_enable_gcode)
-
-        dialog.exec()
-
-    # ---------------------------------------------------------
-    # Funkcija Search (case-insensitive)
-    # ---------------------------------------------------------
-    def _searchGcode(self, edit_widget):
-        search_text = self.search_input.text()
-        if not search_text:
-            return
-
-        document = edit_widget.document()
-        cursor = QTextCursor(document)
-        cursor.setPosition(self._last_search_pos)
-        found = document.find(search_text, cursor)
-        if found.isNull():
-            cursor.setPosition(0)
-            found = document.find(search_text, cursor)
-            if found.isNull():
-                QMessageBox.information(None, "Search", "Text not found.")
-                return
-
-        edit_widget.setTextCursor(found)
-        edit_widget.setFocus()
-        self._last_search_pos = found.selectionEnd()
-
-    # ---------------------------------------------------------
-    # Funkcija Search & Replace (case-insensitive)
-    # ---------------------------------------------------------
-    def _searchAndReplaceGcode(self, edit_widget):
-        search = self.search_input.text()
-        replace = self.replace_input.text()
-        if search:
-            self._final_gcode = re.sub(
-                search, replace, self._final_gcode, flags=re.IGNORECASE
-            )
-            edit_widget.setPlainText(self._final_gcode)
-            self._last_search_pos = 0
-
-    # ---------------------------------------------------------
-    # Pridobitev imena aktivnega tiskalnika iz Cure
-    # ---------------------------------------------------------
-    def getActivePrinterNameSimple(self):
-        """Vrni prvih 6 znakov očiščenega imena tiskalnika."""
-        from cura.CuraApplication import CuraApplication
-        import re
-
-        app = CuraApplication.getInstance()
-
-        # Poskusi vse metode dokler ne najdeš imena
-        for method in [
-            lambda: app.getMachineManager().activeMachineName,
-            lambda: (
-                app.getMachineManager().activeMachine.name
-                if hasattr(app.getMachineManager().activeMachine, "name")
-                else None
-            ),
-            lambda: (
-                app.getGlobalContainerStack().definition.getName()
-                if app.getGlobalContainerStack()
-                and app.getGlobalContainerStack().definition
-                else None
-            ),
-            lambda: (
-                app.getGlobalContainerStack().getMetaDataEntry("name")
-                if app.getGlobalContainerStack()
-                else None
-            ),
-        ]:
-            try:
-                name = method()
-                if name:
-                    # Očisti, skrajšaj in vrni
-                    cleaned = re.sub(r'[<>:"/\\|?*]', "", str(name)).strip()
-                    short = cleaned[:6].upper()
-                    return short if short else "UNK"
-            except:
-                continue
-
-        return "UNK"
-
-    # ---------------------------------------------------------
-    # Information
-    # ---------------------------------------------------------
-    def _showInfo(self):
-        info_text = (
-            "Version: 50      Date: 13.01.2026\n\n"
-            "Description:\n"
-            "SliceAndJoinGcode plugin prepares G-code so that\n"
-            "the first layer is printed Outside → Inside, and all other layers\n"
-            "are printed Inside → Outside.\n\n"
-            "Procedure to create such G-code:\n"
-            "• If the model doesn't exist on the build plate, do nothing\n"
-            "• Set Wall Ordering to Outside → Inside\n"
-            "• Slice #1: Outside → Inside (save first layer)\n"
-            "• Set Wall Ordering to Inside → Outside\n"
-            "• Slice #2: Inside → Outside (save second and remaining layers)\n"
-            "• Merge G-code #1 + #2\n"
-            "• Display merged G-code in the window\n"
-            "• Available in window: Search, Replace, and Save G-code\n"
-            "• Search & Replace = case-insensitive\n"
-            "• Dark theme, G-code syntax highlighting\n"
-            "• Cura 5.11.x compatible\n"
-            "• G-code filename = 6 letters from printer name + model name\n\n"
-            "Enjoy."
-        )
-
-        dialog = QDialog(None)
-        dialog.setWindowTitle("Information")
-
-        layout = QVBoxLayout()
-
-        label = QLabel(info_text)
-        label.setWordWrap(True)
-        layout.addWidget(label)
-
-        ok_button = QPushButton("OK")
-        ok_button.clicked.connect(dialog.accept)
-        layout.addWidget(ok_button, alignment=Qt.AlignmentFlag.AlignRight)
-
-        dialog.setLayout(layout)
-        dialog.exec()
-
-    # ---------------------------------------------------------
-    # Save file dialog
-    # ---------------------------------------------------------
-    def _saveGcodeToFile(self):
-
-        app = CuraApplication.getInstance()
-        scene = app.getController().getScene()
-        root = scene.getRoot()
-        nodes = [c for c in root.getChildren() if type(c).__name__ == "CuraSceneNode"]
-
-        # print("Ime prvega modela:", first_model_name)
-        if nodes:
-            first_model_name = nodes[0].getName()
-        # odstranim .stl
-        first_model_name = re.sub(
-            r"\.stl\s*$", "", first_model_name, flags=re.IGNORECASE
-        )
-        # Pridobi ime tiskalnika
-        printer_name = self.getActivePrinterNameSimple()
-        # priredim ime datoteke: 6 znakov imena printerja_ime prveega modela.code
-        default_filename = f"{printer_name}_{first_model_name}.gcode"
-
-        filename, _ = QFileDialog.getSaveFileName(
-            None, "Save G-code", default_filename, "G-code (*.gcode)"
-        )
-
-        if not filename:
-            return
-
-        try:
-            with open(filename, "w", encoding="utf-8") as f:
-                f.write(self._final_gcode)
-        except Exception as e:
-            QMessageBox.critical(None, "Error", str(e))
-
-    # ---------------------------------------------------------
-    # Preveri modele
-    # ---------------------------------------------------------
-    def _hasModelsOnBed(self):
-        app = CuraApplication.getInstance()
-        scene = app.getController().getScene()
-        root = scene.getRoot()
-        nodes = [c for c in root.getChildren() if type(c).__name__ == "CuraSceneNode"]
-        if not nodes:
-            QMessageBox.warning(None, "Error", "There is no model on the bed !")
-            return False
-        return True
-
-    # ---------------------------------------------------------
-    # Obnovi originalno nastavitev
-    # ---------------------------------------------------------
-    def _restoreOriginalInsetDirection(self):
-        self._setInsetDirection(self._original_inset_direction)
+# ===================================================================
+# Verzija: 51
+# Datum: 12.01.2026
+# Opis: Plugin SliceAndJoinGcode pripravo G-code tako, da se
+# prvi layser tiska na način Outside → Inside, ostali pa layerji
+# pa na način Inside → Outside. Postopek izdelave take G-code:
+#  - Če model na postelji ne obstaja, ne naredi nič
+#  - Nastavi Wall Orderning na Outside → Inside
+#  - Slice #1: Outside → Inside (shrani prvi layer)
+#  - Nastavi Wall Orderning na Inside → Outside
+#  - Slice #2: Inside → Outside (shrani drugi in ostale layerje)
+#  - Združi G-code #1 + #2
+#  - Prikaže zdrženo G-code v oknu.
+#  - V oknu mogoči: Search, Replace ter Save G-code.
+#  - Rules: shranjeni nizi pravil (GcodeRewrite) v enem prehodu, ob
+#    združitvi ali na trenutni verziji (Undo)
+#  - Search & Replace = case-insensitive
+#  - Temna tema, barvanje G-code
+#  - Cura 5.11.x kompatibilno
+#  - Ime datoteke z G-code = 6 črk imena tikalnika in ime modela
+#  - Meni registrira SliceAndJoinMenu; ta modul (s Qt prikazom in
+#    analizo) se uvozi šele ob prvi izbiri v meniju
+# ===================================================================
+
+from PyQt6.QtWidgets import (
+    QMessageBox,
+    QApplication,
+    QDialog,
+    QVBoxLayout,
+    QPushButton,
+    QFileDialog,
+    QHBoxLayout,
+    QLabel,
+    QLineEdit,
+    QCheckBox,
+    QProgressDialog,
+    QInputDialog,
+)
+from PyQt6.QtCore import Qt, QTimer
+import functools
+import json
+from UM.Logger import Logger
+from UM.Resources import Resources
+from UM.Scene.Iterator.DepthFirstIterator import DepthFirstIterator
+from cura.CuraApplication import CuraApplication
+import os
+import re
+import shutil
+import tempfile
+
+from .CuraEngineCli import (
+    buildCommand,
+    expandGcodeTokens,
+    writeBinaryStl,
+    writeSettingsJson,
+)
+from .GcodeDocument import DocumentHistory, GcodeDocument
+from .GcodeLayers import LayerIndex
+from .GcodeMerge import mergePasses
+from .GcodeRewrite import RewriteRules, RuleError, loadRuleSets
+from .GcodeStats import DEFAULT_ACCELERATION
+from .GcodeSearch import SearchIndex, compilePattern
+from .GcodeWriters import (
+    FORMATS,
+    GZIP,
+    PLAIN,
+    curaMetadata,
+    formatForPath,
+    iterDecoded,
+)
+from .GcodeViewer import (
+    GcodeHighlighter,
+    GcodeView,
+    LayerIndexThread,
+    LayerNavigator,
+    ReplaceThread,
+    SaveThread,
+    SearchThread,
+    UploadThread,
+)
+from .PhaseRecorder import PhaseRecorder
+from .PlateBatch import PlateBatch, PlateWriter
+from .PrintServerUpload import PrintServer, UploadError, uploadName
+from .SliceCache import SliceCache, chunksSize, fingerprint
+from .SlicePipeline import ParallelSlicePipeline, SlicePass, SlicePipeline
+
+
+# -------------------------------------------------------------
+# Jedro plugina (meni je v SliceAndJoinMenu)
+# -------------------------------------------------------------
+class SliceAndJoinGcode:
+
+    VERSION = "51"
+    DATE = "13.01.2026"
+
+    def __init__(self):
+        self._original_inset_direction = "inside_out"
+        self._original_auto_slice = None
+
+        prefs = CuraApplication.getInstance().getPreferences()
+        # Slice #1 ustavi takoj, ko CuraEngine pošlje ;LAYER:1; glava je
+        # potem iz slica #2, zato je privzeto izklopljeno (enak izhod)
+        prefs.addPreference("slice_and_join/first_layer_only", False)
+        # Združen G-code nad to velikostjo (MB) je v začasni datoteki
+        # (0 = vedno v RAM)
+        prefs.addPreference("slice_and_join/memory_budget_mb", 512)
+        # Meritve faz v runs.jsonl, cProfile sinhronih faz (.prof)
+        prefs.addPreference("slice_and_join/metrics_log", True)
+        prefs.addPreference("slice_and_join/profile", False)
+        # Največji čas enega slica v sekundah
+        prefs.addPreference("slice_and_join/slice_timeout", 900)
+        # Predpomnilnik rezultatov slicanja (MB, 0 = izklopljeno); obdrži
+        # oba slica po koncu, zato je privzeto izklopljen
+        prefs.addPreference("slice_and_join/cache_memory_mb", 0)
+        prefs.addPreference("slice_and_join/cache_disk_mb", 0)
+        # "sequential" = Curin backend, "parallel" = dva procesa CuraEngine
+        prefs.addPreference("slice_and_join/execution_mode", "sequential")
+        prefs.addPreference("slice_and_join/engine_threads", 0)
+        # Po združitvi preračunaj ;TIME, ;Filament used in obseg tiska
+        prefs.addPreference("slice_and_join/recompute_header", True)
+        # Zadnji format shranjevanja: "gcode", "gzip" ali "bgcode"
+        prefs.addPreference("slice_and_join/save_format", "gcode")
+        # Ob shranjevanju še datoteka .sha256 (preverjanje prenosa)
+        prefs.addPreference("slice_and_join/save_checksum", False)
+        # Stik ;LAYER:1: "fix" = popravi (Undo), "check" = samo javi, "off"
+        prefs.addPreference("slice_and_join/seam_check", "fix")
+        # Send to printer: OctoPrint / Moonraker ("auto" = zazna sam),
+        # gzip = pošlji .gcode.gz, start = začni tisk po prenosu
+        prefs.addPreference("slice_and_join/print_server_url", "")
+        prefs.addPreference("slice_and_join/print_server_api_key", "")
+        prefs.addPreference("slice_and_join/print_server_type", "auto")
+        prefs.addPreference("slice_and_join/print_server_gzip", False)
+        prefs.addPreference("slice_and_join/print_server_start", False)
+        # Niz pravil iz rewrite_rules.json, ki se uporabi ob vsaki
+        # združitvi ("" = brez)
+        prefs.addPreference("slice_and_join/rewrite_rules", "")
+
+        self._pipeline = None
+        self._plate_batch = None  # PlateBatch med zagonom vseh postelj
+        self._slice_cache = None
+        self._work_dir = None
+        self._inset_direction_changed = False
+        self._progress_dialog = None
+
+        self._document = None  # GcodeDocument (kosi obeh slicev)
+        self._history = None  # verzije dokumenta za Undo / Redo
+        self._layer_indexes = {}  # dokument → LayerIndex
+        self._layer_threads = set()  # LayerIndexThread, ki še tečejo
+        self._source_path = None  # odprta datoteka (None = združen G-code)
+        # za funkcijo search (indeks zadetkov gradi SearchThread)
+        self._search_index = None
+        self._search_thread = None
+        self._search_threads = set()  # SearchThread, ki še tečejo
+        self._search_current = -1
+        self._search_pending = None  # (view, backwards) dokler zadetka še ni
+        self._phases = None  # PhaseRecorder zadnjega zagona
+        self._save_thread = None  # SaveThread med shranjevanjem
+        self._replace_thread = None  # ReplaceThread med zamenjavo
+        self._seam = None  # (razlike, popravljeno) zadnje združitve
+        self._upload_thread = None  # UploadThread med pošiljanjem
+
+    # ---------------------------------------------------------
+    # Glavni vstop
+    # ---------------------------------------------------------
+    def startProcess(self):
+        self._disableAutoSlice()
+
+        if not self._hasModelsOnBed():
+            self._restoreAutoSlice()
+            return
+
+        self._saveOriginalInsetDirection()
+        self._source_path = None
+        self._seam = None
+        prefs = CuraApplication.getInstance().getPreferences()
+        self._phases = PhaseRecorder(
+            profile=bool(prefs.getValue("slice_and_join/profile")),
+            profile_dir=self._metricsDir(),
+        )
+        self._phases.begin("slice")
+        self._startPipeline()
+
+    # ---------------------------------------------------------
+    # Odpri obstoječ G-code (mmap, brez branja v RAM)
+    # ---------------------------------------------------------
+    def openGcode(self):
+        path, _ = QFileDialog.getOpenFileName(
+            None,
+            "Open G-code",
+            "",
+            "G-code (*.gcode *.gco *.g *.gcode.gz *.bgcode);;All files (*)",
+        )
+        if not path:
+            return
+
+        prefs = CuraApplication.getInstance().getPreferences()
+        self._phases = PhaseRecorder(
+            profile=bool(prefs.getValue("slice_and_join/profile")),
+            profile_dir=self._metricsDir(),
+        )
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        try:
+            with self._phases.phase("open", profile=True) as phase:
+                document = self._openDocument(path)
+                phase["bytes"] = document.size()
+                phase["lines"] = document.lineCount()
+                phase["pieces"] = document.pieceCount()
+        except (OSError, ValueError) as e:
+            self._phases.endAll()
+            QMessageBox.critical(None, "Error", f"Cannot open {path}:\n{e}")
+            return
+        finally:
+            QApplication.restoreOverrideCursor()
+
+        self._source_path = path
+        self._seam = None
+        self._document = document
+        self._history = DocumentHistory(document)
+        self._layer_indexes = {}
+        self._phases.begin("dialog")
+        self._showFinalDialog()
+
+    def _openDocument(self, path):
+        if formatForPath(path) == PLAIN:
+            return GcodeDocument.fromFile(path)
+        # .gcode.gz / .bgcode se ne da preslikati – besedilo v RAM
+        return GcodeDocument(iterDecoded(path))
+
+    # ---------------------------------------------------------
+    # Auto Slice OFF
+    # ---------------------------------------------------------
+    def _disableAutoSlice(self):
+        prefs = CuraApplication.getInstance().getPreferences()
+        try:
+            self._original_auto_slice = prefs.getValue("general/auto_slice")
+            if self._original_auto_slice:
+                prefs.setValue("general/auto_slice", False)
+        except Exception as e:
+            print("AutoSlice error:", e)
+
+    # ---------------------------------------------------------
+    # Auto Slice RESTORE
+    # ---------------------------------------------------------
+    def _restoreAutoSlice(self):
+        if self._original_auto_slice:
+            CuraApplication.getInstance().getPreferences().setValue(
+                "general/auto_slice", True
+            )
+
+    # ---------------------------------------------------------
+    # Shrani originalno nastavitev
+    # ---------------------------------------------------------
+    def _saveOriginalInsetDirection(self):
+        app = CuraApplication.getInstance()
+        try:
+            stack = app.getGlobalContainerStack()
+            if stack and stack.userChanges:
+                val = stack.userChanges.getProperty("inset_direction", "value")
+                if val:
+                    self._original_inset_direction = val
+        except:
+            self._original_inset_direction = "inside_out"
+
+    # ---------------------------------------------------------
+    # Nastavitev wall ordering
+    # ---------------------------------------------------------
+    def _setInsetDirection(self, value):
+        app = CuraApplication.getInstance()
+        try:
+            stack = app.getGlobalContainerStack()
+            if stack and stack.userChanges:
+                stack.userChanges.setProperty("inset_direction", "value", value)
+                app.globalContainerStackChanged.emit()
+                QApplication.processEvents()
+        except Exception as e:
+            print(e)
+
+    # ---------------------------------------------------------
+    # Slice #1 (Outside → Inside) + Slice #2 (Inside → Outside)
+    # ---------------------------------------------------------
+    def _startPipeline(self):
+        prefs = CuraApplication.getInstance().getPreferences()
+        slice_timeout = float(prefs.getValue("slice_and_join/slice_timeout"))
+        parallel = prefs.getValue("slice_and_join/execution_mode") == "parallel"
+
+        # vzporedno oba prehoda tečeta do konca – ustavitev na ;LAYER:1
+        # ne bi skrajšala skupnega časa
+        stop_at_layer = 1 if self._firstLayerOnly() and not parallel else None
+        passes = [
+            SlicePass("outside_in", stop_at_layer),
+            SlicePass("inside_out"),
+        ]
+        self._loadCachedPasses(passes)
+        self._inset_direction_changed = False
+
+        jobs = None
+        if parallel:
+            try:
+                self._work_dir = tempfile.mkdtemp(prefix="slice_and_join_")
+                jobs = self._prepareEngineJobs(passes, self._work_dir)
+            except Exception as e:
+                print("Parallel slicing not possible, using Cura backend:", e)
+                self._removeWorkDir()
+
+        if jobs is not None:
+            self._pipeline = ParallelSlicePipeline(
+                passes,
+                jobs,
+                self._onPipelineFinished,
+                self._onPipelineFailed,
+                self._onPipelineCancelled,
+                on_progress=self._onPipelineProgress,
+                slice_timeout=slice_timeout,
+            )
+        else:
+            self._pipeline = SlicePipeline(
+                passes,
+                self._applyPassSettings,
+                self._onPipelineFinished,
+                self._onPipelineFailed,
+                self._onPipelineCancelled,
+                on_progress=self._onPipelineProgress,
+                slice_timeout=slice_timeout,
+            )
+
+        self._progress_dialog = QProgressDialog(
+            "Slice #1: Outside → Inside", "Cancel", 0, 200
+        )
+        self._progress_dialog.setWindowTitle("Slice and Join G-code")
+        self._progress_dialog.setWindowModality(Qt.WindowModality.ApplicationModal)
+        self._progress_dialog.setMinimumDuration(0)
+        self._progress_dialog.canceled.connect(self._pipeline.cancel)
+        self._progress_dialog.show()
+
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        if not parallel:
+            self._phases.begin("slice 1")
+        self._pipeline.start()
+
+    def _onPipelineProgress(self, pass_index, amount):
+        if pass_index == 1 and self._phases.isOpen("slice 1"):
+            self._phases.end("slice 1")
+            self._phases.begin("slice 2")
+        if self._progress_dialog is None:
+            return
+        if pass_index == 1:
+            self._progress_dialog.setLabelText("Slice #2: Inside → Outside")
+        self._progress_dialog.setValue(int((pass_index + amount) * 100))
+
+    def _applyPassSettings(self, slice_pass):
+        self._inset_direction_changed = True
+        self._setInsetDirection(slice_pass.inset_direction)
+
+    def _closeProgressDialog(self):
+        self._removeWorkDir()
+        QApplication.restoreOverrideCursor()
+        if self._progress_dialog is not None:
+            self._progress_dialog.canceled.disconnect()
+            self._progress_dialog.close()
+            self._progress_dialog = None
+
+    def _onPipelineFinished(self, passes):
+        self._closeProgressDialog()
+        self._pipeline = None
+        for name in ("slice 1", "slice 2"):
+            self._phases.end(name)
+        sizes = {}
+        for number, slice_pass in enumerate(passes, 1):
+            sizes["pass%d_bytes" % number] = chunksSize(slice_pass.lines)
+            sizes["pass%d_cached" % number] = slice_pass.cached
+        self._phases.end("slice", **sizes)
+        self._storeCachedPasses(passes)
+
+        with self._phases.phase("merge", profile=True) as phase:
+            self._mergeGcode(*passes)
+            # dialog teče znotraj te funkcije – seznami prehodov se
+            # sprostijo že zdaj (ostanejo le v predpomnilniku)
+            for slice_pass in passes:
+                slice_pass.lines = None
+            phase.update(
+                bytes=self._document.size(),
+                lines=self._document.lineCount(),
+                pieces=self._document.pieceCount(),
+                layers=self._layerIndex().count(),
+            )
+
+        self._restoreOriginalInsetDirection()
+        self._phases.begin("dialog")
+        self._showFinalDialog()
+
+    def _onPipelineFailed(self, message):
+        self._closeProgressDialog()
+        self._pipeline = None
+        self._phases.endAll()
+        QMessageBox.critical(None, "Error", message)
+        self._restoreOriginalInsetDirection()
+        self._restoreAutoSlice()
+
+    def _onPipelineCancelled(self):
+        self._closeProgressDialog()
+        self._pipeline = None
+        self._phases.endAll()
+        self._restoreOriginalInsetDirection()
+        self._restoreAutoSlice()
+
+    # ---------------------------------------------------------
+    # Vzporedno slicanje: STL + nastavitve za dva procesa CuraEngine
+    # ---------------------------------------------------------
+    def _prepareEngineJobs(self, passes, work_dir, plate=None):
+        app = CuraApplication.getInstance()
+        prefs = app.getPreferences()
+        engine = prefs.getValue("backend/location")
+        if not engine or not os.path.exists(engine):
+            raise RuntimeError("CuraEngine executable not found: %s" % engine)
+
+        global_stack = app.getGlobalContainerStack()
+        global_settings = self._engineSettings(global_stack)
+        extruder_settings = []
+        for extruder in global_stack.extruderList:
+            settings = self._engineSettings(extruder)
+            settings["extruder_nr"] = str(extruder.getMetaDataEntry("position"))
+            extruder_settings.append(settings)
+
+        # start/end G-code: Cura jih razširi v StartSliceJob
+        initial_extruder = int(global_stack.getProperty("initial_extruder_nr", "value"))
+        gcode_keys = [
+            (global_settings, "machine_start_gcode"),
+            (global_settings, "machine_end_gcode"),
+        ]
+        for settings in extruder_settings:
+            gcode_keys.append((settings, "machine_extruder_start_code"))
+            gcode_keys.append((settings, "machine_extruder_end_code"))
+        for settings, key in gcode_keys:
+            if key in settings:
+                settings[key] = expandGcodeTokens(
+                    settings[key], global_settings, extruder_settings, initial_extruder
+                )
+
+        models = self._exportModels(work_dir, plate)
+        if not models:
+            raise RuntimeError("There is no model to slice.")
+
+        threads = int(prefs.getValue("slice_and_join/engine_threads"))
+        jobs = []
+        for index, slice_pass in enumerate(passes):
+            if slice_pass.lines is not None:
+                jobs.append(None)
+                continue
+
+            override = {"inset_direction": slice_pass.inset_direction}
+            global_json = os.path.join(work_dir, "pass%d_global.def.json" % index)
+            writeSettingsJson(global_json, dict(global_settings, **override))
+            extruder_jsons = []
+            for extruder_nr, settings in enumerate(extruder_settings):
+                name = "pass%d_e%d.def.json" % (index, extruder_nr)
+                path = os.path.join(work_dir, name)
+                writeSettingsJson(path, dict(settings, **override))
+                extruder_jsons.append(path)
+
+            output = os.path.join(work_dir, "pass%d.gcode" % index)
+            command = buildCommand(
+                engine, global_json, extruder_jsons, models, output, threads
+            )
+            jobs.append((command, output))
+        return jobs
+
+    def _engineSettings(self, stack):
+        return {key: str(stack.getProperty(key, "value")) for key in stack.getAllKeys()}
+
+    def _exportModels(self, work_dir, plate=None):
+        """Modeli postelje (privzeto aktivne) kot STL (kot v StartSliceJob)."""
+        import numpy
+
+        app = CuraApplication.getInstance()
+        if plate is None:
+            plate = app.getMultiBuildPlateModel().activeBuildPlate
+        models = []
+        for node in DepthFirstIterator(app.getController().getScene().getRoot()):
+            if not node.callDecoration("isSliceable") or node.isOutsideBuildArea():
+                continue
+            if node.callDecoration("getBuildPlateNumber") != plate:
+                continue
+            mesh_data = node.getMeshData()
+            if mesh_data is None:
+                continue
+
+            mesh = mesh_data.getTransformed(node.getWorldTransformation())
+            verts = mesh.getVertices()
+            if mesh.hasIndices():
+                verts = numpy.take(verts, mesh.getIndices().flatten(), axis=0)
+            else:
+                verts = numpy.array(verts)
+            # Y navzgor → Z navzgor
+            verts[:, [1, 2]] = verts[:, [2, 1]]
+            verts[:, 1] *= -1
+
+            path = os.path.join(work_dir, "model%d.stl" % len(models))
+            writeBinaryStl(path, verts)
+
+            extruder_nr = int(node.callDecoration("getActiveExtruderPosition") or 0)
+            mesh_settings = {}
+            node_stack = node.callDecoration("getStack")
+            if node_stack:
+                for key in node_stack.getTop().getAllKeys():
+                    mesh_settings[key] = str(node_stack.getProperty(key, "value"))
+            models.append((path, extruder_nr, mesh_settings))
+        return models
+
+    def _removeWorkDir(self):
+        if self._work_dir:
+            shutil.rmtree(self._work_dir, ignore_errors=True)
+            self._work_dir = None
+
+    # ---------------------------------------------------------
+    # Predpomnilnik rezultatov slicanja
+    # ---------------------------------------------------------
+    def _sliceCache(self):
+        prefs = CuraApplication.getInstance().getPreferences()
+        max_bytes = int(prefs.getValue("slice_and_join/cache_memory_mb")) << 20
+        max_disk_bytes = int(prefs.getValue("slice_and_join/cache_disk_mb")) << 20
+        if max_bytes <= 0 and max_disk_bytes <= 0:
+            self._slice_cache = None
+            return None
+
+        cache = self._slice_cache
+        if (
+            cache is None
+            or cache.max_bytes != max_bytes
+            or cache.max_disk_bytes != max_disk_bytes
+        ):
+            disk_dir = os.path.join(Resources.getCacheStoragePath(), "slice_and_join")
+            cache = SliceCache(max_bytes, disk_dir, max_disk_bytes)
+            self._slice_cache = cache
+        return cache
+
+    def _loadCachedPasses(self, passes, plate=None):
+        cache = self._sliceCache()
+        if cache is None:
+            return
+
+        base_key = self._sceneFingerprint(plate)
+        if base_key is None:
+            return
+
+        for slice_pass in passes:
+            slice_pass.cache_key = fingerprint(
+                [base_key, slice_pass.inset_direction, slice_pass.stop_at_layer]
+            )
+            entry = cache.get(slice_pass.cache_key)
+            if entry is not None:
+                slice_pass.lines, slice_pass.truncated = entry
+                slice_pass.cached = True
+
+    def _storeCachedPasses(self, passes):
+        cache = self._sliceCache()
+        if cache is None:
+            return
+        for slice_pass in passes:
+            if slice_pass.cache_key and not slice_pass.cached:
+                cache.put(slice_pass.cache_key, slice_pass.lines, slice_pass.truncated)
+
+    def _sceneFingerprint(self, plate=None):
+        """Prstni odtis modelov, transformacij in nastavitev (brez inset_direction)."""
+        app = CuraApplication.getInstance()
+        try:
+            if plate is None:
+                plate = app.getMultiBuildPlateModel().activeBuildPlate
+            parts = [app.getVersion(), plate]
+
+            for node in DepthFirstIterator(app.getController().getScene().getRoot()):
+                if not node.callDecoration("isSliceable"):
+                    continue
+                if node.callDecoration("getBuildPlateNumber") != plate:
+                    continue
+
+                parts.append(node.getName())
+                parts.append(node.isOutsideBuildArea())
+                parts.append(node.callDecoration("getActiveExtruderPosition"))
+                mesh = node.getMeshData()
+                if mesh is not None:
+                    parts.append(mesh.getVertices().tobytes())
+                    if mesh.hasIndices():
+                        parts.append(mesh.getIndices().tobytes())
+                parts.append(node.getWorldTransformation().getData().tobytes())
+
+                # nastavitve po modelu
+                node_stack = node.callDecoration("getStack")
+                if node_stack:
+                    top = node_stack.getTop()
+                    for key in sorted(top.getAllKeys()):
+                        parts += [key, top.getProperty(key, "value")]
+
+            global_stack = app.getGlobalContainerStack()
+            for stack in [global_stack] + list(global_stack.extruderList):
+                parts.append(stack.getId())
+                for key in sorted(stack.getAllKeys()):
+                    if key != "inset_direction":
+                        parts += [key, stack.getProperty(key, "value")]
+        except Exception as e:
+            print("Slice cache fingerprint error:", e)
+            return None
+
+        return fingerprint(parts)
+
+    # ---------------------------------------------------------
+    # Vse postelje: slice postelje k+1 teče med zapisom postelje k
+    # (vedno dva procesa CuraEngine – Curin backend slica samo
+    # aktivno posteljo)
+    # ---------------------------------------------------------
+    def startAllPlates(self):
+        if self._pipeline is not None or self._plate_batch is not None:
+            return
+        plates = self._buildPlates()
+        if not plates:
+            QMessageBox.warning(None, "Error", "There is no model on the bed !")
+            return
+        output_dir = QFileDialog.getExistingDirectory(
+            None, "Save merged G-code of all build plates"
+        )
+        if not output_dir:
+            return
+
+        app = CuraApplication.getInstance()
+        prefs = app.getPreferences()
+        kind = prefs.getValue("slice_and_join/save_format")
+        extension = next((ext for name, _, ext in FORMATS if name == kind), ".gcode")
+        printer_name = self.getActivePrinterNameSimple()
+        acceleration = self._machineAcceleration()
+        recompute = bool(prefs.getValue("slice_and_join/recompute_header"))
+        checksum = bool(prefs.getValue("slice_and_join/save_checksum"))
+        seam_check = prefs.getValue("slice_and_join/seam_check")
+        rules = self._activeRules()
+
+        def makeWriter(plate, passes):
+            name = f"{printer_name}_{self._plateModelName(plate)}_plate{plate}"
+            path = os.path.join(output_dir, name + extension)
+            return PlateWriter(
+                passes,
+                path,
+                kind,
+                acceleration,
+                recompute,
+                checksum,
+                seam_check,
+                rules,
+            )
+
+        self._disableAutoSlice()
+        self._phases = PhaseRecorder(
+            profile=bool(prefs.getValue("slice_and_join/profile")),
+            profile_dir=self._metricsDir(),
+        )
+        self._phases.begin("plates", plates=len(plates))
+        self._plate_batch = PlateBatch(
+            plates,
+            self._slicePlate,
+            makeWriter,
+            functools.partial(self._onPlatesDone, output_dir),
+            self._onPlatesProgress,
+        )
+
+        self._progress_dialog = QProgressDialog(
+            "Slicing build plates...", "Cancel", 0, len(plates)
+        )
+        self._progress_dialog.setWindowTitle("Slice and Join G-code – all plates")
+        self._progress_dialog.setWindowModality(Qt.WindowModality.ApplicationModal)
+        self._progress_dialog.setMinimumDuration(0)
+        self._progress_dialog.canceled.connect(self._plate_batch.cancel)
+        self._progress_dialog.show()
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        self._plate_batch.start()
+
+    def _buildPlates(self):
+        """Številke postelj z vsaj enim modelom znotraj območja tiska."""
+        app = CuraApplication.getInstance()
+        plates = set()
+        for node in DepthFirstIterator(app.getController().getScene().getRoot()):
+            if node.callDecoration("isSliceable") and not node.isOutsideBuildArea():
+                plates.add(node.callDecoration("getBuildPlateNumber"))
+        plates.discard(None)
+        return sorted(plates)
+
+    def _plateModelName(self, plate):
+        app = CuraApplication.getInstance()
+        for node in DepthFirstIterator(app.getController().getScene().getRoot()):
+            if not node.callDecoration("isSliceable"):
+                continue
+            if node.callDecoration("getBuildPlateNumber") == plate:
+                return re.sub(r"\.stl\s*$", "", node.getName(), flags=re.IGNORECASE)
+        return "plate"
+
+    def _slicePlate(self, plate, on_sliced, on_failed):
+        """Oba prehoda postelje v dveh procesih; vrne pipeline ali None."""
+        prefs = CuraApplication.getInstance().getPreferences()
+        passes = [SlicePass("outside_in"), SlicePass("inside_out")]
+        self._loadCachedPasses(passes, plate)
+        work_dir = tempfile.mkdtemp(prefix="slice_and_join_")
+
+        def finished(passes):
+            shutil.rmtree(work_dir, ignore_errors=True)
+            self._storeCachedPasses(passes)
+            on_sliced(passes)
+
+        def failed(message):
+            shutil.rmtree(work_dir, ignore_errors=True)
+            on_failed(message)
+
+        try:
+            jobs = self._prepareEngineJobs(passes, work_dir, plate)
+        except Exception as e:
+            QTimer.singleShot(0, functools.partial(failed, str(e)))
+            return None
+        pipeline = ParallelSlicePipeline(
+            passes,
+            jobs,
+            finished,
+            failed,
+            functools.partial(failed, "cancelled"),
+            slice_timeout=float(prefs.getValue("slice_and_join/slice_timeout")),
+        )
+        pipeline.start()
+        return pipeline
+
+    def _onPlatesProgress(self, text, finished):
+        if self._progress_dialog is not None:
+            self._progress_dialog.setLabelText(text.capitalize())
+            self._progress_dialog.setValue(finished)
+
+    def _onPlatesDone(self, output_dir, results):
+        batch = self._plate_batch
+        self._plate_batch = None
+        self._closeProgressDialog()
+        self._restoreAutoSlice()
+
+        written = sum(result.get("bytes", 0) for result in results)
+        failed = sum(1 for result in results if not result["ok"])
+        self._phases.end("plates", bytes=written, failed=failed)
+        lines = batch.summaryLines()
+        try:
+            with open(
+                os.path.join(output_dir, "summary.json"), "w", encoding="utf-8"
+            ) as f:
+                json.dump(batch.record(), f, indent=1)
+        except OSError as e:
+            print("Summary not written:", e)
+        self._writeMetrics()
+
+        dialog = QDialog(None)
+        dialog.setWindowTitle("All build plates")
+        layout = QVBoxLayout(dialog)
+        label = QLabel("\n".join(lines))
+        label.setStyleSheet("font-family: Consolas, monospace;")
+        label.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+        layout.addWidget(label)
+        ok_button = QPushButton("OK")
+        ok_button.clicked.connect(dialog.accept)
+        layout.addWidget(ok_button, alignment=Qt.AlignmentFlag.AlignRight)
+        dialog.exec()
+
+    # ---------------------------------------------------------
+    # Hitri slice #1: samo start G-code in layer 0
+    # ---------------------------------------------------------
+    def _firstLayerOnly(self):
+        prefs = CuraApplication.getInstance().getPreferences()
+        return bool(prefs.getValue("slice_and_join/first_layer_only"))
+
+    # ---------------------------------------------------------
+    # Združi G-code: do ;LAYER:1 slice #1, naprej slice #2, nato
+    # stik → pravila → glava (kot PlateWriter in CLI)
+    # ---------------------------------------------------------
+    def _mergeGcode(self, first_pass, rest_pass):
+        prefs = CuraApplication.getInstance().getPreferences()
+        seam_check = prefs.getValue("slice_and_join/seam_check")
+        self._document, layer_index, merged = mergePasses(
+            first_pass.lines,
+            rest_pass.lines,
+            first_pass.truncated,
+            seam_check,
+            self._activeRules(),
+            bool(prefs.getValue("slice_and_join/recompute_header")),
+            self._machineAcceleration(),
+            phase=self._phases.phase,
+        )
+        if merged["header_error"]:
+            print("Header not recomputed:", merged["header_error"])
+        if seam_check != "off":
+            self._seam = (merged["seam"], merged["seam_fixed"])
+        self._layer_indexes = {self._document: layer_index}
+        with self._phases.phase("spill"):
+            self._applyMemoryBudget()
+        self._history = DocumentHistory(self._document)
+        with self._phases.phase("layers"):
+            self._layerIndex()
+
+    # ---------------------------------------------------------
+    # Nizi pravil (rewrite_rules.json): aktivni niz ob združitvi,
+    # gumb Rules za trenutno verzijo
+    # ---------------------------------------------------------
+    def _ruleSetsPath(self):
+        return os.path.join(self._metricsDir(), "rewrite_rules.json")
+
+    def _activeRules(self):
+        """RewriteRules niza iz nastavitve rewrite_rules ali None."""
+        prefs = CuraApplication.getInstance().getPreferences()
+        name = prefs.getValue("slice_and_join/rewrite_rules")
+        if not name:
+            return None
+        try:
+            rule_sets = loadRuleSets(self._ruleSetsPath())
+            if name not in rule_sets:
+                raise RuleError("no rule set %r in %s" % (name, self._ruleSetsPath()))
+            return RewriteRules.fromDicts(rule_sets[name])
+        except RuleError as e:
+            print("Rewrite rules not applied:", e)
+            return None
+
+    def _rewriteGcode(self, view):
+        path = self._ruleSetsPath()
+        try:
+            rule_sets = loadRuleSets(path)
+        except RuleError as e:
+            QMessageBox.warning(None, "Rules", str(e))
+            return
+        if not rule_sets:
+            QMessageBox.information(
+                None,
+                "Rules",
+                f"No rule sets yet. Add them to\n{path}\n\n"
+                '{"Marlin fixes": [\n'
+                '  {"type": "literal", "find": "M107", "replace": "M106 S0"},\n'
+                '  {"type": "clamp", "commands": "G0 G1", "parameter": "F",'
+                ' "max": 6000}\n]}',
+            )
+            return
+        names = sorted(rule_sets)
+        prefs = CuraApplication.getInstance().getPreferences()
+        active = prefs.getValue("slice_and_join/rewrite_rules")
+        name, ok = QInputDialog.getItem(
+            None,
+            "Rules",
+            "Apply rule set:",
+            names,
+            names.index(active) if active in names else 0,
+            False,
+        )
+        if not ok:
+            return
+        try:
+            rules = RewriteRules.fromDicts(rule_sets[name])
+            document, hits = rules.apply(
+                self._document, self._layer_indexes.get(self._document)
+            )
+        except (RuleError, re.error) as e:
+            QMessageBox.warning(None, "Rules", f"Invalid rule in {name}: {e}")
+            return
+        if document is not self._document:
+            self._showVersion(view, self._history.push(document))
+        QMessageBox.information(
+            None,
+            "Rules",
+            f"{name}: {sum(hits)} replacements\n\n" + "\n".join(rules.summaryLines()),
+        )
+
+    # ---------------------------------------------------------
+    # Nad proračunom gre besedilo v začasno datoteko (mmap)
+    # ---------------------------------------------------------
+    def _memoryBudget(self):
+        prefs = CuraApplication.getInstance().getPreferences()
+        return int(prefs.getValue("slice_and_join/memory_budget_mb")) << 20
+
+    def _applyMemoryBudget(self):
+        try:
+            document = self._document.spilledOverBudget(self._memoryBudget())
+        except (OSError, ValueError) as e:
+            print("G-code kept in memory:", e)
+            return
+        if document is self._document:
+            return
+
+        # besedilo je enako – indeks layerjev velja tudi za novo verzijo
+        index = self._layer_indexes.pop(self._document, None)
+        if index is not None:
+            index.document = document
+            self._layer_indexes[document] = index
+        self._document = document
+
+    # ---------------------------------------------------------
+    # Po zaprtju dialoga: sprosti dokument in zapiši meritve
+    # ---------------------------------------------------------
+    def _releaseRun(self, *args):
+        self._document = None
+        self._history = None
+        self._layer_indexes = {}
+        self.layer_navigator = None
+        self.highlighter = None
+
+        if self._phases is not None:
+            self._phases.endAll()
+            Logger.log(
+                "d",
+                "SliceAndJoinGcode phases:\n%s",
+                "\n".join(self._phases.summaryLines()),
+            )
+            self._writeMetrics()
+
+    # ---------------------------------------------------------
+    # Meritve zagona: ena vrstica JSON v runs.jsonl
+    # ---------------------------------------------------------
+    def _metricsDir(self):
+        return os.path.join(Resources.getDataStoragePath(), "slice_and_join")
+
+    def _writeMetrics(self):
+        app = CuraApplication.getInstance()
+        prefs = app.getPreferences()
+        if not prefs.getValue("slice_and_join/metrics_log"):
+            return
+        self._phases.writeJsonLines(
+            os.path.join(self._metricsDir(), "runs.jsonl"),
+            plugin=self.VERSION,
+            cura=app.getVersion(),
+            execution_mode=prefs.getValue("slice_and_join/execution_mode"),
+            first_layer_only=self._firstLayerOnly(),
+        )
+
+    # ---------------------------------------------------------
+    # Pospešek za oceno časa v glavi
+    # ---------------------------------------------------------
+    def _machineAcceleration(self):
+        app = CuraApplication.getInstance()
+        try:
+            stack = app.getGlobalContainerStack()
+            if stack:
+                return float(stack.getProperty("machine_acceleration", "value"))
+        except Exception as e:
+            print(e)
+        return DEFAULT_ACCELERATION
+
+    # ---------------------------------------------------------
+    # Indeks layerjev trenutne verzije (Undo ga ne gradi znova)
+    # ---------------------------------------------------------
+    def _layerIndex(self):
+        index = self._layer_indexes.get(self._document)
+        if index is None:
+            index = LayerIndex(self._document)
+            self._layer_indexes[self._document] = index
+        return index
+
+    # ---------------------------------------------------------
+    # Dialog + Save g-code + Search & Replace + temna tema
+    # ---------------------------------------------------------
+    def _showFinalDialog(self):
+        self._phases.begin("show")
+        dialog = QDialog()
+        dialog.setWindowTitle(
+            f" G-CODE – First layer Outside-In    (v. {self.VERSION} – {self.DATE})  -  (c) Julijan Zavernik"
+        )
+        if self._source_path:
+            dialog.setWindowTitle(f" G-CODE – {self._source_path}")
+        dialog.setWindowFlag(Qt.WindowType.WindowContextHelpButtonHint, False)
+        dialog.setModal(True)
+        dialog.setWindowModality(Qt.WindowModality.ApplicationModal)
+
+        # prepreč ESC
+        def ignoreEsc(event):
+            if event.key() != Qt.Key.Key_Escape:
+                QDialog.keyPressEvent(dialog, event)
+
+        dialog.keyPressEvent = ignoreEsc
+
+        # temna tema za celoten dialog
+        dialog.setStyleSheet(
+            """
+            QDialog { background-color: #1e1e1e; }
+            QLabel { color: #FFFFFF; font-size: 10pt; }
+            QPushButton { background-color: #0078d7; color: #FFFFFF; font-size: 10pt; min-height: 21px; }
+            QLineEdit { background-color: #333333; color: #FFFFFF; border: 1px solid #555555; font-size: 10pt}
+            QCheckBox { color: #FFFFFF; font-size: 10pt; }
+        """
+        )
+
+        layout = QVBoxLayout(dialog)
+
+        # G-code prikaz - v urejevalniku so samo vidne vrstice
+        view = GcodeView()
+        view.editor.setStyleSheet(
+            """
+            QPlainTextEdit {
+                background-color: #1e1e1e;
+                color: #d4d4d4;
+                font-family: Consolas, monospace;
+                font-size: 11pt;
+            }
+        """
+        )
+
+        # Seznam layerjev levo od G-code
+        self.layer_navigator = LayerNavigator()
+        self.layer_navigator.setFixedWidth(220)
+        self.layer_navigator.list.setStyleSheet(
+            """
+            QListWidget {
+                background-color: #252526;
+                color: #d4d4d4;
+                font-family: Consolas, monospace;
+                font-size: 10pt;
+            }
+        """
+        )
+        self.layer_navigator.lineSelected.connect(view.scrollToLine)
+        self._showLayerIndex()
+
+        view_layout = QHBoxLayout()
+        view_layout.addWidget(self.layer_navigator)
+        view_layout.addWidget(view)
+        layout.addLayout(view_layout)
+
+        # Syntax highlighter (barva samo okno vidnih vrstic)
+        self.highlighter = GcodeHighlighter(view.editor.document())
+
+        # Search panel
+        search_layout = QHBoxLayout()
+        search_layout.setContentsMargins(10, 0, 10, 0)
+        search_label = QLabel("Search:")
+        search_label.setFixedWidth(60)
+        self.search_input = QLineEdit()
+        self.search_input.returnPressed.connect(lambda: self._searchGcode(view))
+        self.search_input.textChanged.connect(self._resetSearch)
+        self.regex_check = QCheckBox("Regex")
+        self.regex_check.toggled.connect(self._resetSearch)
+        self.search_count_label = QLabel("")
+        self.search_count_label.setFixedWidth(110)
+        self.search_count_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        prev_btn = QPushButton("◀")
+        prev_btn.setFixedWidth(40)
+        prev_btn.clicked.connect(lambda: self._searchGcode(view, backwards=True))
+        search_btn = QPushButton("Search")
+        search_btn.setFixedWidth(100)
+        search_btn.clicked.connect(lambda: self._searchGcode(view))
+        search_layout.addWidget(search_label)
+        search_layout.addWidget(self.search_input)
+        search_layout.addWidget(self.regex_check)
+        search_layout.addWidget(self.search_count_label)
+        search_layout.addWidget(prev_btn)
+        search_layout.addWidget(search_btn)
+        layout.addLayout(search_layout)
+
+        # Replace panel
+        replace_layout = QHBoxLayout()
+        replace_layout.setContentsMargins(10, 0, 10, 0)
+        replace_label = QLabel("Replace:")
+        replace_label.setFixedWidth(60)
+        self.replace_input = QLineEdit()
+        replace_btn = QPushButton("Replace")
+        replace_btn.setFixedWidth(100)
+        replace_btn.clicked.connect(lambda: self._searchAndReplaceGcode(view))
+        self.undo_btn = QPushButton("Undo")
+        self.undo_btn.setFixedWidth(60)
+        self.undo_btn.clicked.connect(lambda: self._undoReplace(view))
+        self.redo_btn = QPushButton("Redo")
+        self.redo_btn.setFixedWidth(60)
+        self.redo_btn.clicked.connect(lambda: self._redoReplace(view))
+        replace_layout.addWidget(replace_label)
+        replace_layout.addWidget(self.replace_input)
+        replace_layout.addWidget(self.undo_btn)
+        replace_layout.addWidget(self.redo_btn)
+        replace_layout.addWidget(replace_btn)
+        rules_btn = QPushButton("Rules...")
+        rules_btn.setFixedWidth(100)
+        rules_btn.clicked.connect(lambda: self._rewriteGcode(view))
+        replace_layout.addWidget(rules_btn)
+        layout.addLayout(replace_layout)
+        self._updateUndoButtons()
+
+        # Gumbi Information | Save | Close desno
+        info_btn = QPushButton(" Information ")
+        save_btn = QPushButton(" Save G-code ")
+        send_btn = QPushButton(" Send to printer ")
+        close_btn = QPushButton("Close")
+
+        info_btn.clicked.connect(self._showInfo)
+        save_btn.clicked.connect(self._saveGcodeToFile)
+        send_btn.clicked.connect(self._sendToPrinter)
+        close_btn.clicked.connect(dialog.accept)
+
+        # Stanje stika ;LAYER:1 (mergePasses)
+        self.seam_label = QLabel("")
+
+        button_layout = QHBoxLayout()
+        button_layout.setContentsMargins(10, 0, 10, 0)
+        button_layout.addWidget(self.seam_label)
+        button_layout.addStretch()
+        button_layout.addWidget(info_btn)
+        button_layout.addWidget(save_btn)
+        button_layout.addWidget(send_btn)
+        button_layout.addWidget(close_btn)
+        layout.addLayout(button_layout)
+
+        dialog.resize(1100, 600)
+
+        # Ko se dialog zapre – obnovi Auto Slice
+        dialog.finished.connect(self._restoreAutoSlice)
+        dialog.finished.connect(self._resetSearch)
+        dialog.finished.connect(self._releaseRun)
+
+        # Indeks vrstic je že narejen – prikaz je takojšen
+        view.setDocument(self._document)
+        self._showSeam()
+
+        # "show" se konča po prvem izrisu (prvi obhod zanke dogodkov)
+        QTimer.singleShot(0, lambda: self._phases.end("show"))
+        dialog.exec()
+
+    # ---------------------------------------------------------
+    # Funkcija Search (case-insensitive, v ozadju, "n of N")
+    # ---------------------------------------------------------
+    def _searchGcode(self, view, backwards=False):
+        search_text = self.search_input.text()
+        if not search_text:
+            return
+        if self._search_index is None and not self._startSearch(search_text):
+            return
+
+        index = self._search_index
+        self._search_pending = None
+
+        # prvi skok od vrha prikaza, nato po zaporednih zadetkih
+        if self._search_current == -1:
+            top = self._document.lineStartOffset(view.topLine())
+            number = index.firstAtOrAfter(top) - (1 if backwards else 0)
+            waiting = index.scanned < top
+        else:
+            number = self._search_current + (-1 if backwards else 1)
+            waiting = False
+
+        if waiting or number < 0 or number >= index.count():
+            if not index.complete:
+                # nadaljuj, ko SearchThread najde naslednje zadetke
+                self._search_pending = (view, backwards)
+                return
+            if index.count() == 0:
+                QMessageBox.information(None, "Search", "Text not found.")
+                return
+            if number < 0 or number >= index.count():
+                number = index.count() - 1 if backwards else 0
+
+        self._search_current = number
+        start, end = index.match(number)
+        line = self._document.lineAtOffset(start)
+        column = start - self._document.lineStartOffset(line)
+        view.showRange(line, column, end - start)
+        self._updateSearchLabel()
+
+    def _startSearch(self, search_text):
+        try:
+            pattern = compilePattern(search_text, self.regex_check.isChecked())
+        except re.error as e:
+            QMessageBox.warning(None, "Search", f"Invalid search pattern: {e}")
+            return False
+
+        self._search_index = SearchIndex()
+        self._search_current = -1
+        thread = SearchThread(self._document, pattern)
+        queued = Qt.ConnectionType.QueuedConnection
+        thread.batch.connect(functools.partial(self._onSearchBatch, thread), queued)
+        thread.done.connect(functools.partial(self._onSearchDone, thread), queued)
+        thread.finished.connect(
+            functools.partial(self._onSearchFinished, thread), queued
+        )
+        self._search_thread = thread
+        self._search_threads.add(thread)
+        thread.start()
+        self._updateSearchLabel()
+        return True
+
+    def _onSearchBatch(self, thread, starts, ends, scanned):
+        if thread is not self._search_thread:
+            return  # zamujen signal preklicanega iskanja
+        self._search_index.extend(starts, ends, scanned)
+        self._updateSearchLabel()
+        if self._search_pending:
+            self._searchGcode(*self._search_pending)
+
+    def _onSearchDone(self, thread):
+        if thread is not self._search_thread:
+            return
+        self._search_index.complete = True
+        self._search_thread = None
+        self._updateSearchLabel()
+        if self._search_pending:
+            self._searchGcode(*self._search_pending)
+
+    def _onSearchFinished(self, thread):
+        thread.wait()
+        self._search_threads.discard(thread)
+
+    def _resetSearch(self, *args):
+        # brez čakanja: nit ostane v _search_threads do signala finished
+        if self._search_thread is not None:
+            self._search_thread.cancel()
+            self._search_thread = None
+        self._search_index = None
+        self._search_current = -1
+        self._search_pending = None
+        self._updateSearchLabel()
+
+    def _updateSearchLabel(self):
+        index = self._search_index
+        if index is None:
+            text = ""
+        elif index.complete:
+            text = "%d of %d" % (self._search_current + 1, index.count())
+        else:
+            text = "%d of %d+" % (self._search_current + 1, index.count())
+        self.search_count_label.setText(text)
+
+    # ---------------------------------------------------------
+    # Funkcija Search & Replace (case-insensitive) + Undo / Redo
+    # ---------------------------------------------------------
+    def _searchAndReplaceGcode(self, view):
+        search = self.search_input.text()
+        replace = self.replace_input.text()
+        if not search:
+            return
+        try:
+            pattern = compilePattern(search, regex=True, allow_empty=True)
+        except re.error as e:
+            QMessageBox.warning(None, "Replace", f"Invalid replace pattern: {e}")
+            return
+
+        # zamenjava v ozadju (modalni napredek: dokument se medtem ne menja)
+        thread = ReplaceThread(self._document, pattern, replace, self._memoryBudget())
+        progress = self._transferProgress("Replace", "Replacing...", thread)
+        progress.setRange(0, 0)  # brez deleža, samo zasedenost
+        queued = Qt.ConnectionType.QueuedConnection
+        thread.done.connect(
+            functools.partial(self._onReplaced, thread, progress, view), queued
+        )
+        thread.failed.connect(
+            functools.partial(self._onReplaceFailed, thread, progress), queued
+        )
+        self._replace_thread = thread
+        thread.start()
+
+    def _onReplaced(self, thread, progress, view, document, count):
+        self._finishReplace(thread, progress)
+        if count and self._history is not None:
+            self._showVersion(view, self._history.push(document))
+
+    def _onReplaceFailed(self, thread, progress, error):
+        self._finishReplace(thread, progress)
+        if error:
+            QMessageBox.warning(None, "Replace", f"Invalid replace pattern: {error}")
+
+    def _finishReplace(self, thread, progress):
+        thread.wait()
+        progress.close()
+        if thread is self._replace_thread:
+            self._replace_thread = None
+
+    def _undoReplace(self, view):
+        if self._history.canUndo():
+            self._showVersion(view, self._history.undo())
+
+    def _redoReplace(self, view):
+        if self._history.canRedo():
+            self._showVersion(view, self._history.redo())
+
+    def _showVersion(self, view, document):
+        self._document = document
+        # indeksi layerjev samo za verzije, ki so še v zgodovini
+        versions = self._history.versions()
+        self._layer_indexes = {
+            version: index
+            for version, index in self._layer_indexes.items()
+            if version in versions
+        }
+        view.setDocument(document)
+        self._showLayerIndex()
+        self._resetSearch()
+        self._updateUndoButtons()
+
+    # ---------------------------------------------------------
+    # Seznam layerjev: indeks iz predpomnilnika ali gradnja v ozadju
+    # ---------------------------------------------------------
+    def _showLayerIndex(self):
+        index = self._layer_indexes.get(self._document)
+        self.layer_navigator.setLayerIndex(index)
+        if index is not None:
+            return
+        thread = LayerIndexThread(self._document)
+        thread.done.connect(
+            functools.partial(self._onLayerIndex, thread),
+            Qt.ConnectionType.QueuedConnection,
+        )
+        self._layer_threads.add(thread)
+        thread.start()
+
+    def _onLayerIndex(self, thread, document, index):
+        thread.wait()
+        self._layer_threads.discard(thread)
+        if document is not self._document:
+            return  # medtem Undo / Replace ali zaprt dialog
+        self._layer_indexes[document] = index
+        if self.layer_navigator is not None:
+            self.layer_navigator.setLayerIndex(index)
+
+    # ---------------------------------------------------------
+    # Stik slica #1 in #2 (preverjen in popravljen ob združitvi)
+    # ---------------------------------------------------------
+    def _showSeam(self):
+        if self._seam is None:
+            return  # odprta datoteka ali seam_check = off
+        issues, fixed = self._seam
+        if not issues:
+            text = "Layer seam OK"
+        elif fixed:
+            text = "Layer seam fixed: " + ", ".join(issue.kind for issue in issues)
+        else:
+            text = "Layer seam: check " + ", ".join(issue.kind for issue in issues)
+        self.seam_label.setText(text)
+        self.seam_label.setToolTip("\n".join(str(issue) for issue in issues))
+
+    def _updateUndoButtons(self):
+        self.undo_btn.setEnabled(self._history.canUndo())
+        self.redo_btn.setEnabled(self._history.canRedo())
+
+    # ---------------------------------------------------------
+    # Pridobitev imena aktivnega tiskalnika iz Cure
+    # ---------------------------------------------------------
+    def getActivePrinterNameSimple(self):
+        """Vrni prvih 6 znakov očiščenega imena tiskalnika."""
+        from cura.CuraApplication import CuraApplication
+        import re
+
+        app = CuraApplication.getInstance()
+
+        # Poskusi vse metode dokler ne najdeš imena
+        for method in [
+            lambda: app.getMachineManager().activeMachineName,
+            lambda: (
+                app.getMachineManager().activeMachine.name
+                if hasattr(app.getMachineManager().activeMachine, "name")
+                else None
+            ),
+            lambda: (
+                app.getGlobalContainerStack().definition.getName()
+                if app.getGlobalContainerStack()
+                and app.getGlobalContainerStack().definition
+                else None
+            ),
+            lambda: (
+                app.getGlobalContainerStack().getMetaDataEntry("name")
+                if app.getGlobalContainerStack()
+                else None
+            ),
+        ]:
+            try:
+                name = method()
+                if name:
+                    # Očisti, skrajšaj in vrni
+                    cleaned = re.sub(r'[<>:"/\\|?*]', "", str(name)).strip()
+                    short = cleaned[:6].upper()
+                    return short if short else "UNK"
+            except:
+                continue
+
+        return "UNK"
+
+    # ---------------------------------------------------------
+    # Information
+    # ---------------------------------------------------------
+    def _showInfo(self):
+        info_text = (
+            "Version: 50      Date: 13.01.2026\n\n"
+            "Description:\n"
+            "SliceAndJoinGcode plugin prepares G-code so that\n"
+            "the first layer is printed Outside → Inside, and all other layers\n"
+            "are printed Inside → Outside.\n\n"
+            "Procedure to create such G-code:\n"
+            "• If the model doesn't exist on the build plate, do nothing\n"
+            "• Set Wall Ordering to Outside → Inside\n"
+            "• Slice #1: Outside → Inside (save first layer)\n"
+            "• Set Wall Ordering to Inside → Outside\n"
+            "• Slice #2: Inside → Outside (save second and remaining layers)\n"
+            "• Merge G-code #1 + #2\n"
+            "• Display merged G-code in the window\n"
+            "• Available in window: Search, Replace, and Save G-code\n"
+            "• Search & Replace = case-insensitive\n"
+            "• Dark theme, G-code syntax highlighting\n"
+            "• Cura 5.11.x compatible\n"
+            "• G-code filename = 6 letters from printer name + model name\n\n"
+            "Enjoy."
+        )
+
+        dialog = QDialog(None)
+        dialog.setWindowTitle("Information")
+
+        layout = QVBoxLayout()
+
+        label = QLabel(info_text)
+        label.setWordWrap(True)
+        layout.addWidget(label)
+
+        # meritve zadnjega zagona (čas, CPU, pomnilnik, velikosti)
+        if self._phases is not None:
+            metrics = ["Last run:"] + self._phases.summaryLines()
+            profiles = [
+                phase["profile"] for phase in self._phases.phases if "profile" in phase
+            ]
+            if profiles:
+                metrics += ["", "Profiles:"] + profiles
+            metrics_label = QLabel("\n".join(metrics))
+            metrics_label.setStyleSheet("font-family: Consolas, monospace;")
+            metrics_label.setTextInteractionFlags(
+                Qt.TextInteractionFlag.TextSelectableByMouse
+            )
+            layout.addWidget(metrics_label)
+
+        ok_button = QPushButton("OK")
+        ok_button.clicked.connect(dialog.accept)
+        layout.addWidget(ok_button, alignment=Qt.AlignmentFlag.AlignRight)
+
+        dialog.setLayout(layout)
+        dialog.exec()
+
+    # ---------------------------------------------------------
+    # Save file dialog
+    # ---------------------------------------------------------
+    def _saveGcodeToFile(self):
+
+        app = CuraApplication.getInstance()
+        default_filename = self._defaultFilename(app)
+
+        # format zadnjega shranjevanja je privzet
+        prefs = app.getPreferences()
+        last_format = prefs.getValue("slice_and_join/save_format")
+        filters = [label for _, label, _ in FORMATS]
+        selected = next(
+            (label for kind, label, _ in FORMATS if kind == last_format), filters[0]
+        )
+        extension = next(ext for _, label, ext in FORMATS if label == selected)
+
+        filename, selected = QFileDialog.getSaveFileName(
+            None,
+            "Save G-code",
+            default_filename + extension,
+            ";;".join(filters),
+            selected,
+        )
+
+        if not filename:
+            return
+
+        kind, _, extension = next(
+            (entry for entry in FORMATS if entry[1] == selected), FORMATS[0]
+        )
+        if formatForPath(filename) != kind:
+            # končnica drugega formata se zamenja
+            filename = re.sub(
+                r"\.(gcode(\.gz)?|bgcode)$", "", filename, flags=re.IGNORECASE
+            )
+            filename += extension
+        prefs.setValue("slice_and_join/save_format", kind)
+        if self._isSourcePath(filename):
+            try:
+                self._detachSource()
+            except (OSError, ValueError) as e:
+                QMessageBox.critical(
+                    None, "Error", f"Cannot save over {filename}:\n{e}"
+                )
+                return
+        metadata = curaMetadata(self._document.textRange(0, 1 << 16))
+
+        # Zapis v ozadju (začasna datoteka → fsync → zamenjava), tako
+        # da Cura ne zmrzne in obstoječa datoteka ostane cela ob napaki
+        thread = SaveThread(
+            self._document,
+            filename,
+            kind,
+            metadata,
+            bool(prefs.getValue("slice_and_join/save_checksum")),
+        )
+        progress = self._transferProgress("Save G-code", "Saving G-code...", thread)
+        queued = Qt.ConnectionType.QueuedConnection
+        thread.progress.connect(
+            functools.partial(self._onSaveProgress, progress), queued
+        )
+        thread.saved.connect(functools.partial(self._onSaved, thread, progress), queued)
+        thread.failed.connect(
+            functools.partial(self._onSaveFailed, thread, progress), queued
+        )
+        self._save_thread = thread
+        self._phases.begin("save", format=kind)
+        thread.start()
+
+    def _isSourcePath(self, filename):
+        return bool(
+            self._source_path
+            and os.path.exists(filename)
+            and os.path.samefile(filename, self._source_path)
+        )
+
+    def _detachSource(self):
+        """Verzije odprte datoteke berejo iz začasne kopije.
+
+        Windows ne zamenja (os.replace) preslikane datoteke; ko nobena
+        verzija ne kaže več na original, se njegov mmap in datoteka
+        zapreta, Undo in indeksi layerjev ostanejo.
+        """
+        versions = self._history.versions()
+        sources = {
+            buffer
+            for version in versions
+            for buffer in version.fileBuffers()
+            if os.path.samefile(buffer.name(), self._source_path)
+        }
+        for source in sources:
+            copy = source.copied(tempfile.TemporaryFile(prefix="slice_and_join_"))
+            for version in versions:
+                version.replaceBuffer(source, copy)
+
+    def _transferProgress(self, title, text, thread):
+        progress = QProgressDialog(text, "Cancel", 0, 1000)
+        progress.setWindowTitle(title)
+        progress.setWindowModality(Qt.WindowModality.ApplicationModal)
+        progress.setMinimumDuration(500)
+        progress.setAutoClose(False)
+        progress.setAutoReset(False)
+        progress.canceled.connect(thread.cancel)
+        return progress
+
+    def _defaultFilename(self, app):
+        if not self._source_path:
+            return self._sliceFilename(app)
+        # odprta datoteka: privzeto nova datoteka ob njej (prepis
+        # originala najprej kopira njegove kose, _detachSource)
+        filename = re.sub(
+            r"\.(gcode(\.gz)?|bgcode|gco|g)$",
+            "",
+            self._source_path,
+            flags=re.IGNORECASE,
+        )
+        return filename + "_edited"
+
+    def _sliceFilename(self, app):
+        scene = app.getController().getScene()
+        root = scene.getRoot()
+        nodes = [c for c in root.getChildren() if type(c).__name__ == "CuraSceneNode"]
+
+        # print("Ime prvega modela:", first_model_name)
+        if nodes:
+            first_model_name = nodes[0].getName()
+        # odstranim .stl
+        first_model_name = re.sub(
+            r"\.stl\s*$", "", first_model_name, flags=re.IGNORECASE
+        )
+        # Pridobi ime tiskalnika
+        printer_name = self.getActivePrinterNameSimple()
+        # priredim ime datoteke: 6 znakov imena printerja_ime prveega modela.code
+        return f"{printer_name}_{first_model_name}"
+
+    def _onSaveProgress(self, progress, written, total):
+        progress.setValue(min(written * 1000 // max(total, 1), 1000))
+
+    def _onSaved(self, thread, progress, size):
+        self._finishSave(thread, progress)
+        self._phases.end("save", bytes=size)
+
+    def _onSaveFailed(self, thread, progress, error):
+        self._finishSave(thread, progress)
+        self._phases.end("save", error=error or "cancelled")
+        if error:
+            QMessageBox.critical(None, "Error", error)
+
+    def _finishSave(self, thread, progress):
+        thread.wait()
+        progress.close()
+        if thread is self._save_thread:
+            self._save_thread = None
+
+    # ---------------------------------------------------------
+    # Send to printer: prenos na OctoPrint / Moonraker v ozadju
+    # ---------------------------------------------------------
+    def _sendToPrinter(self):
+        app = CuraApplication.getInstance()
+        prefs = app.getPreferences()
+        url = prefs.getValue("slice_and_join/print_server_url")
+        if not url:
+            url, ok = QInputDialog.getText(
+                None,
+                "Send to printer",
+                "OctoPrint or Moonraker address (e.g. http://octopi.local):",
+            )
+            if not ok or not url.strip():
+                return
+            api_key, ok = QInputDialog.getText(
+                None,
+                "Send to printer",
+                "API key (leave empty if not required):",
+                QLineEdit.EchoMode.Password,
+            )
+            if not ok:
+                return
+            url = url.strip()
+            prefs.setValue("slice_and_join/print_server_url", url)
+            prefs.setValue("slice_and_join/print_server_api_key", api_key.strip())
+
+        try:
+            server = PrintServer(
+                url,
+                prefs.getValue("slice_and_join/print_server_api_key"),
+                prefs.getValue("slice_and_join/print_server_type"),
+            )
+        except UploadError as e:
+            QMessageBox.critical(None, "Send to printer", str(e))
+            return
+        kind = GZIP if prefs.getValue("slice_and_join/print_server_gzip") else PLAIN
+        filename = uploadName(self._defaultFilename(app), kind)
+        thread = UploadThread(
+            self._document,
+            server,
+            filename,
+            kind,
+            curaMetadata(self._document.textRange(0, 1 << 16)),
+            bool(prefs.getValue("slice_and_join/print_server_start")),
+        )
+        progress = self._transferProgress(
+            "Send to printer", f"Sending {filename} to {url}...", thread
+        )
+        queued = Qt.ConnectionType.QueuedConnection
+        thread.progress.connect(
+            functools.partial(self._onSaveProgress, progress), queued
+        )
+        thread.uploaded.connect(
+            functools.partial(self._onUploaded, thread, progress), queued
+        )
+        thread.failed.connect(
+            functools.partial(self._onUploadFailed, thread, progress), queued
+        )
+        self._upload_thread = thread
+        self._phases.begin("upload", format=kind)
+        thread.start()
+
+    def _onUploaded(self, thread, progress, result):
+        self._finishUpload(thread, progress)
+        self._phases.end("upload", bytes=result["bytes"], server=result["server"])
+        QMessageBox.information(
+            None,
+            "Send to printer",
+            "%s sent to %s (%.1f MB)."
+            % (result["filename"], result["server"], result["bytes"] / (1 << 20)),
+        )
+
+    def _onUploadFailed(self, thread, progress, error):
+        self._finishUpload(thread, progress)
+        self._phases.end("upload", error=error or "cancelled")
+        if error:
+            QMessageBox.critical(None, "Send to printer", error)
+
+    def _finishUpload(self, thread, progress):
+        thread.wait()
+        progress.close()
+        if thread is self._upload_thread:
+            self._upload_thread = None
+
+    # ---------------------------------------------------------
+    # Preveri modele
+    # ---------------------------------------------------------
+    def _hasModelsOnBed(self):
+        app = CuraApplication.getInstance()
+        scene = app.getController().getScene()
+        root = scene.getRoot()
+        nodes = [c for c in root.getChildren() if type(c).__name__ == "CuraSceneNode"]
+        if not nodes:
+            QMessageBox.warning(None, "Error", "There is no model on the bed !")
+            return False
+        return True
+
+    # ---------------------------------------------------------
+    # Obnovi originalno nastavitev
+    # ---------------------------------------------------------
+    def _restoreOriginalInsetDirection(self):
+        # vzporedni način in predpomnilnik nastavitev ne spreminjata
+        if self._inset_direction_changed:
+            self._setInsetDirection(self._original_inset_direction)
+            self._inset_direction_changed = False
@@ -0,0 +1,28 @@
+# ===================================================================
+# Opis: Meni plugina ob zagonu Cure, brez uvoza jedra.
+#  - register() ustvari samo ta razširitev (meni), zato zagon Cure ne
+#    plača uvoza PyQt6 gradnikov, prikazovalnika, regexov in analize
+#  - Jedro (SliceAndJoinGcode) se uvozi in ustvari ob prvi izbiri v
+#    meniju, nato se uporablja isti primerek
+#  - Meritev: python benchmarks/bench_import.py
+# ===================================================================
+
+from UM.Extension import Extension
+
+
+class SliceAndJoinMenu(Extension):
+    def __init__(self):
+        super().__init__()
+        self.setMenuName("Slice First Layer Outside-In")
+        self.addMenuItem("Run", lambda: self.plugin().startProcess())
+        self.addMenuItem("Run all build plates", lambda: self.plugin().startAllPlates())
+        self.addMenuItem("Open G-code...", lambda: self.plugin().openGcode())
+        self._plugin = None
+
+    def plugin(self):
+        """Jedro plugina (uvoz ob prvem klicu)."""
+        if self._plugin is None:
+            from .SliceAndJoinGcode import SliceAndJoinGcode
+
+            self._plugin = SliceAndJoinGcode()
+        return self._plugin
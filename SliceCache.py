@@ -0,0 +1,187 @@
+# ===================================================================
+# Opis: Predpomnilnik rezultatov slicanja (seznami kosov G-code).
+#  - Ključ = prstni odtis scene + nastavitev + nastavitev prehoda
+#  - LRU v pomnilniku z omejitvijo velikosti
+#  - Neobvezno drugi nivo na disku (prav tako LRU z omejitvijo)
+#  - Brez Qt in Cure
+# ===================================================================
+
+import collections
+import hashlib
+import os
+import pickle
+
+
+# -------------------------------------------------------------
+# Prstni odtis iz zaporedja delov (bytes / str / ostalo)
+# -------------------------------------------------------------
+def fingerprint(parts):
+    digest = hashlib.blake2b(digest_size=20)
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode("utf-8")
+        elif not isinstance(part, (bytes, bytearray, memoryview)):
+            part = repr(part).encode("utf-8")
+        # dolžina pred vsebino, da se deli ne zlijejo
+        digest.update(len(part).to_bytes(8, "little"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+def chunksSize(chunks):
+    return sum(len(chunk) for chunk in chunks)
+
+
+# -------------------------------------------------------------
+# LRU predpomnilnik
+# -------------------------------------------------------------
+class SliceCache:
+
+    FILE_SUFFIX = ".slice"
+
+    def __init__(self, max_bytes, disk_dir=None, max_disk_bytes=0):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir if max_disk_bytes > 0 else None
+        self.max_disk_bytes = max_disk_bytes
+
+        # ključ -> (chunks, truncated, size)
+        self._memory = collections.OrderedDict()
+        self._memory_bytes = 0
+        self._disk = collections.OrderedDict()  # ključ -> size
+        self._disk_bytes = 0
+
+        if self.disk_dir:
+            self._loadDiskIndex()
+
+    # ---------------------------------------------------------
+    # Branje
+    # ---------------------------------------------------------
+    def get(self, key):
+        """Vrni (chunks, truncated) ali None."""
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            return entry[0], entry[1]
+
+        if key in self._disk:
+            try:
+                with open(self._diskPath(key), "rb") as f:
+                    chunks, truncated = pickle.load(f)
+            except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+                self._dropDisk(key)
+                return None
+            self._disk.move_to_end(key)
+            self._touchDisk(key)
+            self._storeMemory(key, chunks, truncated)
+            return chunks, truncated
+
+        return None
+
+    # ---------------------------------------------------------
+    # Pisanje
+    # ---------------------------------------------------------
+    def put(self, key, chunks, truncated=False):
+        # kopija: Cura (npr. post-processing) spreminja svoj seznam
+        self._storeMemory(key, list(chunks), truncated)
+
+    def clear(self):
+        self._memory.clear()
+        self._memory_bytes = 0
+        for key in list(self._disk):
+            self._dropDisk(key)
+
+    def memoryBytes(self):
+        return self._memory_bytes
+
+    def diskBytes(self):
+        return self._disk_bytes
+
+    # ---------------------------------------------------------
+    # Pomnilnik
+    # ---------------------------------------------------------
+    def _storeMemory(self, key, chunks, truncated):
+        self._dropMemory(key)
+        size = chunksSize(chunks)
+
+        if size > self.max_bytes:
+            self._storeDisk(key, chunks, truncated, size)
+            return
+
+        self._memory[key] = (chunks, truncated, size)
+        self._memory_bytes += size
+
+        while self._memory_bytes > self.max_bytes:
+            old_key, (old_chunks, old_truncated, old_size) = self._memory.popitem(
+                last=False
+            )
+            self._memory_bytes -= old_size
+            self._storeDisk(old_key, old_chunks, old_truncated, old_size)
+
+    def _dropMemory(self, key):
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= entry[2]
+
+    # ---------------------------------------------------------
+    # Disk
+    # ---------------------------------------------------------
+    def _diskPath(self, key):
+        return os.path.join(self.disk_dir, key + self.FILE_SUFFIX)
+
+    def _loadDiskIndex(self):
+        try:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            entries = []
+            for name in os.listdir(self.disk_dir):
+                if name.endswith(self.FILE_SUFFIX):
+                    stat = os.stat(os.path.join(self.disk_dir, name))
+                    key = name[: -len(self.FILE_SUFFIX)]
+                    entries.append((stat.st_mtime, key, stat.st_size))
+        except OSError as e:
+            print("Slice cache error:", e)
+            self.disk_dir = None
+            return
+
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+        self._evictDisk()
+
+    def _storeDisk(self, key, chunks, truncated, size):
+        if not self.disk_dir or key in self._disk or size > self.max_disk_bytes:
+            return
+
+        path = self._diskPath(key)
+        try:
+            with open(path + ".tmp", "wb") as f:
+                pickle.dump((chunks, truncated), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(path + ".tmp", path)
+            size = os.path.getsize(path)
+        except OSError as e:
+            print("Slice cache error:", e)
+            return
+
+        self._disk[key] = size
+        self._disk_bytes += size
+        self._evictDisk()
+
+    def _touchDisk(self, key):
+        # mtime = vrstni red LRU ob naslednjem zagonu
+        try:
+            os.utime(self._diskPath(key))
+        except OSError:
+            pass
+
+    def _evictDisk(self):
+        while self._disk_bytes > self.max_disk_bytes and self._disk:
+            self._dropDisk(next(iter(self._disk)))
+
+    def _dropDisk(self, key):
+        size = self._disk.pop(key, None)
+        if size is None:
+            return
+        self._disk_bytes -= size
+        try:
+            os.remove(self._diskPath(key))
+        except OSError:
+            pass
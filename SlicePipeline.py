@@ -0,0 +1,386 @@
+# ===================================================================
+# Opis: Dogodkovni potek slicanja (brez fiksnih zamikov in pollinga).
+#  - Stanja prehoda: STARTING → SLICING → naslednji prehod / DONE
+#  - Prehode sprožijo signali backenda: slicingStarted,
+#    backendStateChange, processingProgress, slicingCancelled
+#  - Vsaka faza ima svojo časovno omejitev, celoten potek se da
+#    preklicati
+#  - Rezultat se prebere šele po vrnitvi iz Curinega handlerja
+#    (QTimer 0 ms), ko je gcode_dict dokončan
+#  - ParallelSlicePipeline: oba prehoda hkrati v dveh procesih
+#    CuraEngine (QProcess.finished namesto čakanja)
+# ===================================================================
+
+import functools
+
+from PyQt6.QtCore import QProcess, QTimer
+from UM.Backend.Backend import BackendState
+from cura.CuraApplication import CuraApplication
+
+from .CuraEngineCli import headerFromEngineLog, replaceHeader
+from .GcodeEngine import findLayer, iterFileChunks
+
+
+# -------------------------------------------------------------
+# En prehod slicanja
+# -------------------------------------------------------------
+class SlicePass:
+    def __init__(self, inset_direction, stop_at_layer=None):
+        self.inset_direction = inset_direction
+        self.stop_at_layer = stop_at_layer  # ustavi CuraEngine na ;LAYER:n
+        self.cache_key = None
+        self.cached = False
+
+        # rezultat (vnaprej nastavljen = prehod se preskoči)
+        self.lines = None
+        self.truncated = False
+
+
+# -------------------------------------------------------------
+# Stroj stanj za zaporedje prehodov
+# -------------------------------------------------------------
+class SlicePipeline:
+
+    IDLE = "idle"
+    STARTING = "starting"  # backend.slice() klican, čakamo slicingStarted
+    SLICING = "slicing"  # CuraEngine dela, čakamo Done / ;LAYER:n
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    # Ko je backend zaseden (ProcessSlicedLayersJob), slice() ne naredi
+    # nič in ne sproži nobenega signala – takrat poskusi znova.
+    RETRY_INTERVAL_MS = 200
+
+    def __init__(
+        self,
+        passes,
+        apply_settings,
+        on_finished,
+        on_failed,
+        on_cancelled,
+        on_progress=None,
+        start_timeout=30.0,
+        slice_timeout=900.0,
+    ):
+        self.passes = passes
+        self.state = self.IDLE
+
+        self._apply_settings = apply_settings  # fn(slice_pass)
+        self._on_finished = on_finished  # fn(passes)
+        self._on_failed = on_failed  # fn(message)
+        self._on_cancelled = on_cancelled  # fn()
+        self._on_progress = on_progress  # fn(pass_index, 0..1)
+
+        self._start_timeout = start_timeout
+        self._slice_timeout = slice_timeout
+
+        self._index = 0
+        self._scanned_chunks = 0
+        self._unchanged = False
+
+        self._timer = QTimer()
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._onTimeout)
+
+    # ---------------------------------------------------------
+    # Javni vmesnik
+    # ---------------------------------------------------------
+    def start(self):
+        backend = self._backend()
+        backend.slicingStarted.connect(self._onSlicingStarted)
+        backend.slicingCancelled.connect(self._onSlicingCancelled)
+        backend.backendStateChange.connect(self._onBackendStateChange)
+        backend.processingProgress.connect(self._onProcessingProgress)
+
+        self._index = 0
+        QTimer.singleShot(0, self._startPass)
+
+    def cancel(self):
+        if not self.isRunning():
+            return
+        slicing = self.state == self.SLICING
+        self._finish(self.CANCELLED)
+        if slicing:
+            self._backend().stopSlicing()
+        QTimer.singleShot(0, self._on_cancelled)
+
+    def isRunning(self):
+        return self.state in (self.IDLE, self.STARTING, self.SLICING)
+
+    # ---------------------------------------------------------
+    # Prehodi
+    # ---------------------------------------------------------
+    def _startPass(self):
+        if not self.isRunning():
+            return
+
+        slice_pass = self.passes[self._index]
+        if slice_pass.lines is not None:
+            # rezultat iz predpomnilnika – CuraEngine ni potreben
+            self._completePass(slice_pass.lines, slice_pass.truncated)
+            return
+
+        self._apply_settings(slice_pass)
+        self._scanned_chunks = 0
+        self._enter(self.STARTING, self._start_timeout)
+        self._trySlice()
+
+    def _trySlice(self):
+        if self.state != self.STARTING:
+            return
+
+        self._unchanged = False
+        self._backend().slice()
+
+        # slice() sproži slicingStarted ali (nič za slicat) progress 1.0
+        # sinhrono; če ni bilo ničesar, je backend zaseden
+        if self.state == self.STARTING:
+            if self._unchanged:
+                self._enter(self.IDLE, None)
+                self._completePass(self._currentGcodeList(), False)
+            else:
+                QTimer.singleShot(self.RETRY_INTERVAL_MS, self._trySlice)
+
+    def _completePass(self, lines, truncated):
+        if not self.isRunning():
+            return
+
+        slice_pass = self.passes[self._index]
+        slice_pass.lines = lines
+        slice_pass.truncated = truncated
+
+        if lines is None:
+            self._fail("G-code not exists")
+            return
+
+        self._index += 1
+        if self._index < len(self.passes):
+            self._enter(self.IDLE, None)
+            QTimer.singleShot(0, self._startPass)
+        else:
+            self._finish(self.DONE)
+            QTimer.singleShot(0, lambda: self._on_finished(self.passes))
+
+    def _fail(self, message):
+        slicing = self.state == self.SLICING
+        self._finish(self.FAILED)
+        if slicing:
+            self._backend().stopSlicing()
+        QTimer.singleShot(0, lambda: self._on_failed(message))
+
+    def _enter(self, state, timeout):
+        self.state = state
+        self._timer.stop()
+        if timeout:
+            self._timer.start(int(timeout * 1000))
+
+    def _finish(self, state):
+        self._enter(state, None)
+        backend = self._backend()
+        backend.slicingStarted.disconnect(self._onSlicingStarted)
+        backend.slicingCancelled.disconnect(self._onSlicingCancelled)
+        backend.backendStateChange.disconnect(self._onBackendStateChange)
+        backend.processingProgress.disconnect(self._onProcessingProgress)
+
+    # ---------------------------------------------------------
+    # Signali backenda
+    # ---------------------------------------------------------
+    def _onSlicingStarted(self):
+        if self.state == self.STARTING:
+            self._enter(self.SLICING, self._slice_timeout)
+
+    def _onSlicingCancelled(self):
+        if self.state == self.SLICING:
+            self._fail("Slicing was cancelled by Cura.")
+
+    def _onBackendStateChange(self, state):
+        if state == BackendState.Done:
+            if self.state == self.SLICING:
+                # Cura po Done še dopolni gcode_list ({print_time} ...)
+                self._enter(self.IDLE, None)
+                QTimer.singleShot(
+                    0, lambda: self._completePass(self._currentGcodeList(), False)
+                )
+            elif self.state == self.STARTING:
+                self._unchanged = True
+        elif state in (BackendState.Error, BackendState.Disabled):
+            if self.state in (self.STARTING, self.SLICING):
+                self._fail("CuraEngine was unable to slice the model.")
+
+    def _onProcessingProgress(self, amount):
+        if self.state == self.STARTING and amount >= 1.0:
+            # "Slice unnecessary" – obstoječi G-code je še veljaven
+            self._unchanged = True
+            return
+        if self.state != self.SLICING:
+            return
+
+        if self._on_progress:
+            self._on_progress(self._index, amount)
+
+        layer = self.passes[self._index].stop_at_layer
+        if layer is not None:
+            lines = self._stoppedLayerChunks(layer)
+            if lines is not None:
+                self._enter(self.IDLE, None)
+                QTimer.singleShot(0, lambda: self._stopPass(lines))
+
+    def _stopPass(self, lines):
+        if not self.isRunning():
+            return
+        self._backend().stopSlicing()
+        self._completePass(lines, True)
+
+    def _onTimeout(self):
+        if self.state == self.STARTING:
+            self._fail("CuraEngine did not start slicing.")
+        elif self.state == self.SLICING:
+            self._fail("Slicing took too long and was stopped.")
+
+    # ---------------------------------------------------------
+    # Pomožne
+    # ---------------------------------------------------------
+    def _backend(self):
+        return CuraApplication.getInstance().getBackend()
+
+    def _currentGcodeList(self):
+        app = CuraApplication.getInstance()
+        scene = app.getController().getScene()
+        plate = app.getMultiBuildPlateModel().activeBuildPlate
+
+        if not hasattr(scene, "gcode_dict") or plate not in scene.gcode_dict:
+            return None
+        return scene.gcode_dict[plate]
+
+    def _stoppedLayerChunks(self, layer):
+        """Kopija kosov do vključno ;LAYER:n, ko ga CuraEngine že pošlje."""
+        lines = self._currentGcodeList()
+        if not lines:
+            return None
+        index = findLayer(lines, layer, self._scanned_chunks)
+        if index == -1:
+            self._scanned_chunks = len(lines)
+            return None
+        return list(lines[: index + 1])
+
+
+# -------------------------------------------------------------
+# Oba prehoda hkrati v ločenih procesih CuraEngine (CLI).
+# Uporabnikove nastavitve in Curin backend ostanejo nedotaknjeni.
+# jobs[i] = (ukaz, izhodna datoteka) ali None (prehod iz predpomnilnika)
+# -------------------------------------------------------------
+class ParallelSlicePipeline:
+
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    def __init__(
+        self,
+        passes,
+        jobs,
+        on_finished,
+        on_failed,
+        on_cancelled,
+        on_progress=None,
+        slice_timeout=900.0,
+    ):
+        self.passes = passes
+        self.state = self.RUNNING
+
+        self._jobs = jobs
+        self._on_finished = on_finished
+        self._on_failed = on_failed
+        self._on_cancelled = on_cancelled
+        self._on_progress = on_progress
+        self._slice_timeout = slice_timeout
+
+        self._processes = {}
+
+        self._timer = QTimer()
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._onTimeout)
+
+    def start(self):
+        for index, job in enumerate(self._jobs):
+            if job is None:
+                continue
+            command, _ = job
+            process = QProcess()
+            process.setProcessChannelMode(QProcess.ProcessChannelMode.MergedChannels)
+            on_finished = functools.partial(self._onProcessFinished, index)
+            on_error = functools.partial(self._onProcessError, index)
+            process.finished.connect(on_finished)
+            process.errorOccurred.connect(on_error)
+            self._processes[index] = process
+            process.start(command[0], command[1:])
+
+        if self._processes:
+            self._timer.start(int(self._slice_timeout * 1000))
+        else:
+            QTimer.singleShot(0, self._complete)
+
+    def cancel(self):
+        if not self.isRunning():
+            return
+        self._stop(self.CANCELLED)
+        QTimer.singleShot(0, self._on_cancelled)
+
+    def isRunning(self):
+        return self.state == self.RUNNING
+
+    # ---------------------------------------------------------
+    # Procesi
+    # ---------------------------------------------------------
+    def _onProcessFinished(self, index, exit_code, exit_status):
+        if not self.isRunning():
+            return
+
+        process = self._processes.pop(index)
+        log = bytes(process.readAll()).decode("utf-8", "replace")
+        if exit_status != QProcess.ExitStatus.NormalExit or exit_code != 0:
+            tail = "\n".join(log.strip().splitlines()[-5:])
+            self._fail("CuraEngine failed (exit code %d).\n\n%s" % (exit_code, tail))
+            return
+
+        _, output = self._jobs[index]
+        try:
+            chunks = list(iterFileChunks(output))
+        except OSError as e:
+            self._fail(str(e))
+            return
+        replaceHeader(chunks, headerFromEngineLog(log))
+        self.passes[index].lines = chunks
+        self.passes[index].truncated = False
+
+        if self._on_progress:
+            self._on_progress(index, 1.0)
+        if not self._processes:
+            self._complete()
+
+    def _onProcessError(self, index, error):
+        if error == QProcess.ProcessError.FailedToStart and self.isRunning():
+            self._fail("CuraEngine could not be started.")
+
+    def _complete(self):
+        self.state = self.DONE
+        self._timer.stop()
+        QTimer.singleShot(0, lambda: self._on_finished(self.passes))
+
+    def _fail(self, message):
+        self._stop(self.FAILED)
+        QTimer.singleShot(0, lambda: self._on_failed(message))
+
+    def _stop(self, state):
+        self.state = state
+        self._timer.stop()
+        for process in self._processes.values():
+            process.kill()
+            process.waitForFinished(1000)
+        self._processes.clear()
+
+    def _onTimeout(self):
+        if self.isRunning():
+            self._fail("Slicing took too long and was stopped.")
@@ -1,8 +1,16 @@
-# Verzija: 3
-# Sprememba: Dodan uvoz in izvoz register ter getMetaData za registracijo plugina
+# Verzija: 4
+# Sprememba: Registracija samo z menijem (SliceAndJoinMenu); jedro
+# SliceAndJoinGcode se uvozi ob prvi izbiri v meniju
 
-from .SliceAndJoinGcode import getMetaData
-from .SliceAndJoinGcode import register
-from .SliceAndJoinGcode import SliceAndJoinGcode
+from .SliceAndJoinMenu import SliceAndJoinMenu
 
-__all__ = ["getMetaData", "register", "SliceAndJoinGcode"]
\ No newline at end of file
+
+def getMetaData():
+    return {}
+
+
+def register(app):
+    return {"extension": SliceAndJoinMenu()}
+
+
+__all__ = ["getMetaData", "register", "SliceAndJoinMenu"]
@@ -0,0 +1,115 @@
+# ===================================================================
+# Opis: Meritev hitrosti razčlenitve vrstic za GcodeHighlighter.
+#  - Referenčna datoteka: ustvarjena (ponovljivo) ali podana pot
+#  - "old" = prejšnji highlightBlock brez setFormat
+#  - "file" = en prehod čez celo datoteko (prazen predpomnilnik)
+#  - "scroll" = drsenje okna GcodeView (60 vrstic, korak 3) – vsako
+#    okno se pobarva v celoti, kot po setPlainText
+#  - Cilj: scroll >= TARGET_LINES_PER_SEC
+#
+#  python benchmarks/bench_highlighter.py [datoteka.gcode]
+# ===================================================================
+
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from GcodeTokenizer import GcodeTokenizer  # noqa: E402
+
+TARGET_LINES_PER_SEC = 2_000_000
+REFERENCE_LAYERS = 200
+WINDOW_LINES = 60
+WHEEL_LINES = 3
+SCROLL_LINES = 200_000
+
+
+def referenceLines(layers=REFERENCE_LAYERS):
+    """Podobno kot CuraEngine: enake stene v vsakem layerju, absolutni E."""
+    rng = random.Random(51)
+    outline = [
+        (rng.randrange(50000, 180000) / 1000, rng.randrange(50000, 180000) / 1000)
+        for _ in range(1200)
+    ]
+    lines = [";FLAVOR:Marlin", ";TIME:6666", "M104 S200", "M140 S60", "G28"]
+    extruded = 0.0
+    for layer in range(layers):
+        lines += [";LAYER:%d" % layer, "M106 S255", "G0 F6000 Z%.1f" % (layer * 0.2)]
+        for wall in ("WALL-OUTER", "WALL-INNER", "FILL"):
+            lines += [";TYPE:" + wall, "G1 F2700 E%.5f" % extruded]
+            for i, (x, y) in enumerate(outline):
+                if i % 100 == 0:
+                    lines.append("G0 F6000 X%.3f Y%.3f" % (x, y))
+                else:
+                    extruded += 0.03
+                    lines.append("G1 F1800 X%.3f Y%.3f E%.5f" % (x, y, extruded))
+            lines.append("G1 F2700 E%.5f" % (extruded - 6.5))
+    lines += ["M107", "M104 S0", "M140 S0", "M84"]
+    return lines
+
+
+# prejšnja izvedba (za primerjavo)
+_OLD_TOKEN = re.compile(r"([GMXYZESF])([-+]?(?:\d+\.?\d*|\.\d+))")
+
+
+def oldSpans(text):
+    spans = []
+    comment_start = text.find(";")
+    if comment_start != -1:
+        spans.append((comment_start, len(text) - comment_start))
+        layer_match = re.search(r";LAYER:\d+", text)
+        if layer_match:
+            spans.append((layer_match.start(), len(layer_match.group())))
+        code_part = text[:comment_start]
+    else:
+        code_part = text
+    for match in _OLD_TOKEN.finditer(code_part):
+        spans.append((match.start(), len(match.group())))
+    return spans
+
+
+def measure(name, function, lines):
+    started = time.perf_counter()
+    for line in lines:
+        function(line)
+    elapsed = time.perf_counter() - started
+    rate = len(lines) / elapsed
+    print("%-12s %10.0f lines/s  (%.3f s)" % (name, rate, elapsed))
+    return rate
+
+
+def scrolledLines(lines):
+    """Vrstice v vrstnem redu, kot jih highlighter dobi ob drsenju."""
+    scrolled = []
+    for top in range(0, min(SCROLL_LINES, len(lines)), WHEEL_LINES):
+        scrolled += lines[top : top + WINDOW_LINES]
+    return scrolled
+
+
+def main(argv):
+    if len(argv) > 1:
+        with open(argv[1], encoding="utf-8", errors="replace") as f:
+            lines = f.read().split("\n")
+    else:
+        lines = referenceLines()
+    print("lines: %d, unique: %d" % (len(lines), len(set(lines))))
+    scrolled = scrolledLines(lines)
+
+    measure("old file", oldSpans, lines)
+    measure("file", GcodeTokenizer().spans, lines)
+    measure("old scroll", oldSpans, scrolled)
+    tokenizer = GcodeTokenizer()
+    rate = measure("scroll", tokenizer.spans, scrolled)
+    print(tokenizer.cacheInfo())
+
+    if rate < TARGET_LINES_PER_SEC:
+        print("below target %d lines/s" % TARGET_LINES_PER_SEC)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
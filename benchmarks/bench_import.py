@@ -0,0 +1,102 @@
+# ===================================================================
+# Opis: Čas uvoza plugina ob zagonu Cure in ob prvi uporabi menija.
+#  - Vsaka meritev v svežem procesu Python (brez predpomnjenih modulov)
+#    z nadomestnimi moduli UM / cura (cura_stubs)
+#  - register: uvoz paketa + register() – to plača vsak zagon Cure
+#  - first use: prva izbira v meniju (uvoz jedra, PyQt6 gradnikov,
+#    prikazovalnika in analize + ustvarjanje jedra); brez PyQt6 se
+#    izpusti
+#  - Poročilo: mediana časov in število novih modulov
+#
+#  python benchmarks/bench_import.py [--repeat 7] [--json izhod.json]
+# ===================================================================
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+_CHILD = """
+import json, sys, time
+sys.path.insert(0, %(here)r)
+from cura_stubs import importPlugin, installCuraStubs
+
+installCuraStubs(%(tmp)r)
+result = {}
+modules = len(sys.modules)
+started = time.perf_counter()
+extension = importPlugin().register(None)["extension"]
+result["register_s"] = time.perf_counter() - started
+result["register_modules"] = len(sys.modules) - modules
+
+modules = len(sys.modules)
+started = time.perf_counter()
+try:
+    extension.plugin()
+except ImportError as e:
+    result["first_use_error"] = str(e)
+else:
+    result["first_use_s"] = time.perf_counter() - started
+    result["first_use_modules"] = len(sys.modules) - modules
+print(json.dumps(result))
+"""
+
+
+def measureOnce(tmp):
+    code = _CHILD % dict(here=HERE, tmp=tmp)
+    output = subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def measure(repeat):
+    with tempfile.TemporaryDirectory(prefix="bench_import_") as tmp:
+        runs = [measureOnce(tmp) for _ in range(repeat)]
+    result = dict(repeat=repeat, python=sys.version.split()[0])
+    for key in ("register", "first_use"):
+        times = [run[key + "_s"] for run in runs if key + "_s" in run]
+        if times:
+            result[key + "_ms"] = round(statistics.median(times) * 1000, 2)
+            result[key + "_modules"] = runs[-1][key + "_modules"]
+        else:
+            result[key + "_error"] = runs[-1].get(key + "_error", "")
+    return result
+
+
+def reportLines(result):
+    lines = ["%-36s %10s %8s" % ("phase", "median ms", "modules")]
+    labels = (
+        ("register", "register (every Cura start)"),
+        ("first_use", "first menu use (core, UI, analysis)"),
+    )
+    for key, label in labels:
+        if key + "_ms" in result:
+            values = "%10.2f %8d" % (result[key + "_ms"], result[key + "_modules"])
+        else:
+            values = "skipped: " + result[key + "_error"]
+        lines.append("%-36s %s" % (label, values))
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SliceAndJoinGcode import time")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--json", help="rezultat še v datoteko JSON")
+    args = parser.parse_args()
+
+    result = measure(args.repeat)
+    for line in reportLines(result):
+        print(line)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,381 @@
+# ===================================================================
+# Opis: Ponovljiva zbirka meritev z generiranim G-code.
+#  - Vhod: gcode_generator.generatePair (slice #1 + #2), velikosti
+#    npr. 1MB,10MB,100MB,1GB; datoteke ostanejo v benchmarks/data
+#  - Meritve: extract (layerji iz datotek), open (mmap), merge,
+#    layers (LayerIndex), stats (glava z NumPy), highlight
+#    (GcodeTokenizer ob drsenju), search, replace, save_<format>
+#  - rewrite: niz pravil (GcodeRewrite) v enem prehodu; replace_each:
+#    ista pravila kot zaporedni replaceAll za primerjavo; rewrite_clamp:
+#    omejitev F ukazov G0/G1
+#  - Vsaka meritev je faza PhaseRecorder: wall, CPU, vrh RSS nad
+#    začetkom faze
+#  - upload_<format>: prenos na lokalni nadomestni OctoPrint
+#    (print_server_stub) prek PrintServerUpload
+#  - Če je na voljo PyQt6: še plugin_merge (_mergeGcode razširitve) in
+#    view (GcodeView + GcodeHighlighter), Qt offscreen in nadomestni
+#    moduli UM / cura (installCuraStubs) – Cura ni potrebna
+#  - Poročilo: tabela + razmerje do shranjene osnove (baseline.json);
+#    izhod 1, če je meritev počasnejša od osnove * tolerance
+#
+#  python benchmarks/bench_suite.py [--sizes 1MB,10MB] [--save-baseline]
+# ===================================================================
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, HERE)
+
+from gcode_generator import formatSize, generatePair, parseSize  # noqa: E402
+from GcodeDocument import GcodeDocument  # noqa: E402
+from GcodeEngine import (  # noqa: E402
+    iterBeforeLayer,
+    iterFileChunks,
+    iterFromLayer,
+    iterJoined,
+)
+from GcodeLayers import LayerIndex  # noqa: E402
+from GcodeRewrite import RewriteRules  # noqa: E402
+from GcodeSearch import compilePattern, iterSearchBatches, replaceAll  # noqa: E402
+from GcodeTokenizer import GcodeTokenizer  # noqa: E402
+from GcodeWriters import (  # noqa: E402
+    FORMATS,
+    GZIP,
+    PLAIN,
+    curaMetadata,
+    saveAtomically,
+)
+from PhaseRecorder import MB, PhaseRecorder  # noqa: E402
+from cura_stubs import importPlugin, installCuraStubs  # noqa: E402
+from print_server_stub import StubPrintServer  # noqa: E402
+from PrintServerUpload import PrintServer, uploadName  # noqa: E402
+
+DEFAULT_SIZES = "1MB,10MB"
+DATA_DIR = os.path.join(HERE, "data")
+BASELINE = os.path.join(HERE, "baseline.json")
+TOLERANCE = 1.25  # počasneje od osnove * TOLERANCE = regresija
+MIN_SECONDS = 0.05  # krajše meritve so preveč šumne za primerjavo
+SCROLL_LINES = 200_000
+WINDOW_LINES = 60
+WHEEL_LINES = 3
+SEARCH_TEXT = "G0 F6000"
+REPLACE_PATTERN = r"F6000"
+REPLACE_TEXT = "F7200"
+REWRITE_RULES = [
+    {"type": "literal", "find": "M106 S255", "replace": "M106 S204"},
+    {"type": "literal", "find": "M107", "replace": "M106 S0"},
+    {"type": "regex", "find": r"^;TYPE:(?P<t>[A-Z-]+)$", "replace": r";T:\g<t>"},
+    {"type": "regex", "find": r"^;MESH:.*$", "replace": ";MESH"},
+]
+CLAMP_RULES = [{"type": "clamp", "commands": "G0 G1", "parameter": "F", "max": 4800}]
+
+
+# -------------------------------------------------------------
+# Meritve brez Qt (ena velikost; stanje se prenaša v state)
+# -------------------------------------------------------------
+def benchExtract(state):
+    first_path, rest_path = state["paths"]
+    state["first"] = list(iterBeforeLayer(iterFileChunks(first_path)))
+    state["rest"] = list(iterFromLayer(iterFileChunks(rest_path)))
+    return dict(bytes=os.path.getsize(first_path) + os.path.getsize(rest_path))
+
+
+def benchOpen(state):
+    document = GcodeDocument.fromFile(state["paths"][1])
+    return dict(bytes=document.size(), pieces=document.pieceCount())
+
+
+def benchMerge(state):
+    state["document"] = GcodeDocument(iterJoined(state.pop("first"), state["rest"]))
+    return dict(bytes=state["document"].size())
+
+
+def benchLayers(state):
+    state["layers"] = LayerIndex(state["document"])
+    return dict(bytes=state["document"].size(), layers=state["layers"].count())
+
+
+def benchStats(state):
+    try:
+        from GcodeStats import analyzeDocument, headerEdits
+    except ImportError:
+        return None
+    try:
+        stats = analyzeDocument(state["document"], state["layers"])
+    except ImportError:  # NumPy
+        return None
+    edits = headerEdits(state["document"], state["layers"], stats)
+    return dict(bytes=state["document"].size(), edits=len(edits))
+
+
+def benchHighlight(state):
+    document = state["document"]
+    lines = document.getLines(0, min(document.lineCount(), SCROLL_LINES))
+    tokenizer = GcodeTokenizer()
+    count = 0
+    for top in range(0, len(lines), WHEEL_LINES):
+        for line in lines[top : top + WINDOW_LINES]:
+            tokenizer.spans(line)
+            count += 1
+    return dict(bytes=sum(len(line) + 1 for line in lines), lines=count)
+
+
+def benchSearch(state):
+    pattern = compilePattern(SEARCH_TEXT)
+    matches = sum(
+        len(starts) for starts, _, _ in iterSearchBatches(state["document"], pattern)
+    )
+    return dict(bytes=state["document"].size(), matches=matches)
+
+
+def benchReplace(state):
+    pattern = compilePattern(REPLACE_PATTERN, regex=True)
+    document, count = replaceAll(state["document"], pattern, REPLACE_TEXT)
+    return dict(bytes=document.size(), replaced=count)
+
+
+def _rewriteBench(rule_set):
+    def benchRewrite(state):
+        rules = RewriteRules.fromDicts(rule_set)
+        document, hits = rules.apply(state["document"])
+        return dict(bytes=document.size(), rules=len(hits), replaced=sum(hits))
+
+    return benchRewrite
+
+
+def benchReplaceEach(state):
+    document = state["document"]
+    replaced = 0
+    for rule in RewriteRules.fromDicts(REWRITE_RULES).rules:
+        document, count = replaceAll(document, rule.compiled(), rule.replace)
+        replaced += count
+    return dict(bytes=document.size(), rules=len(REWRITE_RULES), replaced=replaced)
+
+
+def _saveBench(kind, extension):
+    def benchSave(state):
+        document = state["document"]
+        path = os.path.join(state["tmp"], "bench" + extension)
+        metadata = curaMetadata(document.textRange(0, 1 << 16))
+        segments = document.iterSegments(1 << 22)
+        written = saveAtomically(
+            path, (text for _, text in segments), kind, metadata, total=document.size()
+        )
+        os.remove(path)
+        return dict(bytes=document.size(), file=written)
+
+    return benchSave
+
+
+_stub_server = None
+
+
+def _uploadBench(kind):
+    # lokalni nadomestni OctoPrint (telo hrani v RAM – peak MB vključuje
+    # strežnik); povezava se ponovno uporabi med meritvami
+    def benchUpload(state):
+        global _stub_server
+        if _stub_server is None:
+            _stub_server = StubPrintServer().start()
+        document = state["document"]
+        server = PrintServer(_stub_server.url)
+        segments = document.iterSegments(1 << 22)
+        result = server.upload(
+            uploadName("bench", kind),
+            (text for _, text in segments),
+            kind,
+            total=document.size(),
+        )
+        _stub_server.uploads.clear()
+        return dict(bytes=document.size(), sent=result["bytes"])
+
+    return benchUpload
+
+
+BENCHES = [
+    ("extract", benchExtract),
+    ("open", benchOpen),
+    ("merge", benchMerge),
+    ("layers", benchLayers),
+    ("stats", benchStats),
+    ("highlight", benchHighlight),
+    ("search", benchSearch),
+    ("replace", benchReplace),
+    ("rewrite", _rewriteBench(REWRITE_RULES)),
+    ("replace_each", benchReplaceEach),
+    ("rewrite_clamp", _rewriteBench(CLAMP_RULES)),
+]
+BENCHES += [("save_" + kind, _saveBench(kind, ext)) for kind, _, ext in FORMATS]
+BENCHES += [("upload_" + kind, _uploadBench(kind)) for kind in (PLAIN, GZIP)]
+
+
+# -------------------------------------------------------------
+# Meritve s Qt (offscreen)
+# -------------------------------------------------------------
+def qtBenches(tmp):
+    """[(ime, funkcija)] ali [] brez PyQt6."""
+    try:
+        import PyQt6.QtWidgets  # noqa: F401
+    except ImportError:
+        return []
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtWidgets import QApplication
+
+    installCuraStubs(tmp)
+    plugin = importPlugin()
+    # jedro se uvozi šele ob prvi uporabi menija (SliceAndJoinMenu)
+    extension_module = importlib.import_module(plugin.__name__ + ".SliceAndJoinGcode")
+    viewer_module = sys.modules[plugin.__name__ + ".GcodeViewer"]
+    application = QApplication.instance() or QApplication(["bench_suite"])
+
+    def benchPluginMerge(state):
+        extension = extension_module.SliceAndJoinGcode()
+        extension._phases = PhaseRecorder()
+        extension._gcode_first_layer = list(
+            iterBeforeLayer(iterFileChunks(state["paths"][0]))
+        )
+        extension._gcode_rest = state["rest"]
+        extension._mergeGcode()
+        return dict(bytes=extension._document.size())
+
+    def benchView(state):
+        view = viewer_module.GcodeView()
+        view.resize(1000, 800)
+        highlighter = viewer_module.GcodeHighlighter(view.editor.document())
+        view.setDocument(state["document"])
+        lines = min(state["document"].lineCount(), SCROLL_LINES)
+        for top in range(0, lines, WHEEL_LINES * 20):
+            view.scrollToLine(top)
+        application.processEvents()
+        highlighter.setDocument(None)
+        view.deleteLater()
+        return dict(bytes=state["document"].size(), windows=lines // 60)
+
+    return [("plugin_merge", benchPluginMerge), ("view", benchView)]
+
+
+# -------------------------------------------------------------
+# Zagon in poročilo
+# -------------------------------------------------------------
+def runSize(size, tmp, extra_benches):
+    paths = generatePair(DATA_DIR, size)
+    state = dict(paths=paths, tmp=tmp)
+    recorder = PhaseRecorder()
+    results = []
+    for name, bench in BENCHES + extra_benches:
+        with recorder.phase(name) as phase:
+            values = bench(state)
+        if values is None:
+            print("%-14s skipped" % name)
+            continue
+        peak = phase["rss_peak"] - phase["rss_start"] if phase["rss_peak"] else 0
+        results.append(
+            dict(
+                bench=name,
+                size=formatSize(size),
+                wall_s=phase["wall_s"],
+                cpu_s=phase["cpu_s"],
+                mb_s=round(values["bytes"] / MB / max(phase["wall_s"], 1e-6), 1),
+                peak_mb=round(max(peak, 0) / MB, 1),
+                **{key: value for key, value in values.items() if key != "bytes"},
+            )
+        )
+    return results
+
+
+def machineInfo():
+    return dict(
+        python=platform.python_version(),
+        platform=platform.platform(),
+        machine=platform.machine(),
+        cpus=os.cpu_count(),
+    )
+
+
+def loadBaseline(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            baseline = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return {(row["bench"], row["size"]): row for row in baseline.get("results", [])}
+
+
+def report(results, baseline, tolerance):
+    """Izpiše tabelo; vrne seznam regresij."""
+    regressions = []
+    print(
+        "%-14s %6s %9s %9s %9s %9s %8s"
+        % ("bench", "size", "wall s", "cpu s", "MB/s", "peak MB", "ratio")
+    )
+    for row in results:
+        base = baseline.get((row["bench"], row["size"]))
+        ratio = ""
+        if base and base["wall_s"] >= MIN_SECONDS:
+            value = row["wall_s"] / base["wall_s"]
+            ratio = "%.2f" % value
+            if value > tolerance:
+                ratio += " !"
+                regressions.append(row)
+        print(
+            "%-14s %6s %9.3f %9.3f %9.1f %9.1f %8s"
+            % (
+                row["bench"],
+                row["size"],
+                row["wall_s"],
+                row["cpu_s"],
+                row["mb_s"],
+                row["peak_mb"],
+                ratio,
+            )
+        )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SliceAndJoinGcode benchmarks")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="npr. 1MB,10MB,1GB")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--json", help="rezultati še v to datoteko")
+    options = parser.parse_args(argv)
+
+    sizes = [parseSize(size) for size in options.sizes.split(",") if size]
+    results = []
+    with tempfile.TemporaryDirectory(prefix="slice_and_join_bench_") as tmp:
+        extra_benches = qtBenches(tmp)
+        if not extra_benches:
+            print("PyQt6 not available – plugin benches skipped")
+        for size in sizes:
+            print("generating / running %s ..." % formatSize(size))
+            results += runSize(size, tmp, extra_benches)
+
+    record = dict(machine=machineInfo(), results=results)
+    if options.json:
+        with open(options.json, "w", encoding="utf-8") as f:
+            json.dump(record, f, indent=1)
+    if options.save_baseline:
+        with open(options.baseline, "w", encoding="utf-8") as f:
+            json.dump(record, f, indent=1)
+            f.write("\n")
+        print("baseline saved:", options.baseline)
+
+    regressions = report(results, loadBaseline(options.baseline), options.tolerance)
+    if regressions and not options.save_baseline:
+        count = len(regressions)
+        print("%d regression(s) over %.2fx baseline" % (count, options.tolerance))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+# ===================================================================
+# Opis: Nadomestni moduli UM in cura za uvoz plugina brez Cure.
+#  - installCuraStubs: samo kar plugin uvozi (Extension, Resources,
+#    CuraApplication s preferencami v slovarju ...)
+#  - importPlugin: paket plugina iz korena repozitorija (relativni
+#    uvozi delujejo kot v Curi)
+#  - Za bench_suite (Qt meritve) in bench_import
+# ===================================================================
+
+import importlib.util
+import os
+import sys
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class _Preferences:
+    def __init__(self):
+        self.values = {}
+
+    def addPreference(self, key, default):
+        self.values.setdefault(key, default)
+
+    def getValue(self, key):
+        return self.values.get(key)
+
+    def setValue(self, key, value):
+        self.values[key] = value
+
+
+class _CuraApplication:
+    _instance = None
+
+    def __init__(self):
+        self.preferences = _Preferences()
+
+    @classmethod
+    def getInstance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def getPreferences(self):
+        return self.preferences
+
+    def getGlobalContainerStack(self):
+        return None
+
+    def getVersion(self):
+        return "stub"
+
+
+class _Extension:
+    def __init__(self):
+        self.menu = []
+
+    def setMenuName(self, name):
+        self.menu_name = name
+
+    def addMenuItem(self, name, callback):
+        self.menu.append((name, callback))
+
+
+def installCuraStubs(storage_dir):
+    """Moduli UM.* in cura.* v sys.modules (samo kar plugin uvozi)."""
+
+    def module(name, **attributes):
+        stub = types.ModuleType(name)
+        stub.__dict__.update(attributes)
+        sys.modules.setdefault(name, stub)
+        return sys.modules[name]
+
+    class Resources:
+        @staticmethod
+        def getDataStoragePath():
+            return storage_dir
+
+        @staticmethod
+        def getStoragePath(*args):
+            return storage_dir
+
+    class BackendState:
+        NotStarted, Processing, Done, Error, Disabled = range(1, 6)
+
+    class Logger:
+        @staticmethod
+        def log(level, message, *args):
+            pass
+
+    module("UM")
+    module("UM.Extension", Extension=_Extension)
+    module("UM.Logger", Logger=Logger)
+    module("UM.Resources", Resources=Resources)
+    module("UM.Scene")
+    module("UM.Scene.Iterator")
+    module("UM.Scene.Iterator.DepthFirstIterator", DepthFirstIterator=iter)
+    module("UM.Backend")
+    module("UM.Backend.Backend", BackendState=BackendState)
+    module("cura")
+    module("cura.CuraApplication", CuraApplication=_CuraApplication)
+
+
+def importPlugin():
+    """Paket plugina (relativni uvozi) iz korena repozitorija."""
+    name = "SliceAndJoinGcode"
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(
+        name, os.path.join(ROOT, "__init__.py"), submodule_search_locations=[ROOT]
+    )
+    package = importlib.util.module_from_spec(spec)
+    sys.modules[name] = package
+    spec.loader.exec_module(package)
+    return package
@@ -0,0 +1,217 @@
+# ===================================================================
+# Opis: Ponovljiv generator G-code v slogu CuraEngine za meritve.
+#  - Glava (;FLAVOR, ;TIME, ;Filament used, ;MINX..;MAXZ ...), start
+#    G-code, layerji ;LAYER:n z ;TYPE odseki, konec G-code
+#  - Layer: stene (WALL-OUTER / WALL-INNER), polnilo cik-cak, premiki
+#    G0 z umikom (retract), ;TIME_ELAPSED na koncu layerja
+#  - Absolutni E (M82), kot privzeto v Curi
+#  - Velikost od 1 MB do 1 GB: število layerjev in dolžina polnila se
+#    prilagodita ciljni velikosti, isti seed = enaka datoteka
+#  - generatePair: slice #1 (Outside → Inside) in #2 (Inside → Outside)
+#    z enakim številom layerjev, kot ju dobi plugin
+#
+#  python benchmarks/gcode_generator.py 10MB izhod.gcode [inside_out]
+# ===================================================================
+
+import math
+import os
+import random
+import sys
+
+LAYER_HEIGHT = 0.2
+CENTER = (110.0, 110.0)
+OUTLINE_POINTS = 240
+FILAMENT_PER_MM = 0.0333  # mm filamenta na mm poti (0.4 x 0.2, 1.75 mm)
+
+_UNITS = {"KB": 1 << 10, "MB": 1 << 20, "GB": 1 << 30}
+
+
+def parseSize(text):
+    """ "10MB" → bajti."""
+    text = text.strip().upper()
+    for unit, factor in _UNITS.items():
+        if text.endswith(unit):
+            return int(float(text[: -len(unit)]) * factor)
+    return int(text)
+
+
+def formatSize(size):
+    for unit in ("GB", "MB", "KB"):
+        if size >= _UNITS[unit] and size % _UNITS[unit] == 0:
+            return "%d%s" % (size // _UNITS[unit], unit)
+    return str(size)
+
+
+def layerCount(size):
+    """Layerjev za ciljno velikost (večja datoteka = daljši layerji)."""
+    return min(max(size // 200_000, 20), 1500)
+
+
+# -------------------------------------------------------------
+# Obris modela (ista oblika v vseh layerjih, radij malo niha)
+# -------------------------------------------------------------
+def _outline(rng, radius):
+    wobble = [rng.uniform(-3.0, 3.0) for _ in range(6)]
+    points = []
+    for i in range(OUTLINE_POINTS):
+        angle = 2 * math.pi * i / OUTLINE_POINTS
+        r = radius + sum(w * math.sin((k + 2) * angle) for k, w in enumerate(wobble))
+        x = CENTER[0] + r * math.cos(angle)
+        points.append((x, CENTER[1] + r * math.sin(angle)))
+    return points
+
+
+class _Writer:
+    def __init__(self, f):
+        self.f = f
+        self.e = 0.0
+        self.x, self.y = CENTER
+        self.lines = 0
+
+    def emit(self, lines):
+        self.f.write("\n".join(lines))
+        self.f.write("\n")
+        self.lines += len(lines)
+
+    def extrude(self, lines, x, y, feedrate=None):
+        self.e += math.hypot(x - self.x, y - self.y) * FILAMENT_PER_MM
+        self.x, self.y = x, y
+        prefix = "G1 F%d " % feedrate if feedrate else "G1 "
+        lines.append("%sX%.3f Y%.3f E%.5f" % (prefix, x, y, self.e))
+
+    def travel(self, lines, x, y, z=None):
+        # umik, premik, nazaj
+        lines.append("G1 F2700 E%.5f" % (self.e - 6.5))
+        if z is None:
+            lines.append("G0 F6000 X%.3f Y%.3f" % (x, y))
+        else:
+            lines.append("G0 F6000 X%.3f Y%.3f Z%.1f" % (x, y, z))
+        lines.append("G1 F2700 E%.5f" % self.e)
+        self.x, self.y = x, y
+
+
+# -------------------------------------------------------------
+# Ena datoteka
+# -------------------------------------------------------------
+def generate(path, size, seed=1, inset_direction="inside_out", layers=None):
+    """Zapiše G-code ~size bajtov; vrne (layerji, vrstice, bajti)."""
+    rng = random.Random(seed)
+    layers = layers or layerCount(size)
+    outer = _outline(rng, 40.0)
+    inner = _outline(random.Random(seed), 39.6)
+    header_size = 1200
+    layer_bytes = max((size - header_size) // layers, 4000)
+    estimated_time = layers * 95
+
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        out = _Writer(f)
+        out.emit(
+            [
+                ";FLAVOR:Marlin",
+                ";TIME:%d" % estimated_time,
+                ";Filament used: %.5fm" % (layers * 0.35),
+                ";Layer height: %.1f" % LAYER_HEIGHT,
+                ";MINX:66.6",
+                ";MINY:66.6",
+                ";MINZ:0.2",
+                ";MAXX:153.4",
+                ";MAXY:153.4",
+                ";MAXZ:%.1f" % (layers * LAYER_HEIGHT),
+                ";TARGET_MACHINE.NAME:Creality Ender-3",
+                ";Generated with Cura_SteamEngine 5.11.0",
+                "M140 S60",
+                "M105",
+                "M190 S60",
+                "M104 S200",
+                "M105",
+                "M109 S200",
+                "M82 ;absolute extrusion mode",
+                "G28 ;Home",
+                "G92 E0 ;Reset Extruder",
+                "G1 Z2.0 F3000 ;Move Z Axis up",
+                "G1 X0.1 Y20 Z0.3 F5000.0 ;Move to start position",
+                "G1 X0.1 Y200.0 Z0.3 F1500.0 E15 ;Draw the first line",
+                "G92 E0",
+                "G1 F2700 E-5",
+                ";LAYER_COUNT:%d" % layers,
+            ]
+        )
+        out.e = -5.0
+
+        walls = [("WALL-INNER", inner), ("WALL-OUTER", outer)]
+        if inset_direction == "outside_in":
+            walls.reverse()
+        for layer in range(layers):
+            start = f.tell()
+            z = (layer + 1) * LAYER_HEIGHT
+            lines = [";LAYER:%d" % layer]
+            if layer == 1:
+                lines.append("M106 S255")
+            for name, points in walls:
+                first = points[layer % len(points)]
+                layer_z = z if name == walls[0][0] else None
+                out.travel(lines, first[0], first[1], layer_z)
+                lines.append(";TYPE:" + name)
+                feedrate = 1500 if name == "WALL-OUTER" else 1800
+                for number, (x, y) in enumerate(points[1:] + points[:1]):
+                    out.extrude(lines, x, y, feedrate if number == 0 else None)
+            out.emit(lines)
+
+            # polnilo cik-cak do velikosti layerja
+            lines = [";TYPE:FILL"]
+            fill_rng = random.Random(seed * 100_003 + layer)
+            out.travel(lines, 80.0, 80.0)
+            direction = 1 if layer % 2 else -1
+            row = 0
+            while f.tell() - start < layer_bytes - 4096 or row < 2:
+                y = 75.0 + (row % 120) * 0.5
+                x = 110.0 + direction * fill_rng.uniform(25.0, 32.0)
+                out.extrude(lines, x, y, 3000 if row == 0 else None)
+                if row % 40 == 39:
+                    out.travel(lines, 80.0 + fill_rng.uniform(0, 5), y + 0.5)
+                direction = -direction
+                row += 1
+                if len(lines) >= 256:
+                    out.emit(lines)
+                    lines = []
+            lines.append(";TIME_ELAPSED:%.6f" % ((layer + 1) * 95.0))
+            out.emit(lines)
+
+        out.emit(
+            [
+                "G1 F2700 E%.5f" % (out.e - 5),
+                "M140 S0",
+                "M107",
+                "G91 ;Relative positioning",
+                "G1 E-2 F2700 ;Retract a bit",
+                "G90 ;Absolute positioning",
+                "M84 X Y E ;Disable all steppers but Z",
+                "M82 ;absolute extrusion mode",
+                "M104 S0",
+                ";End of Gcode",
+            ]
+        )
+        written = f.tell()
+    return layers, out.lines, written
+
+
+def generatePair(directory, size, seed=1):
+    """Slice #1 (outside_in) + #2 (inside_out); vrne poti (lahko obstajata)."""
+    os.makedirs(directory, exist_ok=True)
+    name = "gen_%s_%d" % (formatSize(size), seed)
+    paths = []
+    for direction in ("outside_in", "inside_out"):
+        path = os.path.join(directory, "%s.%s.gcode" % (name, direction))
+        if not os.path.exists(path):
+            generate(path + ".part", size, seed, direction)
+            os.replace(path + ".part", path)
+        paths.append(path)
+    return paths
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("usage: gcode_generator.py SIZE output.gcode [outside_in|inside_out]")
+        sys.exit(2)
+    direction = sys.argv[3] if len(sys.argv) > 3 else "inside_out"
+    print(generate(sys.argv[2], parseSize(sys.argv[1]), inset_direction=direction))
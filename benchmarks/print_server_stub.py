@@ -0,0 +1,158 @@
+# ===================================================================
+# Opis: Lokalni nadomestni strežnik OctoPrint / Moonraker za prenose.
+#  - GET /api/version (OctoPrint) ali /server/info (Moonraker)
+#  - POST /api/files/local ali /server/files/upload: multipart telo s
+#    Content-Length ali Transfer-Encoding: chunked, odgovor v obliki
+#    pravega strežnika (201 + JSON)
+#  - Preveri X-Api-Key (če je nastavljen), hrani zadnji prenos
+#    (ime, polja, bajti, število chunkov) in število povezav
+#  - HTTP/1.1 keep-alive, zato se vidi ponovna uporaba povezav
+#
+#  python benchmarks/print_server_stub.py [octoprint|moonraker] [vrata]
+# ===================================================================
+
+import http.server
+import json
+import sys
+import threading
+
+OCTOPRINT = "octoprint"
+MOONRAKER = "moonraker"
+
+
+class StubPrintServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, kind=OCTOPRINT, api_key="", port=0):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.kind = kind
+        self.api_key = api_key
+        self.connections = 0
+        self.uploads = []  # slovarji: filename, fields, data, chunks
+        self._thread = None
+
+    @property
+    def url(self):
+        return "http://127.0.0.1:%d" % self.server_address[1]
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # glava in telo odgovora sta ločena zapisa
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, values):
+        body = json.dumps(values).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _authorized(self):
+        key = self.server.api_key
+        if key and self.headers.get("X-Api-Key") != key:
+            self._reply(401 if self.server.kind == MOONRAKER else 403, {})
+            return False
+        return True
+
+    def do_GET(self):
+        kind = self.server.kind
+        if not self._authorized():
+            return
+        if kind == OCTOPRINT and self.path == "/api/version":
+            self._reply(200, {"api": "0.1", "server": "1.10.0", "text": "stub"})
+        elif kind == MOONRAKER and self.path == "/server/info":
+            self._reply(200, {"result": {"klippy_state": "ready"}})
+        else:
+            self._reply(404, {})
+
+    def do_POST(self):
+        kind = self.server.kind
+        expected = "/api/files/local" if kind == OCTOPRINT else "/server/files/upload"
+        body, chunks = self._readBody()
+        if body is None:
+            self.close_connection = True  # klient je prekinil prenos
+            return
+        if not self._authorized():
+            return
+        if self.path != expected:
+            self._reply(404, {})
+            return
+        content_type = self.headers.get("Content-Type", "")
+        if "boundary=" not in content_type:
+            self._reply(400, {"error": "no multipart boundary"})
+            return
+        boundary = content_type.split("boundary=", 1)[1].strip('"').encode("ascii")
+        filename, fields, data = _parseMultipart(body, boundary)
+        if filename is None:
+            self._reply(400, {"error": "no file part"})
+            return
+        self.server.uploads.append(
+            dict(filename=filename, fields=fields, data=data, chunks=chunks)
+        )
+        started = fields.get("print") == "true"
+        if kind == OCTOPRINT:
+            files = {"local": {"name": filename, "origin": "local"}}
+            self._reply(201, {"done": True, "files": files, "effectivePrint": started})
+        else:
+            item = {"path": filename, "root": fields.get("root", "gcodes")}
+            reply = {"item": item, "action": "create_file", "print_started": started}
+            self._reply(201, reply)
+
+    def _readBody(self):
+        if self.headers.get("Transfer-Encoding", "").lower() != "chunked":
+            return self.rfile.read(int(self.headers.get("Content-Length", 0))), 0
+        parts = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return None, len(parts)
+            size = int(line.split(b";")[0], 16)
+            if size == 0:
+                self.rfile.readline()  # prazna vrstica za zadnjim chunkom
+                return b"".join(parts), len(parts)
+            parts.append(self.rfile.read(size))
+            self.rfile.readline()
+
+
+def _parseMultipart(body, boundary):
+    filename = None
+    data = b""
+    fields = {}
+    for part in body.split(b"--" + boundary)[1:]:
+        if part.startswith(b"--"):
+            break
+        head, _, content = part.partition(b"\r\n\r\n")
+        content = content[:-2] if content.endswith(b"\r\n") else content
+        head = head.decode("utf-8")
+        name = head.split('name="', 1)[1].split('"', 1)[0]
+        if 'filename="' in head:
+            filename = head.split('filename="', 1)[1].split('"', 1)[0]
+            data = content
+        else:
+            fields[name] = content.decode("utf-8")
+    return filename, fields, data
+
+
+if __name__ == "__main__":
+    kind = sys.argv[1] if len(sys.argv) > 1 else OCTOPRINT
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    server = StubPrintServer(kind, port=port)
+    print("%s stub on %s" % (kind, server.url))
+    server.serve_forever()
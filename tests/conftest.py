@@ -0,0 +1,18 @@
+# ===================================================================
+# Opis: Skupno za teste jedra (moduli brez Qt in Cure).
+#  - Koren repozitorija na sys.path (moduli se uvozijo kot v
+#    benchmarks: samostojno, brez paketa); benchmarks za generator
+#    G-code (zlati izhod)
+#  - Pomožne funkcije testov so v helpers.py (tests/ je na sys.path,
+#    ker pytest doda mapo testov)
+#
+#  python -m pytest -q
+# ===================================================================
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (os.path.join(ROOT, "benchmarks"), ROOT):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,8 @@
+# ===================================================================
+# Opis: Skupne pomožne funkcije testov.
+# ===================================================================
+
+
+def pieces(text, size):
+    """Besedilo v kosih po size znakov (meje kosov sredi vrstic)."""
+    return [text[i : i + size] for i in range(0, len(text), size)]
@@ -0,0 +1,49 @@
+# ===================================================================
+# Opis: SliceAndJoinCli – opravilo se združi kot v pluginu
+# (mergePasses) in zapiše atomarno.
+# ===================================================================
+
+import os
+
+from GcodeEngine import iterFileChunks
+from GcodeMerge import mergePasses
+from GcodeRewrite import RewriteRules
+from GcodeWriters import PLAIN
+from SliceAndJoinCli import runJob
+
+RULES = [{"type": "literal", "find": "M106 S255", "replace": "M106 S204"}]
+
+
+def _write(path, fan):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(
+            ";FLAVOR:Marlin\n;TIME:9999\nG28\n;LAYER:0\nG1 F1500 Z0.2\nG1 X10 E1\n"
+            "%s\n;LAYER:1\nG1 Z0.4\nG1 X20 E2\n" % fan
+        )
+
+
+def test_run_job_matches_merge_passes(tmp_path):
+    first, rest = str(tmp_path / "a.first.gcode"), str(tmp_path / "a.rest.gcode")
+    _write(first, "M107")
+    _write(rest, "M106 S255")
+    output = tmp_path / "out"
+    output.mkdir()
+    options = dict(
+        output=str(output),
+        layer=1,
+        acceleration=1000.0,
+        recompute_header=True,
+        seam_check="fix",
+        rules=RULES,
+        format=PLAIN,
+    )
+    result = runJob({"name": "a", "first": first, "rest": rest}, options)
+    assert result["ok"], result.get("error")
+    assert result["rewrite"] == [1] and len(result["seam"]) == 1
+
+    expected, _, _ = mergePasses(
+        iterFileChunks(first), iterFileChunks(rest), rules=RewriteRules.fromDicts(RULES)
+    )
+    with open(result["output"], encoding="utf-8", newline="") as f:
+        assert f.read() == expected.text()
+    assert os.listdir(output) == ["a.gcode"]  # brez začasnih datotek
@@ -0,0 +1,120 @@
+# ===================================================================
+# Opis: GcodeDocument – zamenjave nad tabelo kosov enako kot nad
+# nizom, indeks vrstic, DocumentHistory (Undo / Redo).
+# ===================================================================
+
+import os
+import weakref
+
+import pytest
+
+from GcodeDocument import DocumentHistory, GcodeDocument
+from helpers import pieces
+
+TEXT = "".join("G1 X%d Y%d E%.3f\n;L%d\n" % (n, n * 3, n / 9, n) for n in range(200))
+
+
+def _replaced(text, edits):
+    parts = []
+    position = 0
+    for start, end, replacement in edits:
+        parts += [text[position:start], replacement]
+        position = end
+    return "".join(parts) + text[position:]
+
+
+def _assertLines(document, text):
+    lines = text.split("\n")
+    assert document.size() == len(text)
+    assert document.lineCount() == len(lines)
+    assert document.getLines(0, len(lines)) == lines
+    for line in (0, 1, 57, len(lines) // 2, len(lines) - 1):
+        offset = document.lineStartOffset(line)
+        assert offset == sum(len(part) + 1 for part in lines[:line])
+        assert document.lineAtOffset(offset) == line
+
+
+EDITS = [
+    [],
+    [(0, 0, ";START\n")],  # vstavljanje na začetek
+    [(5, 9, "Y"), (40, 40, "\n;x\n"), (100, 180, "")],  # čez meje kosov
+    [(len(TEXT) - 6, len(TEXT), "\nEND")],
+    [(i, i + 2, "G0") for i in range(0, len(TEXT), 500)],
+]
+
+
+@pytest.mark.parametrize("edits", EDITS)
+@pytest.mark.parametrize("size", [7, 333, len(TEXT)])
+def test_replaced_matches_string(edits, size):
+    document = GcodeDocument(pieces(TEXT, size))
+    replaced = document.replaced(edits)
+    expected = _replaced(TEXT, edits)
+    assert replaced.text() == expected
+    _assertLines(replaced, expected)
+    assert document.text() == TEXT  # stara verzija ostane
+
+
+def test_slice_joined_and_spilled(tmp_path):
+    document = GcodeDocument(pieces(TEXT, 333))
+    parts = [document.slice(0, 1000), document.slice(1000, len(TEXT))]
+    joined = GcodeDocument.joined(parts)
+    assert joined.text() == TEXT
+    _assertLines(joined, TEXT)
+    with open(tmp_path / "spill", "w+b") as f:
+        spilled = joined.replaced([(3, 5, "ž")]).spilled(f)
+        assert spilled.text() == _replaced(TEXT, [(3, 5, "ž")])
+        _assertLines(spilled, spilled.text())
+
+
+def test_history_undo_redo():
+    first = GcodeDocument.fromText(TEXT)
+    history = DocumentHistory(first)
+    assert not history.canUndo() and not history.canRedo()
+    second = history.push(first.replaced([(0, 2, "G0")]))
+    third = history.push(second.replaced([(0, 0, ";x\n")]))
+    assert history.undo() is second
+    assert history.undo() is first
+    assert history.undo() is first and not history.canUndo()
+    assert history.redo() is second
+    # nova sprememba zavrže Redo
+    fourth = history.push(second.replaced([(0, 2, "G1")]))
+    assert not history.canRedo()
+    assert history.current() is fourth and fourth.text() == TEXT
+    assert third.text() == ";x\nG0" + TEXT[2:]
+
+
+def test_history_drops_oldest_versions():
+    history = DocumentHistory(GcodeDocument.fromText(TEXT), limit=3)
+    versions = [history.push(GcodeDocument.fromText(str(n))) for n in range(4)]
+    assert history.versions() == tuple(versions[1:])
+    assert history.undo() is versions[2] and history.undo() is versions[1]
+    assert not history.canUndo()
+
+
+def test_spilled_over_budget_keeps_file_pieces():
+    document = GcodeDocument(pieces(TEXT, 333))
+    assert document.spilledOverBudget(0) is document
+    assert document.spilledOverBudget(len(TEXT)) is document
+    spilled = document.spilledOverBudget(len(TEXT) - 1)
+    assert spilled.memorySize() == 0 and spilled.text() == TEXT
+    # nova verzija: na disk gre samo zamenjava, kosi datoteke ostanejo
+    replaced = spilled.replaced([(0, 2, "G0")])
+    assert replaced.memorySize() == 2
+    assert replaced.spilledOverBudget(1).text() == "G0" + TEXT[2:]
+
+
+def test_replace_buffer_releases_source_file(tmp_path):
+    path = tmp_path / "in.gcode"
+    path.write_text(TEXT)
+    document = GcodeDocument.fromFile(str(path), piece_size=500)
+    edited = document.replaced([(0, 2, "G0")])
+    (source,) = edited.fileBuffers()
+    released = weakref.ref(source)
+    copy = source.copied(open(tmp_path / "copy", "w+b"))
+    for version in (document, edited):
+        version.replaceBuffer(source, copy)
+    del source
+    assert released() is None  # mmap originala je zaprt
+    (tmp_path / "new").write_text("x")
+    os.replace(tmp_path / "new", path)
+    assert document.text() == TEXT and edited.text() == "G0" + TEXT[2:]
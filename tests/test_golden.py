@@ -0,0 +1,53 @@
+# ===================================================================
+# Opis: Zlati izhod – par iz benchmarks/gcode_generator skozi
+# mergePasses (stik, pravilo, glava) in shranjevanje tja in nazaj.
+#  - Sprememba izhoda (razrez, pravila, ocena časa) spremeni zgoščeno
+#    vrednost; če je namerna, se vrednosti tu posodobijo
+# ===================================================================
+
+import hashlib
+
+import pytest
+
+from gcode_generator import generatePair
+from GcodeEngine import iterFileChunks
+from GcodeLayers import LayerIndex
+from GcodeMerge import mergePasses
+from GcodeRewrite import RewriteRules
+from GcodeWriters import BGCODE, GZIP, PLAIN, iterDecoded, saveAtomically
+
+RULES = [{"type": "clamp", "commands": "G0 G1", "parameter": "F", "max": 2400}]
+HEADER = (
+    ";FLAVOR:Marlin\n;TIME:558\n;Filament used: 0.013m\n;Layer height: 0.2\n"
+    ";MINX:0.1\n;MINY:20\n;MINZ:0.2\n;MAXX:150.023\n;MAXY:200\n;MAXZ:4\n"
+)
+SHA256 = "b9752a1873b719560f0a2067596f3f13d0363a82e3a5d3e5b6a4f21cadd92589"
+
+
+@pytest.fixture(scope="module")
+def merged(tmp_path_factory):
+    first, rest = generatePair(str(tmp_path_factory.mktemp("gen")), 200_000)
+    return mergePasses(
+        list(iterFileChunks(first)),
+        list(iterFileChunks(rest)),
+        rules=RewriteRules.fromDicts(RULES),
+    )
+
+
+def test_merge_golden(merged):
+    document, index, result = merged
+    text = document.text()
+    assert text.startswith(HEADER)
+    assert hashlib.sha256(text.encode()).hexdigest() == SHA256
+    assert result == dict(seam=[], seam_fixed=False, rewrite=[205], header_error=None)
+    expected = LayerIndex(document)
+    assert list(index.numbers) == list(range(20)) == list(expected.numbers)
+    assert index.offsets == expected.offsets and index.lines == expected.lines
+
+
+@pytest.mark.parametrize("kind", [PLAIN, GZIP, BGCODE])
+def test_save_round_trip(merged, tmp_path, kind):
+    document = merged[0]
+    path = str(tmp_path / ("out." + kind))
+    saveAtomically(path, document.iterText(), kind, total=document.size())
+    assert "".join(iterDecoded(path, kind)) == document.text()
@@ -0,0 +1,87 @@
+# ===================================================================
+# Opis: GcodeLayers – mergeAtLayer enako kot mergeToString, indeks
+# združenega G-code enak novemu LayerIndex.
+# ===================================================================
+
+import pytest
+
+from GcodeDocument import GcodeDocument
+from GcodeEngine import mergeToString
+from GcodeLayers import LayerIndex, mergeAtLayer
+
+
+def _chunks(name, layers):
+    chunks = [";FLAVOR:Marlin\n;NAME:%s\nG28\nG1 Z5 F3000" % name]
+    for n in range(layers):
+        chunks.append(
+            ";LAYER:%d\nG0 F6000 X%d Y%d Z%.1f\nG1 X%d E%.3f\n;%s"
+            % (n, n, n, 0.2 * (n + 1), n + 1, n / 3, name)
+        )
+    chunks.append(";END\nM107\n")
+    return chunks
+
+
+def _assertIndexEqual(index, expected):
+    assert index.numbers == expected.numbers
+    assert index.offsets == expected.offsets
+    assert index.lines == expected.lines
+    assert index.heights == expected.heights
+
+
+@pytest.mark.parametrize("layer", [1, 3])
+def test_merge_at_layer_matches_merge_to_string(layer):
+    first = _chunks("first", 6)
+    rest = _chunks("rest", 6)
+    document, index = mergeAtLayer(first, rest, layer)
+    assert document.text() == mergeToString(first, rest, layer)
+    _assertIndexEqual(index, LayerIndex(GcodeDocument.fromText(document.text())))
+
+
+def test_merge_at_layer_marker_inside_chunk():
+    # datoteka kot en kos: ;LAYER:1 sredi kosa
+    first = ["\n".join(_chunks("first", 4))]
+    rest = ["\n".join(_chunks("rest", 4))]
+    document, index = mergeAtLayer(first, rest)
+    assert document.text() == mergeToString(first, rest)
+    _assertIndexEqual(index, LayerIndex(GcodeDocument.fromText(document.text())))
+
+
+def test_merge_at_layer_without_marker_in_rest():
+    first = _chunks("first", 3)
+    rest = _chunks("rest", 1)  # samo ;LAYER:0
+    document, index = mergeAtLayer(first, rest)
+    assert document.text() == mergeToString(first, rest)
+    assert list(index.numbers) == [0]
+
+
+def test_layer_range():
+    document = GcodeDocument.fromText("\n".join(_chunks("x", 4)))
+    index = LayerIndex(document)
+    begin, end = index.layerRange(1, 2)
+    text = document.textRange(begin, end)
+    assert text.startswith(";LAYER:1\n") and "\n;LAYER:3" not in text
+    assert text.endswith(";x\n")
+    assert index.layerRange(2) == (index.offsets[2], index.offsets[3])
+    assert index.layerRange(3) == (index.offsets[3], document.size())
+    assert index.layerRange(7) is None
+
+
+@pytest.mark.parametrize(
+    "old, new, shifted",
+    [
+        (";NAME:a", ";NAME:abc\n;x", True),  # glava
+        ("G1 X1 E0.000", "G1 X1 E0.500", True),
+        ("G0 F6000 X1 Y1 Z0.4", "G0 F6000 X1 Y1 Z0.5", False),  # višina
+        ("G1 X1 E0.000", "G1 X1 E0\n;LAYER:7", False),  # nov layer
+        (";LAYER:1", ";LAYER:9", False),
+    ],
+)
+def test_replaced_index(old, new, shifted):
+    document = GcodeDocument.fromText("\n".join(_chunks("a", 4)))
+    offset = document.text().index(old)
+    edits = [(offset, offset + len(old), new)]
+    index = LayerIndex(document).replaced(document.replaced(edits), edits)
+    if shifted:
+        _assertIndexEqual(index, LayerIndex(index.document))
+    else:
+        assert index is None
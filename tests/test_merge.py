@@ -0,0 +1,70 @@
+# ===================================================================
+# Opis: GcodeMerge – razrez na ;LAYER:1, nato stik → pravila → glava.
+# ===================================================================
+
+from GcodeEngine import mergeToString
+from GcodeLayers import LayerIndex
+from GcodeMerge import mergePasses
+from GcodeRewrite import RewriteRules
+
+HEADER = ";FLAVOR:Marlin\n;TIME:9999\n;Filament used: 9.9m\n;MINX:0\n;MAXX:0\nG28"
+
+
+def _pass(fan):
+    return [
+        HEADER,
+        ";LAYER:0\nG1 F1500 Z0.2\nG1 X10 Y10 E1\n" + fan,
+        ";LAYER:1\nG1 Z0.4\nG1 X20 Y10 E2",
+        ";LAYER:2\nG1 Z0.6\nG1 X20 Y20 E3\n",
+    ]
+
+
+def test_merge_without_steps_matches_merge_to_string():
+    first, rest = _pass("M107"), _pass("M106 S255")
+    document, index, merged = mergePasses(
+        first, rest, seam_check="off", recompute_header=False
+    )
+    assert document.text() == mergeToString(first, rest)
+    assert merged == dict(seam=[], seam_fixed=False, rewrite=None, header_error=None)
+    assert list(index.numbers) == [0, 1, 2]
+
+
+def test_seam_patch_before_rules_and_header():
+    rules = RewriteRules.fromDicts(
+        [{"type": "literal", "find": "M106 S255", "replace": "M106 S204"}]
+    )
+    document, index, merged = mergePasses(
+        _pass("M107"), _pass("M106 S255"), seam_check="fix", rules=rules
+    )
+    text = document.text()
+    # popravek stika (ventilator slica #2) je pred ;LAYER:1 in ga
+    # pravila že vidijo
+    assert ";SEAM_FIX" in text
+    assert text.index("M106 S204") < text.index(";LAYER:1")
+    assert "M106 S255" not in text
+    assert [issue.kind for issue in merged["seam"]] == ["fan"]
+    assert merged["seam_fixed"] and merged["rewrite"] == [1]
+    # glava iz združenega G-code, indeks velja za končno besedilo
+    assert ";TIME:9999" not in text and ";MAXX:20\n" in text
+    expected = LayerIndex(document)
+    assert index.offsets == expected.offsets and index.lines == expected.lines
+
+
+def test_seam_check_only_reports():
+    document, _, merged = mergePasses(
+        _pass("M107"), _pass("M106 S255"), seam_check="check", recompute_header=False
+    )
+    assert ";SEAM_FIX" not in document.text()
+    assert merged["seam"] and not merged["seam_fixed"]
+
+
+def test_truncated_first_pass_gives_same_header():
+    # skrajšan slice #1 nima glave (Cura jo zapiše na koncu) – glava iz
+    # slica #2, ;TIME, ;Filament used in obseg pa iz združenega G-code
+    full = _pass("M107")
+    rest = [HEADER.replace("9999", "1234").replace("9.9m", "1.2m")] + _pass("M107")[1:]
+    truncated = full[1:3]
+    expected, _, _ = mergePasses(full, rest, seam_check="off")
+    document, _, _ = mergePasses(truncated, rest, truncated=True, seam_check="off")
+    assert document.text() == expected.text()
+    assert ";TIME:1234" not in document.text()
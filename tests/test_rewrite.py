@@ -0,0 +1,137 @@
+# ===================================================================
+# Opis: GcodeRewrite – pravila po vrsti (vsako vidi rezultat
+# prejšnjih), clamp skupaj z ostalimi pravili v isti vrstici.
+# ===================================================================
+
+import re
+
+import pytest
+
+from GcodeDocument import GcodeDocument
+from GcodeEngine import isLineLocal
+from GcodeRewrite import RewriteRules
+from helpers import pieces
+
+TEXT = "".join(
+    ";LAYER:%d\nM107\nG0 F9000 X%d Y%d ;travel\nG1 F1800 X%d E%.4f\nM106 S255\n"
+    % (n, n, n * 2, n + 1, n / 7)
+    for n in range(300)
+)
+
+
+def test_rules_apply_in_order():
+    rules = [
+        {"type": "literal", "find": "M107", "replace": "M106 S0"},
+        {"type": "literal", "find": "M106 S0", "replace": "M106 S1"},
+        {"type": "regex", "find": r"^M106 S(?P<s>\d+)$", "replace": r"M106 S\g<s> P1"},
+        {"type": "literal", "find": "S255 P1", "replace": "S204"},
+    ]
+    expected = TEXT
+    for rule in rules:
+        expected = re.sub(
+            rule["find"] if rule["type"] == "regex" else re.escape(rule["find"]),
+            rule["replace"],
+            expected,
+            flags=re.MULTILINE,
+        )
+    document = GcodeDocument(pieces(TEXT, 997))
+    rewritten, hits = RewriteRules.fromDicts(rules).apply(document, segment_size=4096)
+    assert rewritten.text() == expected
+    assert hits == [300, 300, 600, 300]
+    assert document.text() == TEXT
+
+
+def test_clamp_and_other_rules_on_same_line():
+    rules = RewriteRules.fromDicts(
+        [
+            {"type": "literal", "find": ";travel", "replace": ";move"},
+            {"type": "clamp", "commands": "G0 G1", "parameter": "F", "max": 6000},
+            {"type": "regex", "find": r"^G0 ", "replace": "G0  "},
+        ]
+    )
+    document = GcodeDocument.fromText("G0 F9000 X1 ;travel\nG1 F1800 X2\n")
+    rewritten, hits = rules.apply(document)
+    assert rewritten.text() == "G0  F6000 X1 ;move\nG1 F1800 X2\n"
+    assert hits == [1, 1, 1]
+
+
+def test_rules_across_lines():
+    # regex čez vrstice: celo območje, še vedno po vrsti
+    rules = RewriteRules.fromDicts(
+        [
+            {"type": "literal", "find": "M107", "replace": "M106 S0"},
+            {"type": "regex", "find": r"S0\nG0", "replace": "S0\n;fan off\nG0"},
+        ]
+    )
+    rewritten, hits = rules.apply(GcodeDocument.fromText("M107\nG0 X1\n"))
+    assert rewritten.text() == "M106 S0\n;fan off\nG0 X1\n"
+    assert hits == [1, 1]
+
+
+@pytest.mark.parametrize(
+    "text, flags, expected",
+    [
+        ("^G1 ", re.MULTILINE, True),  # odseki so poravnani na vrstice
+        ("F6000$", re.MULTILINE, True),
+        ("(?i:m107)", re.MULTILINE, True),  # ignore_case pravila
+        ("(?P<x>\\d+)F", 0, True),
+        ("^G1", 0, False),  # brez MULTILINE: začetek odseka
+        ("(?s:G1.X)", re.MULTILINE, False),
+        ("(?-m:^G1)", re.MULTILINE, False),
+        ("G1\\sX", re.MULTILINE, False),
+        ("[^;]+", re.MULTILINE, False),
+        ("[^\\n;]+", re.MULTILINE, True),
+        (r"[\t-\r]", 0, False),  # razpon čez "\n"
+        (r"[\x00-\x7f]+", 0, False),
+        (r"\N{LINE FEED}", 0, False),
+        (r"X\d+[\x00-\x7f]+G1", 0, False),
+        (r"[^\S]", 0, False),
+        (r"\S+\d\w", 0, True),
+        ("G1.X", 0, True),
+        ("(?s)G1.X", 0, False),
+        (r"(G1) \1", 0, True),
+    ],
+)
+def test_is_line_local(text, flags, expected):
+    assert isLineLocal(re.compile(text, flags)) is expected
+
+
+def test_anchored_rules_use_segments():
+    rules = RewriteRules.fromDicts(
+        [
+            {
+                "type": "regex",
+                "find": "^m107$",
+                "replace": "M106 S0",
+                "ignore_case": True,
+            },
+            {"type": "regex", "find": r"^;LAYER:(?P<n>\d+)$", "replace": r";L\g<n>"},
+        ]
+    )
+    assert rules._dispatcher((0, 1)).line_local
+    document = GcodeDocument(pieces(TEXT, 997))
+    rewritten, hits = rules.apply(document, segment_size=4096)
+    expected = re.sub("(?m)^;LAYER:(\\d+)$", r";L\1", TEXT.replace("M107", "M106 S0"))
+    assert rewritten.text() == expected
+    assert hits == [300, 300]
+
+
+@pytest.mark.parametrize(
+    "find, replace, ignore_case",
+    [
+        (r"(G[01]) (F\d+)", r"\1 \2 ;f", False),  # odseki
+        (r"^(m10[67])( S\d+)?$", r"\1\2 ;fan", True),  # (?i:...) in ^
+        (r"(M107)\n(G0)", r"\2\n\1", False),  # celo območje
+        (r"\\1", "x", False),  # "\\" in števka ni sklic
+    ],
+)
+def test_numbered_references(find, replace, ignore_case):
+    rule = {"type": "regex", "find": find, "replace": replace}
+    rule["ignore_case"] = ignore_case
+    flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+    expected, count = re.subn(find, replace, TEXT, flags=flags)
+    document = GcodeDocument(pieces(TEXT, 997))
+    rules = RewriteRules.fromDicts([rule])
+    rewritten, hits = rules.apply(document, segment_size=4096)
+    assert rewritten.text() == expected
+    assert hits == [count]
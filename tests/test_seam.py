@@ -0,0 +1,69 @@
+# ===================================================================
+# Opis: GcodeSeam – popravek stika pred ;LAYER:1 (zlati izhod) in
+# stanje stroja po popravku enako stanju slica #2.
+# ===================================================================
+
+from GcodeDocument import GcodeDocument
+from GcodeEngine import iterBeforeLayer, mergeToString
+from GcodeSeam import MachineState, checkSeam
+
+HEADER = ";FLAVOR:Marlin\nM104 S%d\n%s\nG92 E0"
+FIRST = [
+    HEADER % (200, "M82"),
+    ";LAYER:0\nG1 F1500 Z0.2\nG1 X10 Y10 E5\nG1 F2700 E4\nM106 S128",
+    ";LAYER:1\nG1 X1",
+]
+REST = [
+    HEADER % (205, "M82"),
+    ";LAYER:0\nG1 F1500 Z0.3\nG1 X12 Y10 E6\nM106 S255\nG1 F1800",
+    ";LAYER:1\nG1 Z0.5\nG1 X20 Y20 E7",
+]
+
+
+def _check(first, rest):
+    document = GcodeDocument.fromText(mergeToString(first, rest))
+    issues, edits = checkSeam(document, iterBeforeLayer(rest, 1))
+    return document, issues, edits
+
+
+def test_seam_patch_golden():
+    document, issues, edits = _check(FIRST, REST)
+    assert [str(issue) for issue in issues] == [
+        "hotend: 200.0 → 205.0 (fixed)",
+        "fan: 128.0 → 255.0 (fixed)",
+        "Z: 0.2 → 0.3 (fixed)",
+        "X: 10.0 → 12.0 (check)",
+        "E: 4.0 → 6.0 (fixed)",
+        "retraction: 1.0 → 0.0 (fixed)",
+        "F: 2700.0 → 1800.0 (fixed)",
+    ]
+    offset = document.text().index(";LAYER:1")
+    assert edits == [
+        (
+            offset,
+            offset,
+            ";SEAM_FIX: slice #1 -> slice #2\nM104 S205\nM106 S255\nG0 Z0.3\n"
+            "G92 E5\nG1 F2700 E6\nG1 F1800\n",
+        )
+    ]
+
+
+def test_patched_state_matches_slice_two():
+    for mode in ("M82", "M83"):
+        first = [HEADER % (200, mode)] + FIRST[1:]
+        rest = [HEADER % (205, mode)] + REST[1:]
+        document, _, edits = _check(first, rest)
+        fixed = document.replaced(edits).text()
+        actual = MachineState().feed([fixed[: fixed.index(";LAYER:1")]])
+        expected = MachineState().feed(iterBeforeLayer(rest, 1))
+        for name in ("hotend", "fan", "feedrate", "absolute_e"):
+            assert getattr(actual, name) == getattr(expected, name)
+        assert actual.position["Z"] == expected.position["Z"]
+        assert actual.retracted() == expected.retracted()
+        if mode == "M82":
+            assert actual.e == expected.e
+
+
+def test_same_state_needs_no_patch():
+    _, issues, edits = _check(REST, REST)
+    assert issues == [] and edits == []
@@ -0,0 +1,83 @@
+# ===================================================================
+# Opis: GcodeSearch – replaceAll enako kot re.sub, iskanje po odsekih
+# in oknih (vzorec čez vrstice), preklic med odsekom.
+# ===================================================================
+
+import re
+
+import pytest
+
+import GcodeSearch
+from GcodeDocument import GcodeDocument
+from GcodeSearch import compilePattern, iterSearchBatches, replaceAll
+from helpers import pieces
+
+TEXT = "".join(
+    ";LAYER:%d\nG0 F6000 X%d Y%d\nG1 F1800 X%d E%.4f\n" % (n, n, n * 2, n + 1, n / 7)
+    for n in range(400)
+)
+
+
+@pytest.mark.parametrize(
+    "search, replace",
+    [
+        ("F6000", "F7200"),  # redki zadetki
+        (r"X(\d+)", r"X\1.0"),  # gosti zadetki (cel odsek z re.subn)
+        ("^", ";START\n"),  # prazen zadetek: samo začetek (brez MULTILINE)
+        ("(?m)^", "> "),  # prazen zadetek na vsaki vrstici
+        ("e?$", "!"),
+        ("x*", "-"),
+        (r"[\t-\r]+", " "),  # razpon sprejme "\n"
+        (r"X\d+[\x00-\x7f]+G1", "G1"),
+    ],
+)
+def test_replace_all_matches_re_sub(search, replace):
+    document = GcodeDocument(pieces(TEXT, 997))
+    pattern = compilePattern(search, regex=True, allow_empty=True)
+    expected, expected_count = pattern.subn(replace, TEXT)
+    replaced, count = replaceAll(document, pattern, replace, segment_size=4096)
+    assert replaced.text() == expected
+    assert count == expected_count
+    assert document.text() == TEXT  # stara verzija ostane
+
+
+def test_search_rejects_empty_match():
+    with pytest.raises(re.error):
+        compilePattern("^", regex=True)
+
+
+def test_search_batches_find_matches_across_pieces():
+    document = GcodeDocument(pieces(TEXT, 5))  # zadetki čez meje kosov
+    pattern = compilePattern("g1 f1800")
+    batches = iterSearchBatches(document, pattern, segment_size=512)
+    starts = [start for batch, _, _ in batches for start in batch]
+    assert starts == [m.start() for m in pattern.finditer(TEXT)]
+
+
+@pytest.mark.parametrize(
+    "search", [r"G1\s+F", r"\d\n;LAYER:1\d\n", r"[^;]+", r"X\d+[\s\S]{0,60}?E"]
+)
+def test_search_across_lines_in_windows(search):
+    document = GcodeDocument(pieces(TEXT, 997))
+    pattern = compilePattern(search, regex=True)
+    batches = iterSearchBatches(document, pattern, segment_size=700)
+    spans = [span for starts, ends, _ in batches for span in zip(starts, ends)]
+    assert spans == [m.span() for m in pattern.finditer(TEXT)]
+
+
+def test_search_cancel_inside_segment(monkeypatch):
+    monkeypatch.setattr(GcodeSearch, "BATCH_MATCHES", 10)
+    document = GcodeDocument.fromText(TEXT)
+    cancelled = []
+    batches = iterSearchBatches(document, compilePattern("g"), cancelled.__len__)
+    starts, _, scanned = next(batches)
+    cancelled.append(True)
+    assert len(starts) == 10 and scanned < len(TEXT)
+    assert list(batches) == []
+
+
+def test_replace_all_cancelled():
+    document = GcodeDocument.fromText(TEXT)
+    for search in ("F6000", r"\d\n;"):
+        pattern = compilePattern(search, regex=True)
+        assert replaceAll(document, pattern, "x", lambda: True) is None
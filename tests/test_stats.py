@@ -0,0 +1,93 @@
+# ===================================================================
+# Opis: GcodeStats – števila iz bajtov enaka float(), ;TIME_ELAPSED
+# iz istega prehoda kot premiki.
+# ===================================================================
+
+import numpy
+import pytest
+
+import GcodeStats
+from GcodeDocument import GcodeDocument
+from GcodeLayers import LayerIndex
+from GcodeStats import analyzeDocument, headerEdits
+from helpers import pieces
+
+NUMBERS = (
+    "0 -0 +5 12 0.2 -1.25 150.023 .5 -.5 7. 12345678.87654321 123456789.5 "
+    "0.123456789 -98765.4321 1234567890123456 1e5 5-3 - . -. 1.2.3 3.4."
+).split()
+
+
+def _expected(number):
+    # prvi znak je del števila, nato do prvega znaka, ki ni števka/pika
+    end = 1
+    while end < min(len(number), GcodeStats.NUMBER_WIDTH) and (
+        number[end].isdigit() or number[end] == "."
+    ):
+        end += 1
+    try:
+        return float(number[:end])
+    except ValueError:
+        return float("nan")
+
+
+@pytest.mark.parametrize("block", [1, 5, 1 << 14])
+def test_parse_numbers_matches_float(monkeypatch, block):
+    monkeypatch.setattr(GcodeStats, "NUMBER_BLOCK", block)
+    raw = b""
+    positions = []
+    for number in NUMBERS:
+        raw += b"X"
+        positions.append(len(raw))
+        raw += number.encode() + b" "
+    data = numpy.frombuffer(raw + bytes(GcodeStats._PADDING), dtype=numpy.uint8)
+    values = GcodeStats._parseNumbers(data, numpy.array(positions))
+    expected = [_expected(number) for number in NUMBERS]
+    numpy.testing.assert_array_equal(values, expected)
+    assert numpy.signbit(values[1])
+
+
+def test_time_elapsed_from_parse():
+    text = (
+        ";FLAVOR:Marlin\n;TIME:1\nG28\n"
+        ";LAYER:0\nG1 F600 X10 E1\n;TIME_ELAPSED:1.5\n"
+        ";LAYER:1\nG1 X0 E2 ;TIME_ELAPSED:9\n;TIME_ELAPSED:3\n"
+    )
+    document = GcodeDocument(pieces(text, 7))
+    index = LayerIndex(document)
+    stats = analyzeDocument(document, index)
+    assert stats.moves == 2
+    assert list(stats.time_elapsed) == [
+        text.index(";TIME_ELAPSED:1.5"),
+        text.index(";TIME_ELAPSED:3"),
+    ]
+    edits = headerEdits(document, index, stats)
+    result = document.replaced(edits).text()
+    first = stats.prefix_time_s + stats.layer_time_s[0]
+    assert ";TIME_ELAPSED:%g\n" % first in result
+    assert ";TIME_ELAPSED:%g\n" % (first + stats.layer_time_s[1]) in result
+    assert "G1 X0 E2 ;TIME_ELAPSED:9\n" in result  # ni na začetku vrstice
+
+
+def test_header_golden():
+    # dva premika po 10 mm v isti smeri, 10 mm/s, a = 1000 mm/s²:
+    # pospešek / pojemek 0.01 s + 9.95 mm s polno hitrostjo = 1.005 s
+    text = (
+        ";FLAVOR:Marlin\n;TIME:9999\n;Filament used: 9.9m\n;MINX:5\n;MAXX:5\n"
+        ";MAXZ:5\n;PRINT.SIZE.MAX.X:5\nM82\nG92 E0\n"
+        ";LAYER:0\nG1 F600 X10 E1\nG1 X20 E2\n;TIME_ELAPSED:7\n"
+    )
+    document = GcodeDocument.fromText(text)
+    index = LayerIndex(document)
+    stats = analyzeDocument(document, index, acceleration=1000.0)
+    assert stats.moves == 3
+    assert stats.time_s == pytest.approx(2.01)
+    assert stats.filament_mm == 2.0
+    assert stats.print_mm == 20.0 and stats.travel_mm == 0.0
+    assert stats.bounds == (0.0, 0.0, 0.0, 20.0, 0.0, 0.0)
+    result = document.replaced(headerEdits(document, index, stats)).text()
+    assert result == (
+        ";FLAVOR:Marlin\n;TIME:2\n;Filament used: 0.002m\n;MINX:0\n;MAXX:20\n"
+        ";MAXZ:0\n;PRINT.SIZE.MAX.X:20\nM82\nG92 E0\n"
+        ";LAYER:0\nG1 F600 X10 E1\nG1 X20 E2\n;TIME_ELAPSED:2.01\n"
+    )
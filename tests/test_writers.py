@@ -0,0 +1,72 @@
+# ===================================================================
+# Opis: GcodeWriters – MeatPack, .bgcode in .gcode.gz tja in nazaj.
+# ===================================================================
+
+import pytest
+
+from GcodeWriters import (
+    BGCODE,
+    GZIP,
+    PLAIN,
+    iterDecoded,
+    meatpack,
+    saveAtomically,
+    unmeatpack,
+)
+from helpers import pieces
+
+ENABLE = b"\xff\xff\xfb"
+
+LINES = (
+    ";FLAVOR:Marlin\n"
+    "G1\n"
+    "G1 X1\n"
+    "G0 F6000 X10.5 Y-3.25\n"
+    "\n"
+    "M107\n"
+    ";TYPE:WALL-OUTER ž\n"
+    "G1 X120.034 Y84.5 E0.0325\n"
+)
+
+
+def test_meatpack_packs_each_line():
+    # "G1 X1\n": sode dolžine; "G1\n": liha dolžina, "\n" dobi par "\n"
+    assert meatpack(b"G1 X1\n") == ENABLE + bytes([0x1D, 0xEB, 0xC1])
+    assert meatpack(b"G1\nG1\n") == ENABLE + bytes([0x1D, 0xCC, 0x1D, 0xCC])
+
+
+def test_unmeatpack_ignores_high_nibble_after_newline():
+    # kot firmware: za "\n" se zgornji 4 biti (tudi 0b1111) ne berejo
+    assert unmeatpack(ENABLE + bytes([0xFC, 0x1D])) == b"\nG1"
+    assert unmeatpack(ENABLE + bytes([0x1C])) == b"\n"
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        LINES,
+        LINES[:-1],  # zadnja vrstica brez "\n"
+        LINES + "G1X",
+        "",
+        "\n\n\n",
+        "a\nbc\n",
+    ],
+)
+def test_meatpack_round_trip(text):
+    data = text.encode("utf-8")
+    assert unmeatpack(meatpack(data)) == data
+
+
+def test_meatpack_keeps_first_character_of_every_line():
+    data = ("".join("G1 X%d Y%d\n" % (i, i * 7) for i in range(500))).encode()
+    decoded = unmeatpack(meatpack(data)).decode()
+    assert all(line.startswith("G1 X") for line in decoded.splitlines())
+
+
+@pytest.mark.parametrize("kind", [PLAIN, GZIP, BGCODE])
+def test_save_and_decode(tmp_path, kind):
+    text = LINES * 3000  # več blokov .bgcode
+    path = str(tmp_path / ("out." + kind))
+    saveAtomically(path, pieces(text, 7001), kind, total=len(text))
+    assert "".join(iterDecoded(path, kind)) == text
+    assert [p.name for p in tmp_path.iterdir()] == ["out." + kind]